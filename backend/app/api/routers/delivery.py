@@ -1,15 +1,190 @@
-from fastapi import APIRouter
-from pydantic import BaseModel, Field
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from datetime import date
+from typing import List, Optional
+import json
+from app.core.config import settings
+from app.core.db import get_db
+from app.models.delivery import DeliveryFeeRule, DeliverySlot, DeliveryZone
+from app.schemas.delivery import (
+    DeliverySlotRead, DeliverySlotUpdate, DeliveryDayAvailability, SlotAvailability, SlotRemaining,
+    OccupancyRebuildResult, GeocodeEntry, GeocodeUpsertResult, RoutePlanRead, TruckRouteRead, RouteStopRead,
+    UnassignedStopRead, FeeRequest, FeeQuote, FeeBatchRequest, FeeBatchQuote, DeliveryZoneRead,
+    DeliveryZoneUpdate, FeeReloadResult
+)
+from app.services import delivery_fees, delivery_routes, delivery_slots
+from app.services.delivery_fees import fee_engine
 
 router = APIRouter()
 
-class FeeRequest(BaseModel):
-    postcode: str
-    items: List[dict]
+def _quote(table: delivery_fees.FeeTable, req: FeeRequest, categories: dict) -> FeeQuote:
+    items, units = delivery_fees.cart_size(req.items)
+    volume = req.volumeLitres
+    if volume is None:
+        volume = delivery_slots.load_volume_l(units, categories)
+    quote = table.quote(
+        req.postcode, items, volume,
+        white_glove=req.whiteGloveService, setup=req.setupService, removal=req.oldMattressRemoval,
+    )
+    return FeeQuote(
+        postcode=req.postcode, fee=float(quote.fee), deliverable=quote.deliverable, zone=quote.zone,
+        baseFee=float(quote.base), surcharges=float(quote.surcharges), items=quote.items,
+        volumeLitres=quote.volume_l, reason=quote.reason,
+    )
 
-@router.post("/delivery/calculate")
-def calc_fee(req: FeeRequest):
-    # Simple placeholder: flat 49, free if 3+ items
-    fee = 0 if len(req.items) >= 3 else 49
-    return {"fee": fee}
+def _skus_to_estimate(requests: List[FeeRequest]) -> set:
+    return {
+        item.get("sku") for req in requests if req.volumeLitres is None
+        for item in req.items if item.get("sku")
+    }
+
+@router.post("/delivery/calculate", response_model=FeeQuote)
+def calc_fee(req: FeeRequest, db: Session = Depends(get_db)):
+    """
+    Delivery fee for a cart going to ``postcode``.
+
+    Priced by the postcode's zone rules on item count and load volume,
+    plus the zone's surcharges for any requested services.
+    """
+    categories = delivery_slots.categories_for(db, _skus_to_estimate([req]))
+    return _quote(fee_engine.table(db), req, categories)
+
+@router.post("/delivery/calculate/batch", response_model=FeeBatchQuote)
+def calc_fees(payload: FeeBatchRequest, db: Session = Depends(get_db)):
+    """Quote many carts at once (one category lookup for the lot)"""
+    categories = delivery_slots.categories_for(db, _skus_to_estimate(payload.requests))
+    table = fee_engine.table(db)
+    return FeeBatchQuote(quotes=[_quote(table, req, categories) for req in payload.requests])
+
+@router.get("/delivery/zones", response_model=List[DeliveryZoneRead])
+def get_zones(db: Session = Depends(get_db)):
+    return db.execute(select(DeliveryZone).order_by(DeliveryZone.id)).scalars().all()
+
+@router.put("/delivery/zones/{code}", response_model=DeliveryZoneRead)
+def put_zone(code: str, payload: DeliveryZoneUpdate, db: Session = Depends(get_db)):
+    """Create or replace a zone and its fee rules; every worker picks it up within the reload interval"""
+    try:
+        delivery_fees.parse_patterns(payload.postcodes)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    zone = db.execute(select(DeliveryZone).where(DeliveryZone.code == code)).scalar_one_or_none()
+    if zone is None:
+        zone = DeliveryZone(code=code)
+        db.add(zone)
+    for field, value in payload.model_dump(exclude={"rules"}).items():
+        setattr(zone, field, value)
+    zone.rules = [DeliveryFeeRule(**rule.model_dump()) for rule in payload.rules]
+    db.commit()
+    db.refresh(zone)
+    fee_engine.reload(db)
+    return zone
+
+@router.post("/delivery/fees/reload", response_model=FeeReloadResult)
+def reload_fees(db: Session = Depends(get_db)):
+    """Recompile this worker's fee table now"""
+    table = fee_engine.reload(db)
+    return FeeReloadResult(zones=len(table.zones), loads=fee_engine.loads)
+
+@router.get("/delivery/slots", response_model=List[DeliveryDayAvailability])
+def get_slot_availability(
+    start: date = Query(..., alias="from", description="First day (inclusive)"),
+    end: date = Query(..., alias="to", description="Last day (inclusive)"),
+    db: Session = Depends(get_db),
+):
+    """Remaining capacity of every active slot for each day in the range"""
+    if end < start:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="'to' is before 'from'")
+    if (end - start).days >= settings.DELIVERY_MAX_RANGE_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Range is limited to {settings.DELIVERY_MAX_RANGE_DAYS} days"
+        )
+    return [
+        DeliveryDayAvailability(day=day, slots=[
+            SlotAvailability(
+                id=slot.code, label=slot.label, timeRange=slot.time_range,
+                capacity=(label := delivery_slots.capacity_label(slot, orders, minutes, volume)),
+                available=label != "full",
+                remaining=SlotRemaining(orders=orders, crewMinutes=minutes, volumeLitres=volume),
+            )
+            for slot, orders, minutes, volume in slots
+        ])
+        for day, slots in delivery_slots.availability(db, start, end)
+    ]
+
+@router.get("/delivery/slots/definitions", response_model=List[DeliverySlotRead])
+def get_slot_definitions(db: Session = Depends(get_db)):
+    return db.execute(select(DeliverySlot).order_by(DeliverySlot.position, DeliverySlot.id)).scalars().all()
+
+@router.put("/delivery/slots/definitions/{code}", response_model=DeliverySlotRead)
+def put_slot_definition(code: str, payload: DeliverySlotUpdate, db: Session = Depends(get_db)):
+    """Create or replace a slot; existing bookings are kept even if capacity drops below them"""
+    slot = db.execute(select(DeliverySlot).where(DeliverySlot.code == code)).scalar_one_or_none()
+    if slot is None:
+        slot = DeliverySlot(code=code)
+        db.add(slot)
+    for field, value in payload.model_dump().items():
+        setattr(slot, field, value)
+    db.commit()
+    db.refresh(slot)
+    return slot
+
+@router.post("/delivery/slots/rebuild", response_model=OccupancyRebuildResult)
+def rebuild_slot_occupancy(db: Session = Depends(get_db)):
+    """Recompute slot occupancy from the sales' bookings"""
+    return OccupancyRebuildResult(slots=delivery_slots.rebuild_occupancy(db))
+
+def _clock(minutes: float) -> str:
+    minutes = int(round(minutes))
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+@router.put("/delivery/geocodes", response_model=GeocodeUpsertResult)
+def put_geocodes(entries: List[GeocodeEntry], db: Session = Depends(get_db)):
+    """Store coordinates for delivery addresses (the cache route planning reads)"""
+    stored = delivery_routes.store_geocodes(db, ((e.address.model_dump(), e.lat, e.lon) for e in entries))
+    return GeocodeUpsertResult(stored=stored)
+
+@router.get("/delivery/routes", response_model=RoutePlanRead)
+def plan_routes(
+    day: date = Query(..., alias="date", description="Delivery day"),
+    trucks: Optional[int] = Query(None, ge=1, le=200, description="Trucks on the road (default: the most any slot has)"),
+    time_budget: Optional[float] = Query(None, gt=0, le=60, description="Seconds of route improvement"),
+    db: Session = Depends(get_db),
+):
+    """
+    Per-truck stop sequences for every order delivering on a day.
+
+    Stops are ordered to respect slot time windows and truck load, then
+    shortened with 2-opt/or-opt within the time budget. Orders without a
+    delivery address or a cached geocode are listed as unassigned.
+    """
+    plan, sales = delivery_routes.plan_day(db, day, vehicles=trucks, time_budget=time_budget)
+    routes = []
+    for route in plan.routes:
+        stops = []
+        for visit in route.visits:
+            sale = sales[visit.stop.id]
+            address = delivery_routes.delivery_address(json.loads(sale.customer_json)) or {}
+            stops.append(RouteStopRead(
+                saleId=sale.id, orderNumber=sale.order_number, address=delivery_routes.format_address(address),
+                lat=visit.stop.lat, lon=visit.stop.lon, timeSlot=sale.delivery_time_slot,
+                window=f"{_clock(visit.stop.window[0])}-{_clock(visit.stop.window[1])}",
+                arrival=_clock(visit.arrival), start=_clock(visit.start), departure=_clock(visit.departure),
+                lateMinutes=int(round(visit.late)), serviceMinutes=visit.stop.service_minutes,
+                volumeLitres=visit.stop.volume_l,
+            ))
+        routes.append(TruckRouteRead(
+            truck=route.vehicle + 1, stops=stops, distanceKm=round(route.distance_km, 2),
+            travelMinutes=int(round(route.travel_minutes)), finish=_clock(route.finish), volumeLitres=route.volume_l,
+        ))
+    return RoutePlanRead(
+        day=day,
+        routes=routes,
+        unassigned=[UnassignedStopRead(saleId=sale_id, reason=reason) for sale_id, reason in plan.unassigned],
+        distanceKm=round(sum(r.distance_km for r in plan.routes), 2),
+        lateStops=sum(1 for r in plan.routes for v in r.visits if v.late > 0),
+        constructionCost=round(plan.construction_cost, 1),
+        cost=round(plan.cost, 1),
+        elapsedSeconds=round(plan.elapsed_seconds, 3),
+    )
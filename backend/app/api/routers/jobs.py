@@ -0,0 +1,88 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from datetime import timezone
+from typing import Optional
+import json
+from app.core.db import get_db
+from app.models.job import Job
+from app.schemas.job import JobCreate, JobRead, JobList, JobStats
+from app.services import job_handlers  # noqa: F401 (registers the built-in job kinds)
+from app.services import jobs
+
+router = APIRouter()
+
+def _job_to_read(job: Job) -> JobRead:
+    return JobRead(
+        id=job.id,
+        kind=job.kind,
+        status=job.status,
+        payload=json.loads(job.payload_json or "{}"),
+        result=json.loads(job.result_json) if job.result_json is not None else None,
+        error=job.error,
+        progress=job.progress,
+        progress_message=job.progress_message,
+        attempts=job.attempts,
+        max_attempts=job.max_attempts,
+        run_at=job.run_at,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+    )
+
+@router.post("/jobs", response_model=JobRead, status_code=status.HTTP_202_ACCEPTED)
+def create_job(payload: JobCreate, db: Session = Depends(get_db)):
+    """Queue a job; poll GET /jobs/{id} for progress and the result"""
+    run_at = payload.run_at
+    if run_at is not None and run_at.tzinfo is not None:
+        # Stored as naive UTC like every other timestamp
+        run_at = run_at.astimezone(timezone.utc).replace(tzinfo=None)
+    try:
+        job = jobs.enqueue(db, payload.kind, payload.payload, payload.max_attempts, run_at)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{e}; known kinds: {', '.join(jobs.kinds())}"
+        )
+    db.commit()
+    db.refresh(job)
+    return _job_to_read(job)
+
+@router.get("/jobs", response_model=JobList)
+def list_jobs(
+    job_status: Optional[str] = Query(None, alias="status", description="queued, running, succeeded or failed"),
+    kind: Optional[str] = Query(None),
+    page_size: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    db: Session = Depends(get_db),
+):
+    stmt = select(Job)
+    if job_status:
+        stmt = stmt.where(Job.status == job_status)
+    if kind:
+        stmt = stmt.where(Job.kind == kind)
+    if cursor:
+        if not cursor.isdigit():
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor")
+        stmt = stmt.where(Job.id < int(cursor))
+    found = db.execute(stmt.order_by(Job.id.desc()).limit(page_size + 1)).scalars().all()
+    has_more = len(found) > page_size
+    found = found[:page_size]
+    return JobList(
+        items=[_job_to_read(job) for job in found],
+        page_size=page_size,
+        has_more=has_more,
+        next_cursor=str(found[-1].id) if has_more else None,
+    )
+
+@router.get("/jobs/stats", response_model=JobStats)
+def get_job_stats(db: Session = Depends(get_db)):
+    """Queue depth by status and this process's worker counters (throughput, retries)"""
+    return JobStats(queue=jobs.queue_counts(db), kinds=jobs.kinds(), pool=jobs.worker_pool.stats())
+
+@router.get("/jobs/{job_id}", response_model=JobRead)
+def get_job(job_id: int, db: Session = Depends(get_db)):
+    job = db.get(Job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _job_to_read(job)
@@ -1,12 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func, or_
-from typing import List, Optional
+from sqlalchemy import and_, func, or_
+from typing import Any, Callable, Hashable, List, Optional, Tuple
+from bisect import bisect_right
+from collections import Counter
+import base64
+import binascii
 import json
+import tempfile
 from decimal import Decimal
 
-from app.core.db import get_db
+from app.api.serialization import json_response, render
+from app.core.db import SessionLocal, get_db
 from app.models.product import Product
+from app.services import export, product_import, product_search
+from app.services.catalog_cache import CachedBody, catalog_cache
 from app.schemas.product import (
     ProductRead, 
     ProductCreate, 
@@ -14,7 +24,11 @@ from app.schemas.product import (
     ProductList,
     StockInfo, 
     ColorOption,
-    AvailabilityCheck
+    AvailabilityCheck,
+    AvailabilityBatchRequest,
+    AvailabilityLineCheck,
+    AvailabilityBatchCheck,
+    ProductImportReport
 )
 
 router = APIRouter()
@@ -71,8 +85,99 @@ def _product_to_read(product: Product, include_admin_fields: bool = False) -> Pr
     return ProductRead(**product_data)
 
 
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against our ETag"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def _catalog_response(request: Request, key: Hashable, build: Callable[[], Any]) -> Response:
+    """
+    Serve a catalog read from cached JSON bytes, honouring If-None-Match.
+    
+    Args:
+        request: Incoming request (for the If-None-Match header)
+        key: Distinct query key (endpoint name plus normalized parameters)
+        build: Produces the response content on a cache miss
+    
+    Returns:
+        200 with the JSON body and ETag, or 304 with no body if the client's
+        copy is current
+    """
+    cached = catalog_cache.get_body(key)
+    if cached is None:
+        version = catalog_cache.version
+        cached = _store_body(key, build(), version)
+    return _etag_response(request, cached)
+
+
+def _store_body(key: Hashable, content: Any, version: int) -> CachedBody:
+    """Render a catalog response and cache it if the snapshot is still at ``version``"""
+    # Same bytes FastAPI would send for a response_model return value
+    cached = CachedBody.from_bytes(render(content))
+    catalog_cache.put_body(key, cached, version)
+    return cached
+
+
+def _etag_response(request: Request, cached: CachedBody) -> Response:
+    """200 with the cached body, or 304 if the client's copy is current"""
+    headers = {"ETag": cached.etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), cached.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
+
+
+def _list_products(
+    db: Session,
+    active_only: bool,
+    category: Optional[str],
+    in_stock_only: bool,
+    search: Optional[str],
+    skip: int,
+    limit: int
+) -> List[ProductRead]:
+    cached = catalog_cache.select(
+        db, _product_to_read,
+        active_only=active_only,
+        category=category,
+        in_stock_only=in_stock_only,
+        search=search
+    )
+    if cached is not None:
+        return cached[skip:skip + limit]
+    
+    query = db.query(Product)
+    
+    # Apply filters
+    if active_only:
+        query = query.filter(Product.is_active == True)
+    
+    if category:
+        query = query.filter(Product.category == category)
+    
+    if in_stock_only:
+        query = query.filter(Product.stock_status == 'in-stock')
+    
+    if search:
+        query = product_search.apply_filter(query, search)
+    
+    # Order by name for consistent results
+    query = query.order_by(Product.name, Product.id)
+    
+    # Apply pagination
+    products = query.offset(skip).limit(limit).all()
+    
+    return [_product_to_read(p) for p in products]
+
+
 @router.get("/products", response_model=List[ProductRead])
 def get_products(
+    request: Request,
     active_only: bool = Query(True, description="Filter to only active products"),
     category: Optional[str] = Query(None, description="Filter by category"),
     in_stock_only: bool = Query(False, description="Filter to only in-stock items"),
@@ -92,84 +197,212 @@ def get_products(
     - skip: Pagination offset
     - limit: Page size (max 1000)
     
+    Responses carry an ETag; send it back in If-None-Match to get a 304.
+    
     Returns:
         List of products matching the filters
     """
+    key = ("products", active_only, category, in_stock_only, search, skip, limit)
+    return _catalog_response(
+        request, key,
+        lambda: _list_products(db, active_only, category, in_stock_only, search, skip, limit)
+    )
+
+
+def _encode_cursor(name: str, product_id: int) -> str:
+    """Opaque keyset cursor for the (name, id) ordering"""
+    raw = json.dumps([name, product_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[str, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        name, product_id = json.loads(raw)
+        if not isinstance(name, str) or not isinstance(product_id, int):
+            raise ValueError
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+    return name, product_id
+
+
+def _paginate_products(
+    db: Session,
+    page: int,
+    page_size: int,
+    active_only: bool,
+    category: Optional[str],
+    search: Optional[str],
+    cursor: Optional[str] = None,
+    include_total: bool = True
+) -> ProductList:
+    after = _decode_cursor(cursor) if cursor else None
+    skip = (page - 1) * page_size
+    
+    entries = catalog_cache.select_entries(
+        db, _product_to_read,
+        active_only=active_only,
+        category=category,
+        search=search
+    )
+    if entries is not None:
+        if after is not None:
+            start = bisect_right(entries, after, key=lambda e: e.sort_key)
+        else:
+            start = skip
+        window = entries[start:start + page_size]
+        has_more = start + len(window) < len(entries)
+        return ProductList(
+            items=[e.read for e in window],
+            total=len(entries) if include_total else None,
+            page=None if after is not None else page,
+            page_size=page_size,
+            has_more=has_more,
+            next_cursor=_encode_cursor(*window[-1].sort_key) if has_more and window else None
+        )
+    
     query = db.query(Product)
     
-    # Apply filters
+    # Apply filters (same as above)
     if active_only:
         query = query.filter(Product.is_active == True)
     
     if category:
         query = query.filter(Product.category == category)
     
-    if in_stock_only:
-        query = query.filter(Product.stock_status == 'in-stock')
-    
     if search:
-        search_pattern = f"%{search}%"
+        query = product_search.apply_filter(query, search)
+    
+    # Total is cached per filter set so page turns don't repeat the count
+    total = None
+    if include_total:
+        count_key = (active_only, category, search)
+        total = catalog_cache.get_count(count_key)
+        if total is None:
+            version = catalog_cache.version
+            total = query.count()
+            catalog_cache.put_count(count_key, total, version)
+    
+    query = query.order_by(Product.name, Product.id)
+    if after is not None:
+        # Seek past the cursor instead of scanning and discarding earlier rows
+        name, product_id = after
         query = query.filter(
             or_(
-                Product.name.ilike(search_pattern),
-                Product.sku.ilike(search_pattern)
+                Product.name > name,
+                and_(Product.name == name, Product.id > product_id)
             )
         )
+    else:
+        query = query.offset(skip)
     
-    # Order by name for consistent results
-    query = query.order_by(Product.name)
-    
-    # Apply pagination
-    products = query.offset(skip).limit(limit).all()
+    # Fetch one extra row to know whether another page exists
+    products = query.limit(page_size + 1).all()
+    has_more = len(products) > page_size
+    products = products[:page_size]
     
-    return [_product_to_read(p) for p in products]
+    return ProductList(
+        items=[_product_to_read(p) for p in products],
+        total=total,
+        page=None if after is not None else page,
+        page_size=page_size,
+        has_more=has_more,
+        next_cursor=_encode_cursor(products[-1].name, products[-1].id) if has_more else None
+    )
 
 
 @router.get("/products/paginated", response_model=ProductList)
 def get_products_paginated(
+    request: Request,
     page: int = Query(1, ge=1, description="Page number (1-indexed)"),
     page_size: int = Query(50, ge=1, le=100, description="Items per page"),
     active_only: bool = Query(True, description="Filter to only active products"),
     category: Optional[str] = Query(None, description="Filter by category"),
     search: Optional[str] = Query(None, min_length=1, description="Search by name or SKU"),
+    cursor: Optional[str] = Query(None, min_length=1, description="Opaque cursor from a previous page's next_cursor"),
+    include_total: bool = Query(True, description="Include the total match count"),
     db: Session = Depends(get_db)
 ):
     """
     Get paginated products with metadata.
     
+    Two modes share this endpoint:
+    - page number: ?page=N (OFFSET based, kept for compatibility)
+    - keyset: pass the next_cursor from the previous response as ?cursor=...
+      to seek straight to the following page; page is ignored and returned
+      as null
+    
+    Results are ordered by (name, id). Totals are cached per filter set; pass
+    include_total=false to skip them entirely.
+    
     Returns paginated results with total count and pagination metadata.
+    Supports ETag / If-None-Match like GET /products.
     """
-    query = db.query(Product)
+    key = ("paginated", page, page_size, active_only, category, search, cursor, include_total)
+    return _catalog_response(
+        request, key,
+        lambda: _paginate_products(
+            db, page, page_size, active_only, category, search,
+            cursor=cursor, include_total=include_total
+        )
+    )
+
+
+@router.get("/products/search", response_model=List[ProductRead])
+def search_products(
+    q: str = Query(..., min_length=1, description="Search term (name or SKU)"),
+    active_only: bool = Query(True, description="Filter to only active products"),
+    limit: int = Query(20, ge=1, le=100, description="Maximum number of results"),
+    db: Session = Depends(get_db)
+):
+    """
+    Type-ahead product search, best matches first.
     
-    # Apply filters (same as above)
+    Exact SKU, SKU prefix and name prefix matches rank above plain substring
+    matches. Served from the catalog snapshot when it is loaded, otherwise
+    from the database's trigram index.
+    
+    Returns:
+        Up to `limit` products ranked by relevance
+    """
+    return json_response(_search_products(db, q, active_only, limit))
+
+
+def _search_products(db: Session, q: str, active_only: bool, limit: int) -> List[ProductRead]:
+    entries = catalog_cache.select_entries(db, _product_to_read, active_only=active_only, search=q)
+    if entries is not None:
+        return [e.read for e in product_search.rank_entries(entries, q)[:limit]]
+    
+    query = db.query(Product)
     if active_only:
         query = query.filter(Product.is_active == True)
     
-    if category:
-        query = query.filter(Product.category == category)
-    
-    if search:
-        search_pattern = f"%{search}%"
-        query = query.filter(
-            or_(
-                Product.name.ilike(search_pattern),
-                Product.sku.ilike(search_pattern)
-            )
-        )
+    products = product_search.apply_ranked_search(query, q).limit(limit).all()
+    return [_product_to_read(p) for p in products]
+
+
+@router.get("/products/export")
+def export_products(
+    format: str = Query("ndjson", pattern=r'^(ndjson|csv)$', description="ndjson or csv"),
+    active_only: bool = Query(False, description="Skip inactive products")
+):
+    """
+    Stream the full product table (admin fields included).
     
-    # Get total count
-    total = query.count()
+    Rows are read through a server-side cursor and written as they are
+    fetched, so memory use doesn't depend on catalog size. The CSV columns
+    match what POST /products/import accepts.
     
-    # Apply pagination
-    skip = (page - 1) * page_size
-    products = query.order_by(Product.name).offset(skip).limit(page_size).all()
-    
-    return ProductList(
-        items=[_product_to_read(p) for p in products],
-        total=total,
-        page=page,
-        page_size=page_size,
-        has_more=(skip + len(products)) < total
+    Returns:
+        NDJSON (one product per line) or CSV
+    """
+    return StreamingResponse(
+        export.stream_products(SessionLocal, format, _product_to_read, active_only=active_only),
+        media_type=export.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="products.{format}"'}
     )
 
 
@@ -205,30 +438,25 @@ def get_product(
             detail=f"Product with SKU '{sku}' not found"
         )
     
-    return _product_to_read(product)
+    return json_response(_product_to_read(product))
 
 
-@router.get("/products/{sku}/availability", response_model=AvailabilityCheck)
-def check_product_availability(
-    sku: str,
-    quantity: int = Query(1, ge=1, description="Requested quantity"),
-    db: Session = Depends(get_db)
-):
+def _check_availability(
+    product: Optional[Product],
+    quantity: int,
+    color: Optional[str] = None
+) -> AvailabilityCheck:
     """
-    Check if a product is available in the requested quantity.
+    Availability rules shared by the single-SKU and batch endpoints.
     
     Args:
-        sku: Product SKU
+        product: Active product, or None if the SKU wasn't found
         quantity: Requested quantity
+        color: Requested color variant (ignored for products without colors)
     
     Returns:
         Availability status with details
     """
-    product = db.query(Product).filter(
-        Product.sku == sku,
-        Product.is_active == True
-    ).first()
-    
     if not product:
         return AvailabilityCheck(
             available=False,
@@ -252,6 +480,21 @@ def check_product_availability(
             requested=quantity
         )
     
+    # Check color variant
+    if color and product.colors_json:
+        try:
+            colors = {c.get("name"): c for c in json.loads(product.colors_json)}
+        except (json.JSONDecodeError, TypeError, AttributeError):
+            colors = {}
+        option = colors.get(color)
+        if option is None or option.get("inStock") is False:
+            return AvailabilityCheck(
+                available=False,
+                inStock=product.stock_quantity,
+                requested=quantity,
+                reason="Color not available" if option is None else "Color out of stock"
+            )
+    
     # Check quantity
     available = product.stock_quantity >= quantity
     
@@ -263,6 +506,84 @@ def check_product_availability(
     )
 
 
+@router.get("/products/{sku}/availability", response_model=AvailabilityCheck)
+def check_product_availability(
+    sku: str,
+    quantity: int = Query(1, ge=1, description="Requested quantity"),
+    db: Session = Depends(get_db)
+):
+    """
+    Check if a product is available in the requested quantity.
+    
+    Args:
+        sku: Product SKU
+        quantity: Requested quantity
+    
+    Returns:
+        Availability status with details
+    """
+    product = db.query(Product).filter(
+        Product.sku == sku,
+        Product.is_active == True
+    ).first()
+    
+    return _check_availability(product, quantity)
+
+
+@router.post("/products/availability", response_model=AvailabilityBatchCheck)
+def check_cart_availability(
+    payload: AvailabilityBatchRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Check availability for every line of a cart in one request.
+    
+    All SKUs are loaded with a single IN query; each line then gets the same
+    checks as GET /products/{sku}/availability, plus a color variant check
+    when a color is given. Lines repeating a SKU are checked against their
+    combined quantity.
+    
+    Args:
+        payload: Cart lines (sku, quantity, optional color)
+    
+    Returns:
+        Per-line results in request order and an overall flag
+    """
+    skus = {item.sku for item in payload.items}
+    products = {
+        p.sku: p for p in db.query(Product).filter(
+            Product.sku.in_(skus),
+            Product.is_active == True
+        )
+    }
+    
+    return _check_cart(payload, products)
+
+
+def _check_cart(payload: AvailabilityBatchRequest, products: dict) -> AvailabilityBatchCheck:
+    """
+    Per-line checks for a cart, given its active products by SKU.
+    
+    Lines of the same SKU (e.g. two colors) share its stock, so each is
+    checked against the cart's total for that SKU; ``requested`` stays the
+    line's own quantity.
+    """
+    totals: Counter = Counter()
+    for item in payload.items:
+        totals[item.sku] += item.quantity
+    lines = []
+    for item in payload.items:
+        check = _check_availability(products.get(item.sku), totals[item.sku], item.color)
+        if check.requested is not None:
+            check.requested = item.quantity
+        lines.append(AvailabilityLineCheck(sku=item.sku, color=item.color, **check.model_dump()))
+    
+    return AvailabilityBatchCheck(
+        items=lines,
+        allAvailable=all(line.available for line in lines)
+    )
+
+
 @router.post("/products", response_model=ProductRead, status_code=status.HTTP_201_CREATED)
 def create_product(
     payload: ProductCreate,
@@ -313,10 +634,45 @@ def create_product(
     db.add(product)
     db.commit()
     db.refresh(product)
+    catalog_cache.upsert(product, _product_to_read)
     
     return _product_to_read(product, include_admin_fields=True)
 
 
+@router.post("/products/import", response_model=ProductImportReport)
+async def import_products_file(
+    request: Request,
+    format: Optional[str] = Query(None, pattern=r'^(csv|jsonl)$', description="File format (default: from Content-Type)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Bulk insert/update products from a CSV or JSON Lines request body.
+    
+    TODO: Add authentication/authorization - admin only
+    
+    The body is spooled to a temporary file as it arrives and then imported
+    in batches of INSERT ... ON CONFLICT (sku) DO UPDATE, so memory use does
+    not grow with file size. Invalid rows are skipped and reported.
+    
+    Returns:
+        Row counts, per-row errors and throughput
+    """
+    fmt = format or product_import.guess_format(request.headers.get("content-type"))
+    if fmt is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Send text/csv or application/x-ndjson, or pass ?format=csv|jsonl"
+        )
+    
+    with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as spool:
+        async for chunk in request.stream():
+            spool.write(chunk)
+        spool.seek(0)
+        return await run_in_threadpool(
+            product_import.import_products, db, product_import.open_text(spool), fmt
+        )
+
+
 @router.patch("/products/{sku}", response_model=ProductRead)
 def update_product(
     sku: str,
@@ -363,6 +719,7 @@ def update_product(
     
     db.commit()
     db.refresh(product)
+    catalog_cache.upsert(product, _product_to_read)
     
     return _product_to_read(product, include_admin_fields=True)
 
@@ -401,20 +758,49 @@ def delete_product(
         product.is_active = False
     
     db.commit()
+    
+    if hard_delete:
+        catalog_cache.discard(sku)
+    else:
+        db.refresh(product)
+        catalog_cache.upsert(product, _product_to_read)
     return
 
 
+def _list_categories(db: Session) -> List[str]:
+    # The snapshot already knows every category; SQL only when it's unavailable
+    entries = catalog_cache.entries(db, _product_to_read)
+    if entries is not None:
+        return sorted({e.category for e in entries if e.is_active and e.category})
+    
+    categories = db.query(Product.category).filter(
+        Product.category.isnot(None),
+        Product.is_active == True
+    ).distinct().order_by(Product.category).all()
+    
+    return [c[0] for c in categories if c[0]]
+
+
 @router.get("/products/categories/list", response_model=List[str])
-def get_categories(db: Session = Depends(get_db)):
+def get_categories(request: Request, db: Session = Depends(get_db)):
     """
     Get list of all product categories.
     
+    Supports ETag / If-None-Match like GET /products.
+    
     Returns:
-        List of unique category names
+        Sorted list of unique category names
     """
-    categories = db.query(Product.category).filter(
-        Product.category.isnot(None),
-        Product.is_active == True
-    ).distinct().all()
+    return _catalog_response(request, ("categories",), lambda: _list_categories(db))
+
+
+@router.get("/products/cache/stats")
+def get_catalog_cache_stats():
+    """
+    Get catalog snapshot statistics.
     
-    return [c[0] for c in categories if c[0]]
+    Returns:
+        Size, hit/miss counters and load/patch/invalidation counts for this
+        worker process
+    """
+    return catalog_cache.stats()
@@ -0,0 +1,218 @@
+"""
+Async variant of the products router (settings.DB_ASYNC).
+
+Same paths, parameters and responses as app/api/routers/products.py, served
+from an AsyncSession so a slow query doesn't tie up a threadpool thread.
+
+Simple lookups are written against the async session directly. Endpoints
+that go through the synchronous services (catalog snapshot, search, cursor
+pagination, writes) run the sync implementation with ``AsyncSession.run_sync``.
+Their SQL goes through the async driver, but everything else they do runs
+on the event-loop thread and holds up every other request meanwhile. So the
+CPU-heavy parts are kept out of ``run_sync``:
+
+- the catalog snapshot is fetched through the async session and built
+  (one ProductRead per product) in the threadpool
+- response bodies are rendered to JSON in the threadpool
+
+What is left on the loop is filtering the snapshot, building models for the
+SQL fallback path (catalog over ``CATALOG_CACHE_MAX_ITEMS``) and the writes'
+own work, each proportional to one page or one product. Request validation
+runs on the loop as for any async endpoint; a deployment dominated by large
+catalog reads may still be better served by the sync routers. Streaming
+export, bulk import and cache stats are registered unchanged from the sync
+router.
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Callable, Hashable, List, Optional
+
+from app.api.routers import products
+from app.api.routers.products import _check_availability, _check_cart, _product_to_read
+from app.api.serialization import json_response
+from app.core.db import get_async_db
+from app.models.product import Product
+from app.schemas.product import (
+    ProductRead,
+    ProductCreate,
+    ProductUpdate,
+    ProductList,
+    AvailabilityCheck,
+    AvailabilityBatchRequest,
+    AvailabilityBatchCheck,
+    ProductImportReport
+)
+from app.services.catalog_cache import catalog_cache
+
+router = APIRouter()
+
+
+async def _load_snapshot(db: AsyncSession) -> None:
+    """Load the catalog snapshot if it's due, building its entries off the event loop"""
+    if not catalog_cache.stale:
+        return
+    generation = catalog_cache.load_generation()
+    total = (await db.execute(select(func.count(Product.id)))).scalar() or 0
+    rows = None
+    if total <= catalog_cache.max_items:
+        rows = (await db.execute(select(Product).order_by(Product.name, Product.id))).scalars().all()
+    await run_in_threadpool(catalog_cache.install, rows, _product_to_read, generation)
+
+
+async def _catalog_response(request: Request, db: AsyncSession, key: Hashable, build: Callable[[Any], Any]):
+    """Async products._catalog_response: ``build`` gets a sync Session; rendering runs in the threadpool"""
+    await _load_snapshot(db)
+    cached = catalog_cache.get_body(key)
+    if cached is None:
+        version = catalog_cache.version
+        content = await db.run_sync(build)
+        cached = await run_in_threadpool(products._store_body, key, content, version)
+    return products._etag_response(request, cached)
+
+
+@router.get("/products", response_model=List[ProductRead])
+async def get_products(
+    request: Request,
+    active_only: bool = Query(True, description="Filter to only active products"),
+    category: Optional[str] = Query(None, description="Filter by category"),
+    in_stock_only: bool = Query(False, description="Filter to only in-stock items"),
+    search: Optional[str] = Query(None, min_length=1, description="Search by name or SKU"),
+    skip: int = Query(0, ge=0, description="Number of records to skip"),
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of records to return"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Async GET /products (see products.get_products)"""
+    key = ("products", active_only, category, in_stock_only, search, skip, limit)
+    return await _catalog_response(request, db, key, lambda s: products._list_products(
+        s, active_only, category, in_stock_only, search, skip, limit
+    ))
+
+
+@router.get("/products/paginated", response_model=ProductList)
+async def get_products_paginated(
+    request: Request,
+    page: int = Query(1, ge=1, description="Page number (1-indexed)"),
+    page_size: int = Query(50, ge=1, le=100, description="Items per page"),
+    active_only: bool = Query(True, description="Filter to only active products"),
+    category: Optional[str] = Query(None, description="Filter by category"),
+    search: Optional[str] = Query(None, min_length=1, description="Search by name or SKU"),
+    cursor: Optional[str] = Query(None, min_length=1, description="Opaque cursor from a previous page's next_cursor"),
+    include_total: bool = Query(True, description="Include the total match count"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Async GET /products/paginated (see products.get_products_paginated)"""
+    key = ("paginated", page, page_size, active_only, category, search, cursor, include_total)
+    return await _catalog_response(request, db, key, lambda s: products._paginate_products(
+        s, page, page_size, active_only, category, search, cursor=cursor, include_total=include_total
+    ))
+
+
+@router.get("/products/search", response_model=List[ProductRead])
+async def search_products(
+    q: str = Query(..., min_length=1, description="Search term (name or SKU)"),
+    active_only: bool = Query(True, description="Filter to only active products"),
+    limit: int = Query(20, ge=1, le=100, description="Maximum number of results"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Async GET /products/search (see products.search_products)"""
+    await _load_snapshot(db)
+    results = await db.run_sync(lambda s: products._search_products(s, q, active_only, limit))
+    return await run_in_threadpool(json_response, results)
+
+
+# Sync-only endpoints, registered before /products/{sku} so they aren't shadowed
+router.add_api_route("/products/export", products.export_products, methods=["GET"])
+router.add_api_route(
+    "/products/import", products.import_products_file, methods=["POST"],
+    response_model=ProductImportReport
+)
+router.add_api_route("/products/cache/stats", products.get_catalog_cache_stats, methods=["GET"])
+
+
+@router.get("/products/{sku}", response_model=ProductRead)
+async def get_product(
+    sku: str,
+    include_inactive: bool = Query(False, description="Include inactive products"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Async GET /products/{sku}"""
+    stmt = select(Product).where(Product.sku == sku)
+    if not include_inactive:
+        stmt = stmt.where(Product.is_active == True)
+
+    product = (await db.execute(stmt.limit(1))).scalar_one_or_none()
+
+    if not product:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Product with SKU '{sku}' not found"
+        )
+
+    return json_response(_product_to_read(product))
+
+
+@router.get("/products/{sku}/availability", response_model=AvailabilityCheck)
+async def check_product_availability(
+    sku: str,
+    quantity: int = Query(1, ge=1, description="Requested quantity"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Async GET /products/{sku}/availability"""
+    product = (await db.execute(
+        select(Product).where(Product.sku == sku, Product.is_active == True).limit(1)
+    )).scalar_one_or_none()
+
+    return _check_availability(product, quantity)
+
+
+@router.post("/products/availability", response_model=AvailabilityBatchCheck)
+async def check_cart_availability(
+    payload: AvailabilityBatchRequest,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Async POST /products/availability"""
+    skus = {item.sku for item in payload.items}
+    result = await db.execute(
+        select(Product).where(Product.sku.in_(skus), Product.is_active == True)
+    )
+    found = {p.sku: p for p in result.scalars()}
+
+    return _check_cart(payload, found)
+
+
+@router.post("/products", response_model=ProductRead, status_code=status.HTTP_201_CREATED)
+async def create_product(
+    payload: ProductCreate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Async POST /products"""
+    return await db.run_sync(lambda s: products.create_product(payload, db=s))
+
+
+@router.patch("/products/{sku}", response_model=ProductRead)
+async def update_product(
+    sku: str,
+    payload: ProductUpdate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Async PATCH /products/{sku}"""
+    return await db.run_sync(lambda s: products.update_product(sku, payload, db=s))
+
+
+@router.delete("/products/{sku}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_product(
+    sku: str,
+    hard_delete: bool = Query(False, description="Permanently delete (default: soft delete)"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Async DELETE /products/{sku}"""
+    await db.run_sync(lambda s: products.delete_product(sku, hard_delete, db=s))
+
+
+@router.get("/products/categories/list", response_model=List[str])
+async def get_categories(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """Async GET /products/categories/list"""
+    return await _catalog_response(request, db, ("categories",), products._list_categories)
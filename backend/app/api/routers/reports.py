@@ -0,0 +1,54 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from datetime import date
+from decimal import Decimal
+from typing import List, Optional
+from app.core.db import get_db
+from app.schemas.report import DailySalesReport, CategorySalesReport, SkuSalesReport, RollupRebuildResult
+from app.services import reporting
+
+router = APIRouter()
+
+# Date ranges are whole UTC days of Sale.created_at, both ends inclusive
+FROM = Query(None, alias="from", description="First day (inclusive)")
+TO = Query(None, alias="to", description="Last day (inclusive)")
+
+@router.get("/reports/daily", response_model=List[DailySalesReport])
+def daily_sales(start: Optional[date] = FROM, end: Optional[date] = TO, db: Session = Depends(get_db)):
+    """Orders, units, revenue and average order value per day (days without sales omitted)"""
+    return [
+        DailySalesReport(
+            day=row.day, orders=row.orders, units=row.units, subtotal=row.subtotal, discount=row.discount,
+            deliveryFee=row.delivery_fee, total=row.total,
+            averageOrderValue=(row.total / row.orders).quantize(Decimal("0.01")),
+        )
+        for row in reporting.daily_totals(db, start, end)
+    ]
+
+@router.get("/reports/categories", response_model=List[CategorySalesReport])
+def category_sales(start: Optional[date] = FROM, end: Optional[date] = TO, db: Session = Depends(get_db)):
+    """Units and line revenue (before order discounts) per category"""
+    return [
+        CategorySalesReport(category=category, units=units, revenue=revenue)
+        for category, units, revenue in reporting.category_totals(db, start, end)
+    ]
+
+@router.get("/reports/skus/top", response_model=List[SkuSalesReport])
+def top_skus(
+    start: Optional[date] = FROM,
+    end: Optional[date] = TO,
+    limit: int = Query(10, ge=1, le=1000, description="Number of SKUs"),
+    by: str = Query("revenue", pattern=r'^(revenue|units)$', description="Rank by revenue or units"),
+    db: Session = Depends(get_db),
+):
+    """Best-selling SKUs over the range"""
+    return [
+        SkuSalesReport(sku=sku, category=category, orders=orders, units=units, revenue=revenue)
+        for sku, category, orders, units, revenue in reporting.top_skus(db, start, end, limit, by)
+    ]
+
+@router.post("/reports/rebuild", response_model=RollupRebuildResult)
+def rebuild_rollups(start: Optional[date] = FROM, end: Optional[date] = TO, db: Session = Depends(get_db)):
+    """Recompute the daily rollups for a range from the sales tables"""
+    days, sku_rows = reporting.rebuild(db, start, end)
+    return RollupRebuildResult(days=days, skuRows=sku_rows)
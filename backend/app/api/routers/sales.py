@@ -1,18 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import and_, inspect, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, raiseload
+from datetime import datetime, timezone
 from decimal import Decimal
+from typing import List, Optional, Tuple, Union
+import base64
+import binascii
 import json
-from app.core.db import get_db, Base, engine
+from app.api.serialization import json_response
+from app.core.config import settings
+from app.core.db import get_db, Base, engine, SessionLocal
 from app.models.sale import Sale, SaleItem
-from app.schemas.sale import SaleOrderCreate, SaleOrderRead, LineItemPayload, Totals
+from app.schemas.sale import (
+    SaleOrderCreate, SaleOrderRead, SaleOrderUpdate, SalePatchOperation, SaleSummary, SaleList, LineItemPayload, Totals,
+    SaleBatchRequest, SaleBatchResult, SaleBatchResponse
+)
+from app.services import delivery_slots, export, order_numbers, reporting, sale_lookup, sale_patch, stock
+from app.services.catalog_cache import catalog_cache
 
 router = APIRouter()
 
 def _get_next_order_number(db: Session) -> int:
-    """Generate the next sequential order number"""
-    max_order_number = db.query(func.max(Sale.order_number)).scalar()
-    return (max_order_number or 0) + 1
+    """Allocate the next order number (see app/services/order_numbers.py)"""
+    return order_numbers.allocator.next(db)
 
 def _decimal_to_float(obj):
     """Convert Decimal objects to float for JSON serialization"""
@@ -26,10 +41,48 @@ def _decimal_to_float(obj):
 
 def _calc_totals(items: list[SaleItem], discount_percent: Decimal, delivery_fee: Decimal) -> Totals:
     subtotal = sum((i.unit_price * i.qty for i in items), Decimal("0.00"))
+    return _totals_from_subtotal(subtotal, discount_percent, delivery_fee)
+
+def _totals_from_subtotal(subtotal: Decimal, discount_percent: Decimal, delivery_fee: Decimal) -> Totals:
     discount = (subtotal * (discount_percent or Decimal("0"))) / Decimal("100")
     total = subtotal + (delivery_fee or Decimal("0")) - discount
     return Totals(subtotal=subtotal, deliveryFee=delivery_fee, discount=discount, total=total)
 
+def _reserved_quantities(items, order_status: str | None) -> dict:
+    """Units an order holds per SKU (cancelled orders hold none)"""
+    if order_status == "cancelled":
+        return {}
+    return stock.quantities_by_sku(items)
+
+def _lock_sale(db: Session, order_id: int) -> Optional[Sale]:
+    """
+    Load a sale for a read-modify-write, holding its row until commit.
+
+    Two cancels (or edits) of the same order must not both release what it
+    held: PostgreSQL takes the row lock with SELECT ... FOR UPDATE; SQLite
+    ignores FOR UPDATE, so a no-op UPDATE takes the write lock first.
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        db.execute(
+            update(Sale).where(Sale.id == order_id).values(status=Sale.status)
+            .execution_options(synchronize_session=False)
+        )
+    return db.get(Sale, order_id, with_for_update=True, populate_existing=True)
+
+def _stock_conflict(db: Session, err: stock.StockError) -> HTTPException:
+    db.rollback()
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail={"sku": err.sku, "reason": err.reason, "requested": err.requested, "inStock": err.in_stock},
+    )
+
+def _slot_conflict(db: Session, err: delivery_slots.SlotError) -> HTTPException:
+    db.rollback()
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail={"date": err.day.isoformat(), "timeSlot": err.slot, "reason": err.reason},
+    )
+
 def _sale_to_read(sale: Sale) -> SaleOrderRead:
     customer = json.loads(sale.customer_json)
     delivery = json.loads(sale.delivery_json)
@@ -41,22 +94,51 @@ def _sale_to_read(sale: Sale) -> SaleOrderRead:
         totals=totals, createdAt=sale.created_at.isoformat() + "Z", status=sale.status
     )
 
-@router.post("/sales", response_model=SaleOrderRead, status_code=status.HTTP_201_CREATED)
-def create_order(payload: SaleOrderCreate, db: Session = Depends(get_db)):
-    # Generate next sequential order number
-    order_number = _get_next_order_number(db)
-    
+def _sale_to_summary(sale: Sale) -> SaleSummary:
+    # Same as _sale_to_read minus the items, which are never loaded
+    totals = Totals(subtotal=sale.subtotal, deliveryFee=sale.delivery_fee, discount=sale.discount, total=sale.total)
+    return SaleSummary(
+        id=sale.id, orderNumber=sale.order_number, customer=json.loads(sale.customer_json),
+        delivery=json.loads(sale.delivery_json), payment=json.loads(sale.payment_json),
+        totals=totals, createdAt=sale.created_at.isoformat() + "Z", status=sale.status
+    )
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """A ?from=/?to= bound as naive UTC, the way created_at is stored"""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def _encode_cursor(created_at: datetime, sale_id: int) -> str:
+    """Opaque keyset cursor for the (created_at, id) ordering"""
+    raw = json.dumps([created_at.isoformat(), sale_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, sale_id = json.loads(raw)
+        if not isinstance(created_at, str) or not isinstance(sale_id, int):
+            raise ValueError
+        return datetime.fromisoformat(created_at), sale_id
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor")
+
+def _build_sale(payload: SaleOrderCreate, order_number: int) -> Sale:
+    """A new, unsaved Sale with its lines and totals"""
     # Convert payment data to dict and handle Decimal conversion
     payment_data = payload.payment.model_dump()
     payment_data_serializable = _decimal_to_float(payment_data)
-    
+
     sale = Sale(
         order_number=order_number,
         customer_json=json.dumps(payload.customer.model_dump()),
         delivery_json=json.dumps(payload.delivery.model_dump()),
         payment_json=json.dumps(payment_data_serializable),
         status=payload.status or "draft",
+        created_at=datetime.utcnow(),
     )
+    sale_lookup.apply(sale)
     sale.items = [
         SaleItem(sku=i.sku, name=i.name, unit_price=i.price, qty=i.qty, color=i.color) for i in payload.items
     ]
@@ -65,51 +147,367 @@ def create_order(payload: SaleOrderCreate, db: Session = Depends(get_db)):
     discount_pct = payload.payment.discountPercent
     totals = _calc_totals(sale.items, discount_pct, delivery_fee)
     sale.subtotal, sale.delivery_fee, sale.discount, sale.total = totals.subtotal, totals.deliveryFee, totals.discount, totals.total
+    return sale
+
+@router.post("/sales", response_model=SaleOrderRead, status_code=status.HTTP_201_CREATED)
+def create_order(payload: SaleOrderCreate, db: Session = Depends(get_db)):
+    # Generate next sequential order number
+    sale = _build_sale(payload, _get_next_order_number(db))
+
+    # Take stock in the same transaction as the sale insert
+    try:
+        levels = stock.reserve(db, _reserved_quantities(payload.items, sale.status))
+    except stock.StockError as err:
+        raise _stock_conflict(db, err)
+    # ...and the delivery slot
+    try:
+        delivery_slots.move(db, sale, None, delivery_slots.plan(db, sale))
+    except delivery_slots.SlotError as err:
+        raise _slot_conflict(db, err)
 
     db.add(sale)
+    reporting.record(db, None, reporting.contribution(sale))
     db.commit()
+    catalog_cache.apply_stock(levels)
     db.refresh(sale)
-    return _sale_to_read(sale)
+    return json_response(_sale_to_read(sale), status_code=status.HTTP_201_CREATED)
+
+@router.post("/sales/batch", response_model=SaleBatchResponse)
+def create_orders_batch(payload: SaleBatchRequest, db: Session = Depends(get_db)):
+    """
+    Submit many orders at once (tills replaying their offline queue).
+
+    Every order carries a ``clientKey``; an order whose key already exists
+    (an earlier replay, or earlier in this batch) is reported as a
+    duplicate of the stored sale instead of being created again. Each
+    order is accepted or rejected on its own (validation, stock, delivery
+    slot); accepted orders are inserted in bulk and committed every
+    SALES_BATCH_CHUNK_SIZE orders.
+    """
+    if len(payload.orders) > settings.SALES_BATCH_MAX_ORDERS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.SALES_BATCH_MAX_ORDERS} orders per batch"
+        )
+    results: List[Optional[SaleBatchResult]] = [None] * len(payload.orders)
+    first_by_key: dict = {}
+    repeats: List[Tuple[int, int]] = []
+    pending: List[Tuple[int, str, SaleOrderCreate]] = []
+
+    # Validate everything up front
+    for index, raw in enumerate(payload.orders):
+        key = raw.get("clientKey")
+        if not isinstance(key, str) or not 1 <= len(key) <= 100:
+            results[index] = SaleBatchResult(
+                clientKey=key if isinstance(key, str) else None, status="rejected",
+                error="clientKey is required (1-100 characters)"
+            )
+            continue
+        if key in first_by_key:
+            repeats.append((index, first_by_key[key]))
+            continue
+        first_by_key[key] = index
+        try:
+            order = SaleOrderCreate.model_validate(raw)
+        except ValidationError as err:
+            results[index] = SaleBatchResult(
+                clientKey=key, status="rejected", error=jsonable_encoder(err.errors(include_url=False))
+            )
+            continue
+        pending.append((index, key, order))
+
+    pending = _skip_stored(db, pending, results)
+    numbers = order_numbers.allocator.allocate(db, len(pending)) if pending else []
+    chunk_size = max(1, settings.SALES_BATCH_CHUNK_SIZE)
+    for start in range(0, len(pending), chunk_size):
+        chunk = [(*entry, number) for entry, number in zip(pending[start:start + chunk_size], numbers[start:start + chunk_size])]
+        _insert_batch_chunk(db, chunk, results)
+
+    for index, first in repeats:
+        results[index] = results[first].model_copy(
+            update={"status": "duplicate" if results[first].status != "rejected" else "rejected"}
+        )
+    counts = {state: sum(1 for r in results if r.status == state) for state in ("created", "duplicate", "rejected")}
+    return SaleBatchResponse(results=results, created=counts["created"],
+                             duplicates=counts["duplicate"], rejected=counts["rejected"])
+
+def _skip_stored(db: Session, pending: list, results: list) -> list:
+    """Report orders whose client key is already stored as duplicates; returns the rest"""
+    if not pending:
+        return pending
+    stored = {
+        row.client_key: row
+        for row in db.execute(
+            select(Sale.client_key, Sale.id, Sale.order_number)
+            .where(Sale.client_key.in_([key for _, key, _ in pending]))
+        )
+    }
+    remaining = []
+    for index, key, order in pending:
+        row = stored.get(key)
+        if row is None:
+            remaining.append((index, key, order))
+        else:
+            results[index] = SaleBatchResult(clientKey=key, status="duplicate", id=row.id, orderNumber=row.order_number)
+    return remaining
+
+def _insert_sales(db: Session, sales: List[Sale]) -> None:
+    """
+    Insert new sales and their lines with one multi-row INSERT per table.
+
+    A flush only batches these where the dialect can return generated ids
+    in parameter order (not SQLite), so the sales go in as an ORM bulk
+    insert and their ids are matched back by order number.
+    """
+    if not sales:
+        return
+    columns = [attr.key for attr in inspect(Sale).column_attrs if attr.key in sales[0].__dict__]
+    ids = dict(db.execute(
+        insert(Sale).returning(Sale.order_number, Sale.id),
+        [{key: getattr(sale, key) for key in columns} for sale in sales],
+    ).all())
+    lines = []
+    for sale in sales:
+        sale.id = ids[sale.order_number]
+        lines.extend(
+            {"sale_id": sale.id, "sku": item.sku, "name": item.name, "unit_price": item.unit_price,
+             "qty": item.qty, "color": item.color}
+            for item in sale.items
+        )
+    if lines:
+        db.execute(insert(SaleItem), lines)
+
+def _insert_batch_chunk(db: Session, chunk: list, results: list) -> None:
+    """Reserve, insert and commit one chunk of batch orders"""
+    for attempt in range(2):
+        levels = {}
+        accepted = []
+        # Orders take stock in arbitrary SKU order; lock them all first, sorted
+        stock.lock(db, (item.sku for _, _, order, _ in chunk for item in order.items))
+        for index, key, order, number in chunk:
+            sale = _build_sale(order, number)
+            sale.client_key = key
+            quantities = _reserved_quantities(order.items, sale.status)
+            try:
+                levels.update(stock.reserve_or_undo(db, quantities))
+            except stock.StockError as err:
+                results[index] = SaleBatchResult(clientKey=key, status="rejected", error={
+                    "sku": err.sku, "reason": err.reason, "requested": err.requested, "inStock": err.in_stock
+                })
+                continue
+            try:
+                delivery_slots.move(db, sale, None, delivery_slots.plan(db, sale))
+            except delivery_slots.SlotError as err:
+                levels.update(stock.release(db, quantities))
+                results[index] = SaleBatchResult(clientKey=key, status="rejected", error={
+                    "date": err.day.isoformat(), "timeSlot": err.slot, "reason": err.reason
+                })
+                continue
+            accepted.append((index, sale))
+
+        try:
+            # The client_key unique index fires on the INSERT, not the commit
+            _insert_sales(db, [sale for _, sale in accepted])
+            reporting.record_many(db, [(None, reporting.contribution(sale)) for _, sale in accepted])
+            db.commit()
+        except IntegrityError:
+            # A concurrent replay stored some of these keys first: report
+            # those as duplicates and redo the rest
+            db.rollback()
+            if attempt:
+                raise
+            remaining = _skip_stored(db, [(i, k, o) for i, k, o, _ in chunk], results)
+            numbers = {i: n for i, _, _, n in chunk}
+            chunk = [(i, k, o, numbers[i]) for i, k, o in remaining]
+            continue
+        catalog_cache.apply_stock(levels)
+        for index, sale in accepted:
+            results[index] = SaleBatchResult(clientKey=sale.client_key, status="created",
+                                             id=sale.id, orderNumber=sale.order_number)
+        return
+
+@router.get("/sales/export")
+def export_sales(
+    format: str = Query("ndjson", pattern=r'^(ndjson|csv)$', description="ndjson or csv"),
+    created_from: Optional[datetime] = Query(None, alias="from", description="Sales created at or after (ISO date/time, UTC)"),
+    created_to: Optional[datetime] = Query(None, alias="to", description="Sales created before (ISO date/time, UTC)"),
+):
+    """Stream sales with their items: one order per NDJSON line, or one CSV row per line item"""
+    return StreamingResponse(
+        export.stream_sales(
+            SessionLocal, format, _sale_to_read,
+            created_from=_naive_utc(created_from), created_to=_naive_utc(created_to),
+        ),
+        media_type=export.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="sales.{format}"'},
+    )
+
+@router.get("/sales", response_model=SaleList)
+def list_orders(
+    order_status: Optional[str] = Query(None, alias="status", description="Filter by status"),
+    created_from: Optional[datetime] = Query(None, alias="from", description="Sales created at or after (ISO date/time, UTC)"),
+    created_to: Optional[datetime] = Query(None, alias="to", description="Sales created before (ISO date/time, UTC)"),
+    phone: Optional[str] = Query(None, min_length=1, description="Customer phone (punctuation ignored)"),
+    email: Optional[str] = Query(None, min_length=1, description="Customer email (case-insensitive)"),
+    order_number: Optional[int] = Query(None, ge=1, description="Exact order number"),
+    include_items: bool = Query(False, description="Include line items (headers only by default)"),
+    page_size: int = Query(50, ge=1, le=200, description="Items per page"),
+    cursor: Optional[str] = Query(None, min_length=1, description="Opaque cursor from a previous page's next_cursor"),
+    db: Session = Depends(get_db),
+):
+    """
+    List sales, newest first, with keyset pagination on (created_at, id).
+
+    Pass the previous response's next_cursor as ?cursor=... for the
+    following page. Phone and email match the normalized lookup columns
+    exactly. Without include_items the line items aren't queried at all;
+    with it they are loaded in one extra query per page.
+    """
+    return json_response(_list_orders(
+        db, order_status, created_from, created_to, phone, email, order_number, include_items, page_size, cursor
+    ))
+
+def _list_orders(
+    db: Session,
+    order_status: Optional[str],
+    created_from: Optional[datetime],
+    created_to: Optional[datetime],
+    phone: Optional[str],
+    email: Optional[str],
+    order_number: Optional[int],
+    include_items: bool,
+    page_size: int,
+    cursor: Optional[str],
+) -> SaleList:
+    stmt = select(Sale)
+    if order_status:
+        stmt = stmt.where(Sale.status == order_status)
+    created_from, created_to = _naive_utc(created_from), _naive_utc(created_to)
+    if created_from is not None:
+        stmt = stmt.where(Sale.created_at >= created_from)
+    if created_to is not None:
+        stmt = stmt.where(Sale.created_at < created_to)
+    if phone:
+        stmt = stmt.where(Sale.customer_phone == sale_lookup.normalize_phone(phone))
+    if email:
+        stmt = stmt.where(Sale.customer_email == sale_lookup.normalize_email(email))
+    if order_number is not None:
+        stmt = stmt.where(Sale.order_number == order_number)
+    if cursor:
+        created_at, sale_id = _decode_cursor(cursor)
+        stmt = stmt.where(or_(
+            Sale.created_at < created_at,
+            and_(Sale.created_at == created_at, Sale.id < sale_id)
+        ))
+    if not include_items:
+        stmt = stmt.options(raiseload(Sale.items))
+
+    # Fetch one extra row to know whether another page exists
+    sales = db.execute(
+        stmt.order_by(Sale.created_at.desc(), Sale.id.desc()).limit(page_size + 1)
+    ).scalars().all()
+    has_more = len(sales) > page_size
+    sales = sales[:page_size]
+
+    to_read = _sale_to_read if include_items else _sale_to_summary
+    return SaleList(
+        items=[to_read(s) for s in sales],
+        page_size=page_size,
+        has_more=has_more,
+        next_cursor=_encode_cursor(sales[-1].created_at, sales[-1].id) if has_more else None
+    )
 
 @router.get("/sales/{order_id}", response_model=SaleOrderRead)
 def get_order(order_id: int, db: Session = Depends(get_db)):
     sale = db.get(Sale, order_id)
     if not sale:
         raise HTTPException(status_code=404, detail="Sale not found")
-    return _sale_to_read(sale)
+    return json_response(_sale_to_read(sale))
 
 @router.patch("/sales/{order_id}", response_model=SaleOrderRead)
-def update_order(order_id: int, updates: dict, db: Session = Depends(get_db)):
-    sale = db.get(Sale, order_id)
+def update_order(
+    order_id: int,
+    updates: Union[List[SalePatchOperation], SaleOrderUpdate],
+    db: Session = Depends(get_db),
+):
+    """
+    Partial update: a merge patch ({"status": ..., "items": [...]}) or a
+    JSON Patch array of operations for single-line edits.
+
+    Only the lines that differ are written (see app/services/sale_patch.py).
+    """
+    sale = _lock_sale(db, order_id)
     if not sale:
         raise HTTPException(status_code=404, detail="Sale not found")
+    if isinstance(updates, list):
+        updates = _json_patch_to_update(sale, updates)
+    fields = updates.model_fields_set
+    held = _reserved_quantities(sale.items, sale.status)
+    reported = reporting.contribution(sale)
+    slot_held = delivery_slots.booked(sale)
 
     # Allow partial updates to customer, delivery, payment, items, status
-    if "customer" in updates: sale.customer_json = json.dumps(updates["customer"])
-    if "delivery" in updates: sale.delivery_json = json.dumps(updates["delivery"])
-    if "payment" in updates:
-        sale.payment_json = json.dumps(_decimal_to_float(updates["payment"]))
-    if "status" in updates: sale.status = updates["status"]
-    if "items" in updates:
-        sale.items.clear()
-        for i in updates["items"]:
-            sale.items.append(SaleItem(sku=i["sku"], name=i["name"], unit_price=Decimal(str(i["price"])), qty=int(i["qty"]), color=i.get("color")))
-    # Recalc totals
+    if updates.customer is not None: sale.customer_json = json.dumps(updates.customer.model_dump())
+    if updates.delivery is not None: sale.delivery_json = json.dumps(updates.delivery.model_dump())
+    if updates.payment is not None:
+        sale.payment_json = json.dumps(_decimal_to_float(updates.payment.model_dump()))
+    if fields & {"customer", "delivery", "payment"}:
+        sale_lookup.apply(sale)
+    if updates.status is not None: sale.status = updates.status
+    subtotal = sale.subtotal or Decimal("0.00")
+    if updates.items is not None:
+        sale.items, diff = sale_patch.diff_items(sale.items, updates.items)
+        subtotal += diff.subtotal_delta
+    # Recalc totals from the running subtotal
     payment = json.loads(sale.payment_json)
     discount_pct = Decimal(str(payment.get("discountPercent", 0)))
-    delivery_fee = Decimal(str(updates.get("totals", {}).get("deliveryFee", sale.delivery_fee)))
-    totals = _calc_totals(sale.items, discount_pct, delivery_fee)
+    delivery_fee = sale.delivery_fee
+    if updates.totals is not None and "deliveryFee" in updates.totals.model_fields_set:
+        delivery_fee = updates.totals.deliveryFee
+    totals = _totals_from_subtotal(subtotal, discount_pct, delivery_fee)
     sale.subtotal, sale.delivery_fee, sale.discount, sale.total = totals.subtotal, totals.deliveryFee, totals.discount, totals.total
 
+    # Move stock by the difference between old and new lines/status
+    try:
+        levels = stock.adjust(db, held, _reserved_quantities(sale.items, sale.status))
+    except stock.StockError as err:
+        raise _stock_conflict(db, err)
+    try:
+        delivery_slots.move(db, sale, slot_held, delivery_slots.plan(db, sale))
+    except delivery_slots.SlotError as err:
+        raise _slot_conflict(db, err)
+    reporting.record(db, reported, reporting.contribution(sale))
+
     db.commit()
+    catalog_cache.apply_stock(levels)
     db.refresh(sale)
-    return _sale_to_read(sale)
+    return json_response(_sale_to_read(sale))
+
+def _json_patch_to_update(sale: Sale, operations: List[SalePatchOperation]) -> SaleOrderUpdate:
+    """Apply JSON Patch operations to the sale's current document; returns the changed fields"""
+    current = _sale_to_read(sale).model_dump(mode="json")
+    document = {field: current[field] for field in SaleOrderUpdate.model_fields}
+    try:
+        changed = sale_patch.apply_json_patch(document, operations)
+    except sale_patch.PatchError as err:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT if err.conflict else status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(err),
+        )
+    try:
+        return SaleOrderUpdate.model_validate(changed)
+    except ValidationError as err:
+        raise RequestValidationError(err.errors(include_url=False))
 
 @router.post("/sales/{order_id}/cancel", status_code=status.HTTP_204_NO_CONTENT)
 def cancel_order(order_id: int, db: Session = Depends(get_db)):
-    sale = db.get(Sale, order_id)
+    sale = _lock_sale(db, order_id)
     if not sale:
         raise HTTPException(status_code=404, detail="Sale not found")
+    levels = stock.release(db, _reserved_quantities(sale.items, sale.status))
+    reporting.record(db, reporting.contribution(sale), None)
+    delivery_slots.move(db, sale, delivery_slots.booked(sale), None)
     sale.status = "cancelled"
     db.commit()
+    catalog_cache.apply_stock(levels)
     return
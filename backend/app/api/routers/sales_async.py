@@ -0,0 +1,78 @@
+"""
+Async variant of the sales router (settings.DB_ASYNC).
+
+Same paths and payloads as app/api/routers/sales.py. Reads use the async
+session directly; writes run the sync implementation through
+``AsyncSession.run_sync`` so stock reservation and order numbering stay in
+one place. Their SQL goes through the async driver, but the Python around
+it (building the sale, rollups, rendering) runs on the event-loop thread;
+that is one order's worth of work. Listing pages can hold up to 200 orders,
+so their JSON is rendered in the threadpool.
+"""
+
+from datetime import datetime
+from typing import List, Optional, Union
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.routers import sales
+from app.api.routers.sales import _sale_to_read
+from app.api.serialization import json_response
+from app.core.db import get_async_db
+from app.models.sale import Sale
+from app.schemas.sale import (
+    SaleOrderCreate, SaleOrderRead, SaleOrderUpdate, SalePatchOperation, SaleList, SaleBatchRequest, SaleBatchResponse
+)
+
+router = APIRouter()
+
+@router.post("/sales", response_model=SaleOrderRead, status_code=status.HTTP_201_CREATED)
+async def create_order(payload: SaleOrderCreate, db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(lambda s: sales.create_order(payload, db=s))
+
+@router.post("/sales/batch", response_model=SaleBatchResponse)
+async def create_orders_batch(payload: SaleBatchRequest, db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(lambda s: sales.create_orders_batch(payload, db=s))
+
+@router.get("/sales", response_model=SaleList)
+async def list_orders(
+    order_status: Optional[str] = Query(None, alias="status", description="Filter by status"),
+    created_from: Optional[datetime] = Query(None, alias="from", description="Sales created at or after (ISO date/time, UTC)"),
+    created_to: Optional[datetime] = Query(None, alias="to", description="Sales created before (ISO date/time, UTC)"),
+    phone: Optional[str] = Query(None, min_length=1, description="Customer phone (punctuation ignored)"),
+    email: Optional[str] = Query(None, min_length=1, description="Customer email (case-insensitive)"),
+    order_number: Optional[int] = Query(None, ge=1, description="Exact order number"),
+    include_items: bool = Query(False, description="Include line items (headers only by default)"),
+    page_size: int = Query(50, ge=1, le=200, description="Items per page"),
+    cursor: Optional[str] = Query(None, min_length=1, description="Opaque cursor from a previous page's next_cursor"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    page = await db.run_sync(lambda s: sales._list_orders(
+        s, order_status, created_from, created_to, phone, email, order_number, include_items, page_size, cursor
+    ))
+    return await run_in_threadpool(json_response, page)
+
+# Streaming export stays sync; registered before /sales/{order_id} so it isn't shadowed
+router.add_api_route("/sales/export", sales.export_sales, methods=["GET"])
+
+@router.get("/sales/{order_id}", response_model=SaleOrderRead)
+async def get_order(order_id: int, db: AsyncSession = Depends(get_async_db)):
+    # Items are selectin-loaded as part of the get
+    sale = await db.get(Sale, order_id)
+    if not sale:
+        raise HTTPException(status_code=404, detail="Sale not found")
+    return json_response(_sale_to_read(sale))
+
+@router.patch("/sales/{order_id}", response_model=SaleOrderRead)
+async def update_order(
+    order_id: int,
+    updates: Union[List[SalePatchOperation], SaleOrderUpdate],
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await db.run_sync(lambda s: sales.update_order(order_id, updates, db=s))
+
+@router.post("/sales/{order_id}/cancel", status_code=status.HTTP_204_NO_CONTENT)
+async def cancel_order(order_id: int, db: AsyncSession = Depends(get_async_db)):
+    await db.run_sync(lambda s: sales.cancel_order(order_id, db=s))
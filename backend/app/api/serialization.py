@@ -0,0 +1,40 @@
+"""
+Fast path for JSON responses.
+
+When an endpoint returns a model, FastAPI validates it again against
+``response_model`` (in the threadpool, for sync endpoints), serializes it
+to Python values, and JSONResponse runs ``json.dumps`` over those. The
+catalog cache went through ``jsonable_encoder``, which walks the data in
+Python. Endpoints that already hold validated models return
+``json_response(...)`` instead: pydantic writes the JSON in one pass, and
+``response_model`` stays on the route for the OpenAPI schema (a returned
+Response skips FastAPI's own serialization).
+
+The bytes are the same as JSONResponse's (compact separators, UTF-8 left
+unescaped) for everything our schemas hold. The one formatting difference
+is floats below 1e-4, which pydantic writes as ``0.00001`` where
+``json.dumps`` writes ``1e-05``; the only float field is
+``ProductRead.price``, read from a two-decimal column.
+
+tests/test_serialization.py compares the bytes with the regular path;
+benchmarks/serialization.py times both.
+"""
+
+from typing import Any, Mapping, Optional
+
+from pydantic_core import to_json
+from starlette.responses import Response
+
+
+def render(content: Any) -> bytes:
+    """
+    JSON bytes for models (or lists/dicts of them), as FastAPI would send them.
+
+    Plain Decimal values outside a model become strings here, not floats
+    as with jsonable_encoder, so pass models rather than loose Decimals.
+    """
+    return to_json(content, by_alias=True)
+
+
+def json_response(content: Any, status_code: int = 200, headers: Optional[Mapping[str, str]] = None) -> Response:
+    return Response(content=render(content), status_code=status_code, headers=headers, media_type="application/json")
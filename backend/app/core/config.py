@@ -1,4 +1,4 @@
-from typing import List
+from typing import Dict, List, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -8,6 +8,100 @@ class Settings(BaseSettings):
     JWT_ALGO: str = "HS256"
     CORS_ORIGINS: List[str] = ["http://localhost:5173", "http://127.0.0.1:5173"]
 
+    # Connection pool (ignored for in-memory SQLite)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800           # seconds; -1 to never recycle
+    DB_POOL_PRE_PING: Optional[bool] = None  # None: on for server databases, off for SQLite
+    DB_STATEMENT_CACHE_SIZE: int = 500    # compiled SQL cache (and sqlite3 cached_statements)
+    DB_PG_PREPARE_THRESHOLD: Optional[int] = None  # psycopg server-side prepare after N executions
+
+    # SQLite pragma profile, applied to every new connection
+    SQLITE_PRAGMAS_ENABLED: bool = True
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_CACHE_SIZE_KB: int = 65536
+    SQLITE_MMAP_SIZE: int = 268435456     # bytes
+    SQLITE_TEMP_STORE: str = "MEMORY"
+
+    # Serve the products/sales routers from an async engine (app/api/routers/*_async.py)
+    DB_ASYNC: bool = False
+    # Defaults to DATABASE_URL with the async driver swapped in
+    ASYNC_DATABASE_URL: Optional[str] = None
+
+    # Process-local product catalog snapshot (see app/services/catalog_cache.py)
+    CATALOG_CACHE_ENABLED: bool = True
+    CATALOG_CACHE_MAX_ITEMS: int = 50_000
+    CATALOG_CACHE_TTL_SECONDS: float = 300.0
+    CATALOG_RESPONSE_CACHE_MAX_ENTRIES: int = 256
+
+    # Stock at or below this quantity is reported as low-stock
+    LOW_STOCK_THRESHOLD: int = 3
+
+    # Order numbers each worker reserves at a time (see app/services/order_numbers.py)
+    ORDER_NUMBER_BLOCK_SIZE: int = 10
+
+    # POST /sales/batch: orders per request, and per commit
+    SALES_BATCH_MAX_ORDERS: int = 1000
+    SALES_BATCH_CHUNK_SIZE: int = 100
+
+    # Idempotency-Key handling (see app/services/idempotency.py)
+    IDEMPOTENCY_ROUTES: List[str] = [
+        "POST /api/sales", "POST /api/sales/batch", "POST /api/products", "POST /api/products/import", "POST /api/jobs",
+    ]
+    IDEMPOTENCY_TTL_SECONDS: float = 86400.0     # how long a stored response is replayed
+    IDEMPOTENCY_LOCK_SECONDS: float = 60.0       # a pending key not finished this long can be taken over
+    IDEMPOTENCY_WAIT_SECONDS: float = 30.0       # how long a concurrent duplicate waits for the first
+    IDEMPOTENCY_PURGE_SECONDS: float = 300.0     # delete expired keys at most this often
+
+    # Instrumentation (see app/services/metrics.py)
+    METRICS_ENABLED: bool = True
+    SLOW_QUERY_LOG_SECONDS: Optional[float] = None   # log statements at least this slow; None: off
+
+    # Per-request profiling (see app/services/profiling.py); nothing is installed unless enabled
+    PROFILING_ENABLED: bool = False
+    PROFILING_TOKEN: Optional[str] = None        # X-Profile-Token value; no profiling without one
+    PROFILING_INTERVAL_SECONDS: float = 0.002
+    PROFILING_OUTPUT_DIR: Optional[str] = None   # write profiles here instead of returning them
+
+    # Bulk product import (see app/services/product_import.py)
+    PRODUCT_IMPORT_BATCH_SIZE: int = 1000
+    PRODUCT_IMPORT_MAX_ERRORS: int = 1000
+
+    # Delivery slot demand per order (see app/services/delivery_slots.py)
+    DELIVERY_BASE_MINUTES: int = 20
+    DELIVERY_MINUTES_PER_UNIT: int = 10
+    DELIVERY_WHITE_GLOVE_MINUTES: int = 30
+    DELIVERY_SETUP_MINUTES: int = 20
+    DELIVERY_REMOVAL_MINUTES: int = 15
+    DELIVERY_ITEM_VOLUME_L: int = 500     # litres per unit when the category isn't listed below
+    DELIVERY_CATEGORY_VOLUME_L: Dict[str, int] = {"Furniture": 1500, "Bedroom": 1200, "Lighting": 200}
+    DELIVERY_FEW_LEFT_FRACTION: float = 0.25
+    DELIVERY_MAX_RANGE_DAYS: int = 92
+
+    # How often each worker checks the fee tables for changes (see app/services/delivery_fees.py)
+    DELIVERY_FEE_RELOAD_SECONDS: float = 5.0
+
+    # Background jobs (see app/services/jobs.py)
+    JOB_WORKERS: int = 1                  # worker threads per app process; 0 = enqueue only
+    JOB_POLL_SECONDS: float = 1.0
+    JOB_LEASE_SECONDS: float = 300.0      # a running job not heard from this long is reclaimed
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RETRY_BASE_SECONDS: float = 10.0
+    JOB_RETRY_MAX_SECONDS: float = 600.0
+
+    # Route planning (see app/services/delivery_routes.py and routing.py)
+    ROUTING_DEPOT_LAT: float = -33.8688
+    ROUTING_DEPOT_LON: float = 151.2093
+    ROUTING_SHIFT_START: str = "07:30"
+    ROUTING_AVG_SPEED_KMH: float = 35.0
+    ROUTING_ROAD_FACTOR: float = 1.3      # road distance / straight-line distance
+    ROUTING_TRUCK_VOLUME_L: int = 18000
+    ROUTING_TIME_BUDGET_SECONDS: float = 5.0
+    ROUTING_WORKERS: int = 0              # local search processes; 0: one per CPU
+
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 
 settings = Settings()
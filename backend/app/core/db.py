@@ -1,16 +1,100 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.orm import Session, sessionmaker, DeclarativeBase
 
-from app.core.config import settings
+from app.core.config import Settings, settings
 
 
 class Base(DeclarativeBase):
     pass
 
-# SQLite flag for multi-threaded usage under uvicorn
-connect_args = {"check_same_thread": False} if settings.DATABASE_URL.startswith("sqlite") else {}
 
-engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True, connect_args=connect_args)
+def _is_sqlite(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+def _is_memory_sqlite(url: str) -> bool:
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:")
+
+def engine_options(url: str, config: Settings = settings) -> dict:
+    """create_engine()/create_async_engine() keyword arguments for a URL"""
+    sqlite = _is_sqlite(url)
+    pre_ping = config.DB_POOL_PRE_PING
+    if pre_ping is None:
+        # A local file can't drop the connection under us; a server can
+        pre_ping = not sqlite
+
+    options = {
+        "pool_pre_ping": pre_ping,
+        "query_cache_size": config.DB_STATEMENT_CACHE_SIZE,
+        "connect_args": {},
+    }
+    if not _is_memory_sqlite(url):
+        options.update(
+            pool_size=config.DB_POOL_SIZE,
+            max_overflow=config.DB_MAX_OVERFLOW,
+            pool_timeout=config.DB_POOL_TIMEOUT,
+            pool_recycle=config.DB_POOL_RECYCLE,
+        )
+    if sqlite:
+        # SQLite flag for multi-threaded usage under uvicorn
+        options["connect_args"]["check_same_thread"] = False
+        if make_url(url).get_driver_name() in ("pysqlite", "aiosqlite"):
+            options["connect_args"]["cached_statements"] = config.DB_STATEMENT_CACHE_SIZE
+    elif config.DB_PG_PREPARE_THRESHOLD is not None and make_url(url).get_driver_name() == "psycopg":
+        options["connect_args"]["prepare_threshold"] = config.DB_PG_PREPARE_THRESHOLD
+    return options
+
+def install_sqlite_pragmas(engine: Engine, config: Settings = settings) -> None:
+    """
+    Apply the SQLite performance profile to every new connection.
+
+    WAL lets readers run alongside the single writer, busy_timeout makes
+    writers queue instead of failing with "database is locked", and
+    synchronous=NORMAL is durable in WAL mode except on power loss.
+    """
+    if not config.SQLITE_PRAGMAS_ENABLED or engine.dialect.name != "sqlite":
+        return
+
+    pragmas = [
+        f"PRAGMA busy_timeout = {int(config.SQLITE_BUSY_TIMEOUT_MS)}",
+        f"PRAGMA synchronous = {config.SQLITE_SYNCHRONOUS}",
+        f"PRAGMA cache_size = {-int(config.SQLITE_CACHE_SIZE_KB)}",
+        f"PRAGMA mmap_size = {int(config.SQLITE_MMAP_SIZE)}",
+        f"PRAGMA temp_store = {config.SQLITE_TEMP_STORE}",
+    ]
+    if not _is_memory_sqlite(engine.url.render_as_string()):
+        # journal_mode is persistent and not meaningful for :memory:
+        pragmas.insert(0, f"PRAGMA journal_mode = {config.SQLITE_JOURNAL_MODE}")
+
+    @event.listens_for(engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+def create_db_engine(url: str, config: Settings = settings) -> Engine:
+    """Sync engine with pool options and (for SQLite) the pragma profile"""
+    db_engine = create_engine(url, **engine_options(url, config))
+    install_sqlite_pragmas(db_engine, config)
+    return db_engine
+
+def dialect_insert(db: Session):
+    """The dialect's ``insert`` (with ``on_conflict_do_update``) for upserts"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise ValueError(f"Upserts are not supported on {dialect}")
+    return insert
+
+
+engine = create_db_engine(settings.DATABASE_URL)
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
 
 def get_db():
@@ -19,3 +103,38 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# --- Async mode (settings.DB_ASYNC) -------------------------------------------
+# Same database, reached through an async driver: aiosqlite for SQLite,
+# psycopg's async support for PostgreSQL (or whatever ASYNC_DATABASE_URL names).
+
+_ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+psycopg",
+}
+
+def async_database_url(url: str) -> str:
+    """Map a sync DATABASE_URL onto the matching async driver"""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in _ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for '{backend}'; set ASYNC_DATABASE_URL")
+    return parsed.set(drivername=_ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+async_engine = None
+AsyncSessionLocal = None
+
+if settings.DB_ASYNC:
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+    _async_url = settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL)
+    async_engine = create_async_engine(_async_url, **engine_options(_async_url))
+    install_sqlite_pragmas(async_engine.sync_engine)
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+    )
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,48 @@
+"""
+Bulk product import from the command line.
+
+Streams a CSV or JSON Lines file into the products table using batched
+upserts (see app/services/product_import.py).
+
+Run from the backend directory:
+    python -m app.core.import_products suppliers/prices.csv
+    python -m app.core.import_products stock.jsonl --batch-size 5000
+"""
+
+import argparse
+import sys
+
+from app.core.db import SessionLocal
+from app.services.product_import import FORMATS, guess_format, import_products
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Import products from CSV or JSON Lines")
+    parser.add_argument("path", help="File to import")
+    parser.add_argument("--format", choices=FORMATS, help="File format (default: from extension)")
+    parser.add_argument("--batch-size", type=int, default=None, help="Rows per upsert statement")
+    parser.add_argument("--show-errors", type=int, default=20, help="Number of row errors to print")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or guess_format(args.path)
+    if fmt is None:
+        parser.error("cannot tell the format from the file name; pass --format")
+
+    db = SessionLocal()
+    try:
+        with open(args.path, encoding="utf-8-sig", newline="") as stream:
+            report = import_products(db, stream, fmt, batch_size=args.batch_size)
+    finally:
+        db.close()
+
+    print(f"✓ Read {report.rows_read} rows, upserted {report.upserted} "
+          f"in {report.batches} batches ({report.elapsed_seconds}s, {report.rows_per_second} rows/s)")
+    if report.error_count:
+        print(f"✗ {report.error_count} rows rejected")
+        for error in report.errors[:args.show_errors]:
+            print(f"  row {error.row} {error.sku or ''}: {'; '.join(error.errors)}")
+    return 1 if report.error_count else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,9 +12,14 @@ Or from backend directory:
     python -c "from app.core.init_db import init_database; init_database()"
 """
 
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 from app.core.db import engine, Base, SessionLocal
 from app.models import Product
+from app.core.migrations import backfill_sale_lookup, ensure_schema
+from app.services.delivery_slots import ensure_default_slots
+from app.services.delivery_fees import ensure_default_fee_rules
+from app.services.product_search import ensure_search_index
 import json
 
 
@@ -24,6 +29,19 @@ def create_tables():
     Base.metadata.create_all(bind=engine)
     print("✓ Tables created successfully")
 
+    added = ensure_schema(engine)
+    if added:
+        print(f"✓ Added columns: {', '.join(added)}")
+        print(f"✓ Backfilled lookup columns on {backfill_sale_lookup(engine)} sales")
+    
+    backend = ensure_search_index(engine)
+    print(f"✓ Product search index: {backend or 'none (ILIKE fallback)'}")
+
+    ensure_default_slots(engine)
+    print("✓ Delivery slots defined")
+    ensure_default_fee_rules(engine)
+    print("✓ Delivery fee zones defined")
+
 
 def seed_sample_products(db: Session):
     """Add sample products from existing catalog"""
@@ -156,10 +174,8 @@ def seed_sample_products(db: Session):
         }
     ]
     
-    for product_data in catalog_products:
-        product = Product(**product_data)
-        db.add(product)
-    
+    # One multi-row INSERT instead of an ORM add per product
+    db.execute(insert(Product), catalog_products)
     db.commit()
     print(f"✓ Seeded {len(catalog_products)} products from catalog")
 
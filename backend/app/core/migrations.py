@@ -0,0 +1,113 @@
+"""
+Schema top-ups for existing databases.
+
+``create_all`` creates missing tables but never alters existing ones, so
+columns and indexes added to a model after a database was first created are
+added here (until Alembic is introduced). Everything is idempotent and runs at startup.
+
+Backfill the sales lookup columns on an existing database with:
+    python -m app.core.migrations
+"""
+
+import argparse
+import sys
+
+from sqlalchemy import bindparam, inspect, or_, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateIndex
+
+from app.core.db import Base, engine as default_engine
+from app.models.product import Product
+from app.models.sale import Sale
+from app.services import sale_lookup
+
+
+def add_missing_columns(engine: Engine, model) -> list[str]:
+    """
+    ALTER TABLE ADD COLUMN for model columns the database table doesn't
+    have yet. Returns the names of added columns.
+    """
+    table = model.__table__
+    existing = {c["name"] for c in inspect(engine).get_columns(table.name)}
+    missing = [c for c in table.columns if c.name not in existing]
+    if not missing:
+        return []
+
+    preparer = engine.dialect.identifier_preparer
+    with engine.begin() as conn:
+        for column in missing:
+            column_type = column.type.compile(dialect=engine.dialect)
+            conn.exec_driver_sql(
+                f"ALTER TABLE {preparer.format_table(table)} "
+                f"ADD COLUMN {preparer.format_column(column)} {column_type}"
+            )
+    return [c.name for c in missing]
+
+
+def add_missing_indexes(engine: Engine, model) -> list[str]:
+    """CREATE INDEX for model indexes the database table doesn't have yet"""
+    table = model.__table__
+    existing = {i["name"] for i in inspect(engine).get_indexes(table.name)}
+    missing = [i for i in table.indexes if i.name not in existing]
+    with engine.begin() as conn:
+        for index in missing:
+            conn.execute(CreateIndex(index, if_not_exists=True))
+    return [i.name for i in missing]
+
+
+def ensure_schema(engine: Engine) -> list[str]:
+    """Bring existing tables up to the current models; returns added columns"""
+    added = [f"sales.{name}" for name in add_missing_columns(engine, Sale)]
+    add_missing_indexes(engine, Sale)
+    add_missing_indexes(engine, Product)
+    return added
+
+
+def backfill_sale_lookup(engine: Engine, batch_size: int = 1000) -> int:
+    """
+    Fill the sales lookup columns from the JSON blobs for rows that predate them.
+
+    Walks the table by id in batches, one transaction per batch, so it can
+    run against a live database. Returns the number of rows updated.
+    """
+    pending = or_(Sale.customer_phone.is_(None), Sale.payment_method.is_(None))
+    stmt = (
+        update(Sale.__table__)
+        .where(Sale.__table__.c.id == bindparam("sale_id"))
+        .values({column: bindparam(column) for column in sale_lookup.LOOKUP_COLUMNS})
+    )
+    updated = 0
+    last_id = 0
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(
+                select(Sale.id, Sale.customer_json, Sale.delivery_json, Sale.payment_json)
+                .where(Sale.id > last_id, pending)
+                .order_by(Sale.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                return updated
+            conn.execute(stmt, [
+                {"sale_id": row.id, **sale_lookup.lookup_values(row.customer_json, row.delivery_json, row.payment_json)}
+                for row in rows
+            ])
+        updated += len(rows)
+        last_id = rows[-1].id
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Add missing columns and backfill sales lookup columns")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    Base.metadata.create_all(bind=default_engine)
+    for name in ensure_schema(default_engine):
+        print(f"✓ Added column {name}")
+    updated = backfill_sale_lookup(default_engine, args.batch_size)
+    print(f"✓ Backfilled lookup columns on {updated} sales")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
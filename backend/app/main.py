@@ -3,11 +3,37 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import settings
-from app.core.db import Base, engine
-from app.api.routers import sales, products, delivery, customers
+from app.core.db import Base, engine, async_engine
+from app.api.routers import sales, products, delivery, customers, reports, jobs, routes_health, metrics
+from app.core.migrations import backfill_sale_lookup, ensure_schema
+from app.services.product_search import ensure_search_index
+from app.services.reporting import ensure_rollups
+from app.services.delivery_slots import ensure_default_slots
+from app.services.delivery_fees import ensure_default_fee_rules
+from app.services.jobs import worker_pool
+from app.services.idempotency import IdempotencyMiddleware
+from app.services.metrics import MetricsMiddleware, instrument_engine
 
 app = FastAPI(title="Schedular API", version="0.1.0")
 
+# Request latency and per-request query counts, innermost so it sees the matched route
+if settings.METRICS_ENABLED:
+    instrument_engine(engine)
+    if async_engine is not None:
+        instrument_engine(async_engine.sync_engine, "async")
+    app.add_middleware(MetricsMiddleware)
+
+# Idempotency-Key replay for till retries; inside CORS so replays get CORS headers too
+app.add_middleware(IdempotencyMiddleware)
+
+# On-demand request profiling, only wired up when enabled
+if settings.PROFILING_ENABLED:
+    from app.services.profiling import ProfilingMiddleware, install_sql_capture
+    install_sql_capture(engine)
+    if async_engine is not None:
+        install_sql_capture(async_engine.sync_engine)
+    app.add_middleware(ProfilingMiddleware)
+
 # CORS for Vite dev server
 app.add_middleware(
     CORSMiddleware,
@@ -21,9 +47,30 @@ app.add_middleware(
 @app.on_event("startup")
 def on_startup():
     Base.metadata.create_all(bind=engine)
+    if ensure_schema(engine):
+        backfill_sale_lookup(engine)
+    ensure_search_index(engine)
+    ensure_rollups(engine)
+    ensure_default_slots(engine)
+    ensure_default_fee_rules(engine)
+    worker_pool.start()
+
+@app.on_event("shutdown")
+def on_shutdown():
+    worker_pool.stop(timeout=30)
 
 # Routers that your frontend calls (base URL = /api)
-app.include_router(sales.router,     prefix="/api")
-app.include_router(products.router,  prefix="/api")
+if settings.DB_ASYNC:
+    from app.api.routers import sales_async, products_async
+    app.include_router(sales_async.router,    prefix="/api")
+    app.include_router(products_async.router, prefix="/api")
+else:
+    app.include_router(sales.router,     prefix="/api")
+    app.include_router(products.router,  prefix="/api")
 app.include_router(delivery.router,  prefix="/api")
 app.include_router(customers.router, prefix="/api")
+app.include_router(reports.router,   prefix="/api")
+app.include_router(jobs.router,      prefix="/api")
+app.include_router(routes_health.router, prefix="/api")
+if settings.METRICS_ENABLED:
+    app.include_router(metrics.router)
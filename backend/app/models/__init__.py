@@ -1,5 +1,9 @@
 # Import all models here so they're registered with SQLAlchemy
-from app.models.sale import Sale, SaleItem
+from app.models.sale import Sale, SaleItem, OrderNumberCounter
 from app.models.product import Product
+from app.models.report import DailySales, DailySkuSales
+from app.models.delivery import DeliverySlot, DeliverySlotOccupancy, Geocode, DeliveryZone, DeliveryFeeRule
+from app.models.job import Job
+from app.models.idempotency import IdempotencyKey
 
-__all__ = ['Sale', 'SaleItem', 'Product']
+__all__ = ['Sale', 'SaleItem', 'OrderNumberCounter', 'Product', 'DailySales', 'DailySkuSales', 'DeliverySlot', 'DeliverySlotOccupancy', 'Geocode', 'DeliveryZone', 'DeliveryFeeRule', 'Job', 'IdempotencyKey']
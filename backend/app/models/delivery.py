@@ -0,0 +1,135 @@
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import Integer, String, Text, Date, DateTime, Boolean, Float, Numeric, ForeignKey
+from datetime import date, datetime
+from decimal import Decimal
+from typing import List
+from app.core.db import Base
+
+
+class DeliverySlot(Base):
+    """
+    A bookable delivery window and its capacity, the same every day.
+
+    ``code`` is the ``DeliveryDetails.timeSlot`` value that books it.
+    """
+    __tablename__ = "delivery_slots"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    code: Mapped[str] = mapped_column(String(50), unique=True, nullable=False)
+    label: Mapped[str] = mapped_column(String(100), nullable=False)
+    time_range: Mapped[str | None] = mapped_column(String(50), nullable=True)
+    position: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+    # Capacity per day
+    trucks: Mapped[int] = mapped_column(Integer, default=1, nullable=False)
+    stops_per_truck: Mapped[int] = mapped_column(Integer, default=6, nullable=False)
+    crew_minutes: Mapped[int] = mapped_column(Integer, default=240, nullable=False)
+    volume_l: Mapped[int] = mapped_column(Integer, default=18000, nullable=False)
+
+    is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
+
+    @property
+    def max_orders(self) -> int:
+        return self.trucks * self.stops_per_truck
+
+    def __repr__(self) -> str:
+        return f"<DeliverySlot(code={self.code}, trucks={self.trucks})>"
+
+
+class DeliverySlotOccupancy(Base):
+    """
+    Capacity used per (day, slot): the index availability is read from.
+
+    Only rows for days that have bookings exist; updated atomically
+    together with the sales that book them.
+    """
+    __tablename__ = "delivery_slot_occupancy"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    slot_code: Mapped[str] = mapped_column(String(50), primary_key=True)
+    orders: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    crew_minutes: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    volume_l: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<DeliverySlotOccupancy(day={self.day}, slot={self.slot_code}, orders={self.orders})>"
+
+
+class Geocode(Base):
+    """
+    Cached coordinates for a delivery address, keyed by a hash of the
+    normalized address (see app/services/delivery_routes.address_key).
+    """
+    __tablename__ = "geocodes"
+
+    address_key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    address: Mapped[str] = mapped_column(Text, nullable=False)
+    lat: Mapped[float] = mapped_column(Float, nullable=False)
+    lon: Mapped[float] = mapped_column(Float, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<Geocode(address={self.address!r}, lat={self.lat}, lon={self.lon})>"
+
+
+class DeliveryZone(Base):
+    """
+    A set of postcodes priced by the same fee rules (see
+    app/services/delivery_fees.py).
+
+    ``postcodes`` is a comma-separated list of patterns: exact postcodes or
+    ranges ("2000-2099"), prefixes ("21*") and "*" for everywhere else.
+    """
+    __tablename__ = "delivery_zones"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    code: Mapped[str] = mapped_column(String(50), unique=True, nullable=False)
+    name: Mapped[str] = mapped_column(String(100), nullable=False)
+    postcodes: Mapped[str] = mapped_column(Text, nullable=False, default="")
+
+    # Surcharges for the DeliveryDetails service flags
+    white_glove_fee: Mapped[Decimal] = mapped_column(Numeric(10, 2), default=0, nullable=False)
+    setup_fee: Mapped[Decimal] = mapped_column(Numeric(10, 2), default=0, nullable=False)
+    removal_fee: Mapped[Decimal] = mapped_column(Numeric(10, 2), default=0, nullable=False)
+
+    is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False
+    )
+
+    rules: Mapped[List["DeliveryFeeRule"]] = relationship(
+        "DeliveryFeeRule", back_populates="zone", cascade="all, delete-orphan",
+        order_by="DeliveryFeeRule.position", lazy="selectin"
+    )
+
+    def __repr__(self) -> str:
+        return f"<DeliveryZone(code={self.code}, postcodes={self.postcodes!r})>"
+
+
+class DeliveryFeeRule(Base):
+    """
+    One fee rule for a zone; the first rule (by position) whose item and
+    volume bounds contain the cart prices it:
+
+        fee = base_fee + per_item_fee * items + per_100l_fee * ceil(litres / 100)
+    """
+    __tablename__ = "delivery_fee_rules"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    zone_id: Mapped[int] = mapped_column(ForeignKey("delivery_zones.id", ondelete="CASCADE"), index=True)
+    position: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+    min_items: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    max_items: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    min_volume_l: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    max_volume_l: Mapped[int | None] = mapped_column(Integer, nullable=True)
+
+    base_fee: Mapped[Decimal] = mapped_column(Numeric(10, 2), default=0, nullable=False)
+    per_item_fee: Mapped[Decimal] = mapped_column(Numeric(10, 2), default=0, nullable=False)
+    per_100l_fee: Mapped[Decimal] = mapped_column(Numeric(10, 2), default=0, nullable=False)
+
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False
+    )
+
+    zone: Mapped["DeliveryZone"] = relationship("DeliveryZone", back_populates="rules")
@@ -0,0 +1,36 @@
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import Integer, String, Text, DateTime, LargeBinary, Index
+from datetime import datetime
+from app.core.db import Base
+
+
+class IdempotencyKey(Base):
+    """
+    A client's ``Idempotency-Key`` and the response it got
+    (see app/services/idempotency.py).
+
+    ``pending`` while the first request runs (``locked_until`` is its
+    lease, so a crashed process doesn't hold the key forever), then
+    ``done`` with the stored response until ``expires_at``.
+    """
+    __tablename__ = "idempotency_keys"
+
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    request_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    status: Mapped[str] = mapped_column(String(20), default="pending", nullable=False)
+
+    status_code: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    headers_json: Mapped[str | None] = mapped_column(Text, nullable=True)
+    body: Mapped[bytes | None] = mapped_column(LargeBinary, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    locked_until: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+    __table_args__ = (
+        # TTL eviction
+        Index("idx_idempotency_expires_at", "expires_at"),
+    )
+
+    def __repr__(self) -> str:
+        return f"<IdempotencyKey(key={self.key}, status={self.status})>"
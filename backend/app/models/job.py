@@ -0,0 +1,46 @@
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import Integer, String, Text, DateTime, Float, Index
+from datetime import datetime
+from app.core.db import Base
+
+
+class Job(Base):
+    """
+    A unit of background work (see app/services/jobs.py).
+
+    Lifecycle: queued -> running -> succeeded | failed. A failed attempt
+    goes back to queued with ``run_at`` pushed out until ``max_attempts``
+    is used up. ``locked_by``/``locked_at`` are the running worker's lease;
+    a lease that isn't renewed in time is reclaimed by other workers.
+    """
+    __tablename__ = "jobs"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    kind: Mapped[str] = mapped_column(String(100), nullable=False)
+    status: Mapped[str] = mapped_column(String(20), default="queued", nullable=False)
+
+    payload_json: Mapped[str] = mapped_column(Text, nullable=False, default="{}")
+    result_json: Mapped[str | None] = mapped_column(Text, nullable=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    progress: Mapped[float] = mapped_column(Float, default=0.0, nullable=False)
+    progress_message: Mapped[str | None] = mapped_column(String(255), nullable=True)
+
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    max_attempts: Mapped[int] = mapped_column(Integer, default=3, nullable=False)
+    run_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+    locked_by: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    locked_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    started_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # The claim query: next due job in the queue
+        Index("idx_job_status_run_at", "status", "run_at", "id"),
+    )
+
+    def __repr__(self) -> str:
+        return f"<Job(id={self.id}, kind={self.kind}, status={self.status})>"
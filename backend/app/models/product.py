@@ -59,6 +59,7 @@ class Product(Base):
     __table_args__ = (
         Index('idx_product_category_active', 'category', 'is_active'),
         Index('idx_product_stock_status', 'stock_status'),
+        Index('idx_product_name_id', 'name', 'id'),  # keyset pagination
     )
     
     def __repr__(self) -> str:
@@ -0,0 +1,49 @@
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import Integer, String, Date, Numeric, Index
+from datetime import date
+from decimal import Decimal
+from app.core.db import Base
+
+
+class DailySales(Base):
+    """
+    Per-day sales totals, maintained incrementally by app/services/reporting.py.
+
+    One row per UTC day of ``Sale.created_at``; cancelled sales don't count.
+    """
+    __tablename__ = "report_daily_sales"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    orders: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    units: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    subtotal: Mapped[Decimal] = mapped_column(Numeric(14, 2), default=0, nullable=False)
+    discount: Mapped[Decimal] = mapped_column(Numeric(14, 2), default=0, nullable=False)
+    delivery_fee: Mapped[Decimal] = mapped_column(Numeric(14, 2), default=0, nullable=False)
+    total: Mapped[Decimal] = mapped_column(Numeric(14, 2), default=0, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<DailySales(day={self.day}, orders={self.orders}, total={self.total})>"
+
+
+class DailySkuSales(Base):
+    """
+    Per-day, per-SKU line totals (qty x unit price, before order discount).
+
+    ``category`` is the product's category when the line was recorded, so
+    history doesn't move if a product is re-categorised later.
+    """
+    __tablename__ = "report_daily_sku_sales"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    sku: Mapped[str] = mapped_column(String(100), primary_key=True)
+    category: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    orders: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    units: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    revenue: Mapped[Decimal] = mapped_column(Numeric(14, 2), default=0, nullable=False)
+
+    __table_args__ = (
+        Index('idx_report_sku_sku_day', 'sku', 'day'),
+    )
+
+    def __repr__(self) -> str:
+        return f"<DailySkuSales(day={self.day}, sku={self.sku}, units={self.units})>"
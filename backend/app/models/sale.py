@@ -1,6 +1,6 @@
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import Integer, String, Text, DateTime, Numeric, ForeignKey
-from datetime import datetime
+from sqlalchemy import Integer, String, Text, Date, DateTime, Numeric, ForeignKey, Index
+from datetime import date, datetime
 from decimal import Decimal
 from typing import List
 from app.core.db import Base
@@ -14,6 +14,24 @@ class Sale(Base):
     delivery_json: Mapped[str] = mapped_column(Text)
     payment_json:  Mapped[str] = mapped_column(Text)
 
+    # Indexed copies of fields inside the JSON blobs, for lookups
+    # (kept in sync by app/services/sale_lookup.py; the blobs stay authoritative)
+    customer_phone: Mapped[str | None] = mapped_column(String(32), nullable=True, index=True)
+    customer_email: Mapped[str | None] = mapped_column(String(255), nullable=True, index=True)
+    customer_name:  Mapped[str | None] = mapped_column(String(255), nullable=True, index=True)
+    delivery_date:  Mapped[date | None] = mapped_column(Date, nullable=True, index=True)
+    delivery_time_slot: Mapped[str | None] = mapped_column(String(50), nullable=True)
+    payment_method: Mapped[str | None] = mapped_column(String(20), nullable=True, index=True)
+
+    # Delivery capacity held in (delivery_date, delivery_time_slot); null when
+    # the sale holds no slot (see app/services/delivery_slots.py)
+    delivery_crew_minutes: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    delivery_volume_l: Mapped[int | None] = mapped_column(Integer, nullable=True)
+
+    # Till-supplied key for POST /sales/batch, so replaying an offline queue
+    # doesn't create the order twice
+    client_key: Mapped[str | None] = mapped_column(String(100), nullable=True)
+
     status: Mapped[str] = mapped_column(String(32), default="draft")
 
     subtotal: Mapped[Decimal] = mapped_column(Numeric(12,2), default=0)
@@ -24,7 +42,15 @@ class Sale(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
     items: Mapped[List["SaleItem"]] = relationship(
-        "SaleItem", back_populates="sale", cascade="all, delete-orphan", lazy="selectin"
+        "SaleItem", back_populates="sale", cascade="all, delete-orphan", lazy="selectin",
+        order_by="SaleItem.id"
+    )
+
+    __table_args__ = (
+        # Keyset pagination for GET /sales (newest first), with and without a status filter
+        Index('idx_sale_created_id', 'created_at', 'id'),
+        Index('idx_sale_status_created_id', 'status', 'created_at', 'id'),
+        Index('uq_sale_client_key', 'client_key', unique=True),
     )
 
 class SaleItem(Base):
@@ -38,3 +64,14 @@ class SaleItem(Base):
     color: Mapped[str | None] = mapped_column(String(50), nullable=True)
 
     sale: Mapped["Sale"] = relationship("Sale", back_populates="items")
+
+class OrderNumberCounter(Base):
+    """
+    Next free order number, one row per sequence name.
+
+    Used where the database has no native sequences (SQLite); see
+    app/services/order_numbers.py.
+    """
+    __tablename__ = "order_number_counters"
+    name: Mapped[str] = mapped_column(String(50), primary_key=True)
+    next_value: Mapped[int] = mapped_column(Integer, nullable=False)
@@ -1,6 +1,8 @@
 # Export all schemas for easy imports
 from app.schemas.sale import *
 from app.schemas.job import *
+from app.schemas.report import *
+from app.schemas.delivery import *
 from app.schemas.product import (
     ProductRead,
     ProductCreate,
@@ -8,7 +10,13 @@ from app.schemas.product import (
     ProductList,
     StockInfo,
     ColorOption,
-    AvailabilityCheck
+    AvailabilityCheck,
+    AvailabilityRequestItem,
+    AvailabilityBatchRequest,
+    AvailabilityLineCheck,
+    AvailabilityBatchCheck,
+    ProductImportError,
+    ProductImportReport
 )
 
 __all__ = [
@@ -18,5 +26,11 @@ __all__ = [
     'ProductList',
     'StockInfo',
     'ColorOption',
-    'AvailabilityCheck'
+    'AvailabilityCheck',
+    'AvailabilityRequestItem',
+    'AvailabilityBatchRequest',
+    'AvailabilityLineCheck',
+    'AvailabilityBatchCheck',
+    'ProductImportError',
+    'ProductImportReport'
 ]
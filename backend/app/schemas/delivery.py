@@ -0,0 +1,147 @@
+from typing import List, Optional
+from datetime import date
+from decimal import Decimal
+from pydantic import BaseModel, ConfigDict, Field
+from app.schemas.sale import Address
+
+class DeliverySlotBase(BaseModel):
+    label: str = Field(..., min_length=1, max_length=100)
+    time_range: Optional[str] = Field(None, max_length=50)
+    position: int = 0
+    trucks: int = Field(..., ge=0)
+    stops_per_truck: int = Field(..., ge=0)
+    crew_minutes: int = Field(..., ge=0, description="Crew minutes available per day")
+    volume_l: int = Field(..., ge=0, description="Load volume per day, litres")
+    is_active: bool = True
+
+class DeliverySlotUpdate(DeliverySlotBase):
+    """Create or replace a slot definition (PUT /delivery/slots/definitions/{code})"""
+
+class DeliverySlotRead(DeliverySlotBase):
+    model_config = ConfigDict(from_attributes=True)
+    code: str
+
+class SlotRemaining(BaseModel):
+    orders: int
+    crewMinutes: int
+    volumeLitres: int
+
+class SlotAvailability(BaseModel):
+    """Mirrors the frontend's TimeSlot, plus the remaining capacity"""
+    id: str
+    label: str
+    timeRange: Optional[str] = None
+    capacity: str
+    available: bool
+    remaining: SlotRemaining
+
+class DeliveryDayAvailability(BaseModel):
+    day: date
+    slots: List[SlotAvailability]
+
+class OccupancyRebuildResult(BaseModel):
+    slots: int
+
+class GeocodeEntry(BaseModel):
+    address: Address
+    lat: float = Field(..., ge=-90, le=90)
+    lon: float = Field(..., ge=-180, le=180)
+
+class GeocodeUpsertResult(BaseModel):
+    stored: int
+
+class RouteStopRead(BaseModel):
+    saleId: int
+    orderNumber: int
+    address: str
+    lat: float
+    lon: float
+    timeSlot: Optional[str] = None
+    window: str
+    arrival: str
+    start: str
+    departure: str
+    lateMinutes: int
+    serviceMinutes: int
+    volumeLitres: int
+
+class TruckRouteRead(BaseModel):
+    truck: int
+    stops: List[RouteStopRead]
+    distanceKm: float
+    travelMinutes: int
+    finish: str
+    volumeLitres: int
+
+class UnassignedStopRead(BaseModel):
+    saleId: int
+    reason: str
+
+class RoutePlanRead(BaseModel):
+    day: date
+    routes: List[TruckRouteRead]
+    unassigned: List[UnassignedStopRead]
+    distanceKm: float
+    lateStops: int
+    constructionCost: float
+    cost: float
+    elapsedSeconds: float
+
+class FeeRequest(BaseModel):
+    postcode: str
+    items: List[dict]
+    whiteGloveService: bool = False
+    setupService: bool = False
+    oldMattressRemoval: bool = False
+    volumeLitres: Optional[int] = Field(None, ge=0, description="Load volume; estimated from the items' categories if omitted")
+
+class FeeQuote(BaseModel):
+    postcode: str
+    fee: float
+    deliverable: bool
+    zone: Optional[str] = None
+    baseFee: float
+    surcharges: float
+    items: int
+    volumeLitres: int
+    reason: Optional[str] = None
+
+class FeeBatchRequest(BaseModel):
+    requests: List[FeeRequest] = Field(..., min_length=1, max_length=1000)
+
+class FeeBatchQuote(BaseModel):
+    quotes: List[FeeQuote]
+
+class FeeRuleBase(BaseModel):
+    position: int = 0
+    min_items: int = Field(0, ge=0)
+    max_items: Optional[int] = Field(None, ge=0)
+    min_volume_l: int = Field(0, ge=0)
+    max_volume_l: Optional[int] = Field(None, ge=0)
+    base_fee: Decimal = Field(Decimal("0"), ge=0)
+    per_item_fee: Decimal = Field(Decimal("0"), ge=0)
+    per_100l_fee: Decimal = Field(Decimal("0"), ge=0)
+
+class FeeRuleRead(FeeRuleBase):
+    model_config = ConfigDict(from_attributes=True)
+
+class DeliveryZoneBase(BaseModel):
+    name: str = Field(..., min_length=1, max_length=100)
+    postcodes: str = Field(..., description="Comma-separated: exact '2000', range '2000-2099', prefix '21*', or '*'")
+    white_glove_fee: Decimal = Field(Decimal("0"), ge=0)
+    setup_fee: Decimal = Field(Decimal("0"), ge=0)
+    removal_fee: Decimal = Field(Decimal("0"), ge=0)
+    is_active: bool = True
+
+class DeliveryZoneUpdate(DeliveryZoneBase):
+    """Create or replace a zone and all its rules (PUT /delivery/zones/{code})"""
+    rules: List[FeeRuleBase] = Field(default_factory=list)
+
+class DeliveryZoneRead(DeliveryZoneBase):
+    model_config = ConfigDict(from_attributes=True)
+    code: str
+    rules: List[FeeRuleRead]
+
+class FeeReloadResult(BaseModel):
+    zones: int
+    loads: int
@@ -0,0 +1,37 @@
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+from pydantic import BaseModel, Field
+
+class JobCreate(BaseModel):
+    kind: str = Field(..., min_length=1, max_length=100, description="Registered job kind, e.g. 'reports.rebuild'")
+    payload: Dict[str, Any] = Field(default_factory=dict)
+    max_attempts: Optional[int] = Field(None, ge=1, le=20, description="Default: JOB_MAX_ATTEMPTS")
+    run_at: Optional[datetime] = Field(None, description="Don't start before this time (UTC)")
+
+class JobRead(BaseModel):
+    id: int
+    kind: str
+    status: str
+    payload: Dict[str, Any]
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    progress: float
+    progress_message: Optional[str] = None
+    attempts: int
+    max_attempts: int
+    run_at: datetime
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+class JobList(BaseModel):
+    """One page of GET /jobs, newest first"""
+    items: List[JobRead]
+    page_size: int = Field(..., ge=1, description="Items per page")
+    has_more: bool = Field(..., description="Whether more pages are available")
+    next_cursor: Optional[str] = Field(default=None, description="Cursor for the next page, if any")
+
+class JobStats(BaseModel):
+    queue: Dict[str, int]
+    kinds: List[str]
+    pool: Dict[str, Any]
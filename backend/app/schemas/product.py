@@ -162,10 +162,11 @@ class ProductRead(BaseModel):
 class ProductList(BaseModel):
     """Paginated product list response"""
     items: List[ProductRead]
-    total: int = Field(..., ge=0, description="Total number of products matching filters")
-    page: int = Field(..., ge=1, description="Current page number")
+    total: Optional[int] = Field(default=None, ge=0, description="Total number of products matching filters (null if not requested)")
+    page: Optional[int] = Field(default=None, ge=1, description="Current page number (null in cursor mode)")
     page_size: int = Field(..., ge=1, description="Items per page")
     has_more: bool = Field(..., description="Whether more pages are available")
+    next_cursor: Optional[str] = Field(default=None, description="Cursor for the next page, if any")
 
     model_config = {
         "json_schema_extra": {
@@ -182,7 +183,8 @@ class ProductList(BaseModel):
                 "total": 8,
                 "page": 1,
                 "page_size": 50,
-                "has_more": False
+                "has_more": False,
+                "next_cursor": None
             }
         }
     }
@@ -223,3 +225,57 @@ class AvailabilityCheck(BaseModel):
             ]
         }
     }
+
+
+class AvailabilityRequestItem(BaseModel):
+    """One cart line to check"""
+    sku: str = Field(..., min_length=1, max_length=100, description="Product SKU")
+    quantity: int = Field(default=1, ge=1, description="Requested quantity")
+    color: Optional[str] = Field(default=None, max_length=50, description="Requested color variant")
+
+
+class AvailabilityBatchRequest(BaseModel):
+    """Availability check for a whole cart"""
+    items: List[AvailabilityRequestItem] = Field(..., min_length=1, max_length=500)
+
+    model_config = {
+        "json_schema_extra": {
+            "example": {
+                "items": [
+                    {"sku": "DT-1001", "quantity": 1, "color": "Natural Oak"},
+                    {"sku": "CH-4110", "quantity": 4}
+                ]
+            }
+        }
+    }
+
+
+class AvailabilityLineCheck(AvailabilityCheck):
+    """Availability result for one cart line (same fields as AvailabilityCheck)"""
+    sku: str
+    color: Optional[str] = None
+
+
+class AvailabilityBatchCheck(BaseModel):
+    """Availability results for a cart, in request order"""
+    items: List[AvailabilityLineCheck]
+    allAvailable: bool = Field(..., description="Whether every line is available")
+
+
+class ProductImportError(BaseModel):
+    """A row that could not be imported"""
+    row: int = Field(..., ge=1, description="1-based data row number in the file")
+    sku: Optional[str] = None
+    errors: List[str]
+
+
+class ProductImportReport(BaseModel):
+    """Result of a bulk product import"""
+    rows_read: int
+    rows_valid: int
+    upserted: int = Field(..., description="Rows inserted or updated")
+    error_count: int
+    errors: List[ProductImportError] = Field(default_factory=list, description="First errors (capped)")
+    batches: int
+    elapsed_seconds: float
+    rows_per_second: Optional[float] = None
@@ -0,0 +1,30 @@
+from typing import Optional
+from datetime import date
+from decimal import Decimal
+from pydantic import BaseModel
+
+class DailySalesReport(BaseModel):
+    day: date
+    orders: int
+    units: int
+    subtotal: Decimal
+    discount: Decimal
+    deliveryFee: Decimal
+    total: Decimal
+    averageOrderValue: Decimal
+
+class CategorySalesReport(BaseModel):
+    category: Optional[str] = None
+    units: int
+    revenue: Decimal
+
+class SkuSalesReport(BaseModel):
+    sku: str
+    category: Optional[str] = None
+    orders: int
+    units: int
+    revenue: Decimal
+
+class RollupRebuildResult(BaseModel):
+    days: int
+    skuRows: int
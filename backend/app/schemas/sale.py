@@ -1,6 +1,6 @@
-from typing import List, Optional, Literal
+from typing import Any, List, Optional, Literal
 from decimal import Decimal
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, model_validator
 
 PaymentMethod = Literal['cash','card','transfer','layby']
 
@@ -67,6 +67,33 @@ class SaleOrderCreate(BaseModel):
     totals: Optional[Totals] = None   # server will compute if missing
     status: Optional[str] = "draft"
 
+class SaleOrderUpdate(BaseModel):
+    """
+    Merge patch for PATCH /sales/{id}: only the fields sent change.
+
+    Items are matched to the existing lines by id, then (sku, color); see
+    app/services/sale_patch.py.
+    """
+    customer: Optional[Customer] = None
+    items: Optional[List[LineItemPayload]] = None
+    delivery: Optional[DeliveryDetails] = None
+    payment: Optional[Payment] = None
+    totals: Optional[Totals] = None   # only deliveryFee is taken; the rest is recomputed
+    status: Optional[str] = None
+
+class SalePatchOperation(BaseModel):
+    """One RFC 6902 JSON Patch operation against the sale as GET /sales/{id} returns it"""
+    op: Literal['add', 'remove', 'replace', 'test']
+    path: str = Field(..., description="JSON pointer, e.g. /items/0/qty")
+    value: Any = None
+
+    @model_validator(mode="after")
+    def _value_given(self):
+        # null is a valid value; a missing one isn't
+        if self.op != "remove" and "value" not in self.model_fields_set:
+            raise ValueError(f"'{self.op}' needs a value")
+        return self
+
 class SaleOrderRead(BaseModel):
     model_config = ConfigDict(from_attributes=True)
     id: int
@@ -78,3 +105,42 @@ class SaleOrderRead(BaseModel):
     totals: Totals
     createdAt: str
     status: str
+
+class SaleSummary(BaseModel):
+    """Sale header without line items (GET /sales with include_items=false)"""
+    id: int
+    orderNumber: int
+    customer: Customer
+    delivery: DeliveryDetails
+    payment: Payment
+    totals: Totals
+    createdAt: str
+    status: str
+
+class SaleList(BaseModel):
+    """One page of GET /sales, newest first"""
+    items: List[SaleOrderRead | SaleSummary]
+    page_size: int = Field(..., ge=1, description="Items per page")
+    has_more: bool = Field(..., description="Whether more pages are available")
+    next_cursor: Optional[str] = Field(default=None, description="Cursor for the next page, if any")
+
+class SaleBatchRequest(BaseModel):
+    """
+    POST /sales/batch: SaleOrderCreate payloads, each with a ``clientKey``
+    unique to the till's order. Orders are validated one by one, so a bad
+    order is reported instead of failing the batch.
+    """
+    orders: List[dict] = Field(..., min_length=1)
+
+class SaleBatchResult(BaseModel):
+    clientKey: Optional[str] = None
+    status: Literal['created', 'duplicate', 'rejected']
+    id: Optional[int] = None
+    orderNumber: Optional[int] = None
+    error: Optional[Any] = None
+
+class SaleBatchResponse(BaseModel):
+    results: List[SaleBatchResult]
+    created: int
+    duplicates: int
+    rejected: int
@@ -0,0 +1,418 @@
+"""
+Process-local product catalog snapshot.
+
+The catalog changes a handful of times a day while POS terminals poll it
+constantly, so instead of re-querying and re-building ``ProductRead`` objects
+on every request we keep the whole catalog in memory, sorted by name, with the
+response objects already built.
+
+The snapshot is:
+- loaded lazily on first use (and again after invalidation or TTL expiry)
+- patched in place by the product write endpoints after they commit
+- bounded: catalogs larger than ``max_items`` are never cached and every
+  request falls through to SQL
+- per process: other workers only see a change once their TTL expires
+
+Alongside the snapshot it keeps the serialized JSON body (and ETag) of recent
+catalog responses. Every change to the snapshot bumps ``version``, which
+drops all cached bodies at once.
+"""
+
+import hashlib
+import threading
+import time
+from bisect import insort
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.product import Product
+from app.schemas.product import ProductRead
+
+ProductConverter = Callable[[Product], ProductRead]
+
+
+@dataclass(frozen=True)
+class CatalogEntry:
+    """One cached product: filter attributes plus its pre-built response"""
+    sort_key: Tuple[str, int]
+    sku: str
+    category: Optional[str]
+    stock_status: str
+    is_active: bool
+    search_text: Tuple[str, str]
+    read: ProductRead
+
+    def __lt__(self, other: "CatalogEntry") -> bool:
+        return self.sort_key < other.sort_key
+
+
+def _entry_from_product(product: Product, to_read: ProductConverter) -> CatalogEntry:
+    return CatalogEntry(
+        sort_key=(product.name, product.id),
+        sku=product.sku,
+        category=product.category,
+        stock_status=product.stock_status,
+        is_active=product.is_active,
+        search_text=(product.name.lower(), product.sku.lower()),
+        read=to_read(product),
+    )
+
+
+@dataclass(frozen=True)
+class CachedBody:
+    """Serialized response body with its strong ETag"""
+    body: bytes
+    etag: str
+
+    @classmethod
+    def from_bytes(cls, body: bytes) -> "CachedBody":
+        # Content hash rather than the raw version number: versions are per
+        # process, so two workers can share a number but not the same bytes
+        digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+        return cls(body=body, etag=f'"{digest}"')
+
+
+class CatalogCache:
+    """
+    In-memory, name-ordered snapshot of the products table.
+
+    Readers always see an immutable list; writers swap in a new list under a
+    lock. Readers take the same lock only briefly, to count hits and misses.
+    """
+
+    def __init__(self, max_items: int, ttl_seconds: float, enabled: bool = True, max_bodies: int = 256):
+        self.max_items = max_items
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self.max_bodies = max_bodies
+
+        self._lock = threading.Lock()
+        self._entries: Optional[List[CatalogEntry]] = None
+        self._loaded_at = 0.0
+        # Bumped on every invalidation so a load that raced a write is discarded
+        self._generation = 0
+        self._oversized = False
+        # Bumped whenever the snapshot content changes (load, patch, drop)
+        self.version = 0
+        self._bodies: "OrderedDict[Hashable, CachedBody]" = OrderedDict()
+        # Filtered row counts for the SQL fallback path: {filters: (count, stored_at)}
+        self._counts: "OrderedDict[Hashable, Tuple[int, float]]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self.loads = 0
+        self.patches = 0
+        self.invalidations = 0
+        self.body_hits = 0
+        self.body_misses = 0
+
+    def _bump_version(self) -> None:
+        # Caller holds self._lock
+        self.version += 1
+        self._bodies.clear()
+        self._counts.clear()
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def _fresh_entries(self) -> Optional[List[CatalogEntry]]:
+        entries = self._entries
+        if entries is None:
+            return None
+        if self.ttl_seconds and time.monotonic() - self._loaded_at > self.ttl_seconds:
+            return None
+        return entries
+
+    def _load(self, db: Session, to_read: ProductConverter) -> Optional[List[CatalogEntry]]:
+        generation = self.load_generation()
+        total = db.query(func.count(Product.id)).scalar() or 0
+        if total > self.max_items:
+            return self.install(None, to_read, generation)
+        products = db.query(Product).order_by(Product.name, Product.id).all()
+        return self.install(products, to_read, generation)
+
+    @property
+    def stale(self) -> bool:
+        """True if the next read has to load the snapshot (enabled, not oversized, none fresh)"""
+        return self.enabled and not self._oversized and self._fresh_entries() is None
+
+    def load_generation(self) -> int:
+        """Token for ``install()``, taken before fetching the rows"""
+        with self._lock:
+            return self._generation
+
+    def install(
+        self, products: Optional[List[Product]], to_read: ProductConverter, generation: int
+    ) -> Optional[List[CatalogEntry]]:
+        """
+        Build the snapshot from rows the caller fetched (all products, in
+        name order; None if the catalog is over ``max_items``) and swap it in
+        unless a write happened since ``generation`` was taken.
+
+        Lets callers fetch through their own session (e.g. an AsyncSession)
+        and build the entries off the event loop.
+        """
+        if products is None:
+            with self._lock:
+                self._oversized = True
+            return None
+
+        entries = [_entry_from_product(p, to_read) for p in products]
+
+        with self._lock:
+            self.loads += 1
+            self._oversized = False
+            if generation == self._generation:
+                self._entries = entries
+                self._loaded_at = time.monotonic()
+                self._bump_version()
+        return entries
+
+    def entries(self, db: Session, to_read: ProductConverter) -> Optional[List[CatalogEntry]]:
+        """
+        Return the current snapshot, loading it from the database if needed.
+
+        Returns None when caching is disabled or the catalog exceeds
+        ``max_items``; callers should then run their normal SQL query.
+        """
+        if not self.enabled:
+            with self._lock:
+                self.bypasses += 1
+            return None
+
+        entries = self._fresh_entries()
+        with self._lock:
+            # += isn't atomic; counters share the lock with the snapshot
+            if entries is not None:
+                self.hits += 1
+                return entries
+            self.misses += 1
+
+        entries = self._load(db, to_read)
+        if entries is None:
+            with self._lock:
+                self.bypasses += 1
+        return entries
+
+    def select_entries(
+        self,
+        db: Session,
+        to_read: ProductConverter,
+        active_only: bool = True,
+        category: Optional[str] = None,
+        in_stock_only: bool = False,
+        search: Optional[str] = None,
+    ) -> Optional[List[CatalogEntry]]:
+        """
+        Filter the snapshot the same way the products endpoints filter SQL.
+
+        Results are in catalog order (name, then id). Returns None if the
+        snapshot is unavailable.
+        """
+        entries = self.entries(db, to_read)
+        if entries is None:
+            return None
+
+        needle = search.lower() if search else None
+        results = []
+        for entry in entries:
+            if active_only and not entry.is_active:
+                continue
+            if category and entry.category != category:
+                continue
+            if in_stock_only and entry.stock_status != 'in-stock':
+                continue
+            if needle and needle not in entry.search_text[0] and needle not in entry.search_text[1]:
+                continue
+            results.append(entry)
+        return results
+
+    def select(
+        self,
+        db: Session,
+        to_read: ProductConverter,
+        active_only: bool = True,
+        category: Optional[str] = None,
+        in_stock_only: bool = False,
+        search: Optional[str] = None,
+    ) -> Optional[List[ProductRead]]:
+        """Like ``select_entries`` but returns the pre-built ProductRead objects"""
+        entries = self.select_entries(db, to_read, active_only, category, in_stock_only, search)
+        if entries is None:
+            return None
+        return [entry.read for entry in entries]
+
+    # ------------------------------------------------------------------
+    # Writes (call after the transaction has committed)
+    # ------------------------------------------------------------------
+
+    def upsert(self, product: Product, to_read: ProductConverter) -> None:
+        """Insert or replace a product in the snapshot, keeping name order"""
+        entry = _entry_from_product(product, to_read)
+        with self._lock:
+            self._generation += 1
+            self._bump_version()
+            if self._entries is None:
+                return
+            entries = [e for e in self._entries if e.sku != entry.sku]
+            if len(entries) >= self.max_items:
+                self._entries = None
+                self.invalidations += 1
+                return
+            insort(entries, entry)
+            self._entries = entries
+            self.patches += 1
+
+    def apply_stock(self, levels: Dict[str, Tuple[int, str]]) -> None:
+        """
+        Patch stock quantity/status for SKUs changed by sales.
+
+        Args:
+            levels: sku -> (stock_quantity, stock_status), as returned by
+                app.services.stock
+        """
+        if not levels:
+            return
+        with self._lock:
+            self._generation += 1
+            self._bump_version()
+            if self._entries is None:
+                return
+            entries = []
+            for entry in self._entries:
+                level = levels.get(entry.sku)
+                if level is not None:
+                    quantity, stock_status = level
+                    stock = entry.read.stock.model_copy(update={"quantity": quantity, "status": stock_status})
+                    entry = replace(
+                        entry,
+                        stock_status=stock_status,
+                        read=entry.read.model_copy(update={"stock": stock}),
+                    )
+                entries.append(entry)
+            self._entries = entries
+            self.patches += 1
+
+    def discard(self, sku: str) -> None:
+        """Remove a product from the snapshot (hard delete)"""
+        with self._lock:
+            self._generation += 1
+            self._bump_version()
+            if self._entries is None:
+                return
+            self._entries = [e for e in self._entries if e.sku != sku]
+            self.patches += 1
+
+    def invalidate(self) -> None:
+        """Drop the snapshot; the next read reloads it from the database"""
+        with self._lock:
+            self._generation += 1
+            self._bump_version()
+            self._entries = None
+            self.invalidations += 1
+
+    # ------------------------------------------------------------------
+    # Serialized response bodies
+    # ------------------------------------------------------------------
+
+    def get_body(self, key: Hashable) -> Optional[CachedBody]:
+        """Return the cached body for a query key at the current version"""
+        fresh = self._fresh_entries() is not None
+        with self._lock:
+            cached = self._bodies.get(key) if fresh else None
+            if cached is None:
+                self.body_misses += 1
+            else:
+                self._bodies.move_to_end(key)
+                self.body_hits += 1
+        return cached
+
+    def put_body(self, key: Hashable, cached: CachedBody, version: int) -> None:
+        """
+        Store a body built from the snapshot at ``version``.
+
+        Ignored if the snapshot changed while the body was being built, or
+        if there is no live snapshot to keep it consistent with.
+        """
+        if self._fresh_entries() is None:
+            return
+        with self._lock:
+            if version != self.version:
+                return
+            self._bodies[key] = cached
+            self._bodies.move_to_end(key)
+            while len(self._bodies) > self.max_bodies:
+                self._bodies.popitem(last=False)
+
+    # ------------------------------------------------------------------
+    # Filtered counts
+    # ------------------------------------------------------------------
+
+    def get_count(self, key: Hashable) -> Optional[int]:
+        """
+        Return a cached row count for a filter set.
+
+        Counts live for ``ttl_seconds`` and are dropped on any local write,
+        so they work even when the catalog is too large to snapshot.
+        """
+        with self._lock:
+            cached = self._counts.get(key)
+        if cached is None:
+            return None
+        count, stored_at = cached
+        if self.ttl_seconds and time.monotonic() - stored_at > self.ttl_seconds:
+            return None
+        return count
+
+    def put_count(self, key: Hashable, count: int, version: int) -> None:
+        with self._lock:
+            if version != self.version:
+                return
+            self._counts[key] = (count, time.monotonic())
+            self._counts.move_to_end(key)
+            while len(self._counts) > self.max_bodies:
+                self._counts.popitem(last=False)
+
+    # ------------------------------------------------------------------
+    # Introspection
+    # ------------------------------------------------------------------
+
+    def stats(self) -> dict:
+        entries = self._entries
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "size": len(entries) if entries is not None else 0,
+            "max_items": self.max_items,
+            "oversized": self._oversized,
+            "ttl_seconds": self.ttl_seconds,
+            "age_seconds": round(time.monotonic() - self._loaded_at, 3) if entries is not None else None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypasses": self.bypasses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "loads": self.loads,
+            "patches": self.patches,
+            "invalidations": self.invalidations,
+            "version": self.version,
+            "bodies": len(self._bodies),
+            "counts": len(self._counts),
+            "max_bodies": self.max_bodies,
+            "body_hits": self.body_hits,
+            "body_misses": self.body_misses,
+        }
+
+
+catalog_cache = CatalogCache(
+    max_items=settings.CATALOG_CACHE_MAX_ITEMS,
+    ttl_seconds=settings.CATALOG_CACHE_TTL_SECONDS,
+    enabled=settings.CATALOG_CACHE_ENABLED,
+    max_bodies=settings.CATALOG_RESPONSE_CACHE_MAX_ENTRIES,
+)
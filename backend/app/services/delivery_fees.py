@@ -0,0 +1,332 @@
+"""
+Delivery fee engine.
+
+Fees are priced from two tables an admin can edit at runtime:
+
+- ``delivery_zones``: which postcodes a zone covers, plus the surcharges
+  for the white glove / setup / mattress removal service flags
+- ``delivery_fee_rules``: per-zone rules by item (cart line) count and load volume
+
+Quoting must not touch the database, so each worker compiles the tables
+into an immutable ``FeeTable``:
+
+- exact postcodes and prefix patterns ("21*") go into a character trie;
+  a lookup walks the postcode once, remembering the deepest prefix match
+- numeric ranges ("2000-2099") are flattened into sorted, disjoint
+  segments searched with ``bisect`` (the narrowest range wins overlaps)
+- precedence: exact postcode, then range, then longest prefix, then "*"
+
+Hot reload: every ``DELIVERY_FEE_RELOAD_SECONDS`` a quote first checks a
+cheap signature (row counts and latest ``updated_at`` of both tables) and
+recompiles only if it changed, so edits made through any worker reach
+all of them without a restart. The worker that made the edit reloads
+immediately. The compiled table is swapped in as one reference, so
+readers never see a half-built table.
+"""
+
+import math
+import threading
+import time
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.delivery import DeliveryFeeRule, DeliveryZone
+
+CENT = Decimal("0.01")
+ZERO = Decimal("0")
+
+# Matches the old flat fee: $49, free from 3 cart lines. Surcharges match the
+# frontend's (useSaleTotals).
+DEFAULT_ZONE = {
+    "code": "default", "name": "Everywhere", "postcodes": "*",
+    "white_glove_fee": Decimal("150"), "setup_fee": Decimal("75"), "removal_fee": Decimal("50"),
+}
+DEFAULT_RULES = [
+    {"position": 1, "min_items": 3, "base_fee": Decimal("0")},
+    {"position": 2, "min_items": 0, "base_fee": Decimal("49")},
+]
+
+
+def normalize_postcode(postcode: str) -> str:
+    return "".join((postcode or "").split()).upper()
+
+
+def parse_patterns(spec: str) -> List[Tuple[str, object]]:
+    """
+    Parse a zone's postcode spec into ("exact" | "prefix" | "range", value).
+
+    Raises ValueError on a malformed pattern.
+    """
+    patterns: List[Tuple[str, object]] = []
+    for raw in (spec or "").split(","):
+        pattern = normalize_postcode(raw)
+        if not pattern:
+            continue
+        if "*" in pattern[:-1]:
+            raise ValueError(f"Only a trailing '*' is allowed: '{raw.strip()}'")
+        if pattern.endswith("*"):
+            patterns.append(("prefix", pattern[:-1]))
+        elif "-" in pattern:
+            low, _, high = pattern.partition("-")
+            if not (low.isdigit() and high.isdigit()) or int(low) > int(high):
+                raise ValueError(f"Invalid postcode range: '{raw.strip()}'")
+            patterns.append(("range", (int(low), int(high))))
+        else:
+            patterns.append(("exact", pattern))
+    return patterns
+
+
+@dataclass(frozen=True)
+class FeeRule:
+    min_items: int
+    max_items: Optional[int]
+    min_volume_l: int
+    max_volume_l: Optional[int]
+    base_fee: Decimal
+    per_item_fee: Decimal
+    per_100l_fee: Decimal
+
+    def matches(self, items: int, volume_l: int) -> bool:
+        return (
+            items >= self.min_items
+            and (self.max_items is None or items <= self.max_items)
+            and volume_l >= self.min_volume_l
+            and (self.max_volume_l is None or volume_l <= self.max_volume_l)
+        )
+
+    def price(self, items: int, volume_l: int) -> Decimal:
+        return self.base_fee + self.per_item_fee * items + self.per_100l_fee * math.ceil(volume_l / 100)
+
+
+@dataclass(frozen=True)
+class Zone:
+    code: str
+    name: str
+    white_glove_fee: Decimal
+    setup_fee: Decimal
+    removal_fee: Decimal
+    rules: Tuple[FeeRule, ...]
+
+
+@dataclass(frozen=True)
+class Quote:
+    postcode: str
+    zone: Optional[str]
+    deliverable: bool
+    fee: Decimal
+    base: Decimal = ZERO
+    surcharges: Decimal = ZERO
+    items: int = 0
+    volume_l: int = 0
+    reason: Optional[str] = None
+
+
+@dataclass
+class _TrieNode:
+    """One postcode character; zone codes stay out of the character map"""
+    children: Dict[str, "_TrieNode"] = field(default_factory=dict)
+    exact: Optional[str] = None
+    prefix: Optional[str] = None
+
+
+@dataclass
+class FeeTable:
+    """Compiled zones and postcode index; treat as immutable once built"""
+    zones: Dict[str, Zone] = field(default_factory=dict)
+    trie: _TrieNode = field(default_factory=_TrieNode)
+    range_starts: List[int] = field(default_factory=list)
+    range_segments: List[Tuple[int, int, str]] = field(default_factory=list)
+    fallback: Optional[str] = None
+
+    @classmethod
+    def build(cls, zones: Iterable[Tuple[Zone, str]]) -> "FeeTable":
+        """Compile (zone, postcode spec) pairs; earlier zones win exact ties"""
+        table = cls()
+        ranges: List[Tuple[int, int, str]] = []
+        for zone, spec in zones:
+            table.zones[zone.code] = zone
+            for kind, value in parse_patterns(spec):
+                if kind == "range":
+                    ranges.append((value[0], value[1], zone.code))
+                elif kind == "prefix" and value == "":
+                    table.fallback = table.fallback or zone.code
+                else:
+                    node = table.trie
+                    for char in value:
+                        node = node.children.setdefault(char, _TrieNode())
+                    if kind == "exact":
+                        node.exact = node.exact or zone.code
+                    else:
+                        node.prefix = node.prefix or zone.code
+        table._flatten(ranges)
+        return table
+
+    def _flatten(self, ranges: List[Tuple[int, int, str]]) -> None:
+        # Split the number line at every range boundary; each piece belongs
+        # to the narrowest range covering it
+        bounds = sorted({low for low, _, _ in ranges} | {high + 1 for _, high, _ in ranges})
+        segments: List[Tuple[int, int, str]] = []
+        for low, next_low in zip(bounds, bounds[1:]):
+            covering = [(high - lo, position, code)
+                        for position, (lo, high, code) in enumerate(ranges) if lo <= low and high >= next_low - 1]
+            if not covering:
+                continue
+            code = min(covering)[2]
+            if segments and segments[-1][2] == code and segments[-1][1] == low - 1:
+                segments[-1] = (segments[-1][0], next_low - 1, code)
+            else:
+                segments.append((low, next_low - 1, code))
+        self.range_segments = segments
+        self.range_starts = [low for low, _, _ in segments]
+
+    def zone_for(self, postcode: str) -> Optional[Zone]:
+        postcode = normalize_postcode(postcode)
+        node = self.trie
+        prefix_match = node.prefix
+        node_code = None
+        for char in postcode:
+            node = node.children.get(char)
+            if node is None:
+                break
+            prefix_match = node.prefix or prefix_match
+        else:
+            node_code = node.exact
+        if node_code is None and postcode.isdigit() and self.range_segments:
+            index = bisect_right(self.range_starts, int(postcode)) - 1
+            if index >= 0 and int(postcode) <= self.range_segments[index][1]:
+                node_code = self.range_segments[index][2]
+        code = node_code or prefix_match or self.fallback
+        return self.zones.get(code) if code else None
+
+    def quote(
+        self,
+        postcode: str,
+        items: int,
+        volume_l: int = 0,
+        white_glove: bool = False,
+        setup: bool = False,
+        removal: bool = False,
+    ) -> Quote:
+        zone = self.zone_for(postcode)
+        if zone is None:
+            return Quote(postcode, None, False, ZERO, items=items, volume_l=volume_l,
+                         reason="Postcode is outside the delivery area")
+        rule = next((r for r in zone.rules if r.matches(items, volume_l)), None)
+        if rule is None:
+            return Quote(postcode, zone.code, False, ZERO, items=items, volume_l=volume_l,
+                         reason="No delivery option for this order in the zone")
+        base = rule.price(items, volume_l)
+        surcharges = (
+            (zone.white_glove_fee if white_glove else ZERO)
+            + (zone.setup_fee if setup else ZERO)
+            + (zone.removal_fee if removal else ZERO)
+        )
+        return Quote(postcode, zone.code, True, (base + surcharges).quantize(CENT), base.quantize(CENT),
+                     surcharges.quantize(CENT), items, volume_l)
+
+
+def _zone_from_row(row: DeliveryZone) -> Zone:
+    return Zone(
+        code=row.code,
+        name=row.name,
+        white_glove_fee=Decimal(row.white_glove_fee),
+        setup_fee=Decimal(row.setup_fee),
+        removal_fee=Decimal(row.removal_fee),
+        rules=tuple(
+            FeeRule(r.min_items, r.max_items, r.min_volume_l, r.max_volume_l,
+                    Decimal(r.base_fee), Decimal(r.per_item_fee), Decimal(r.per_100l_fee))
+            for r in sorted(row.rules, key=lambda r: (r.position, r.id))
+        ),
+    )
+
+
+def load_table(db: Session) -> FeeTable:
+    zones = db.execute(
+        select(DeliveryZone).where(DeliveryZone.is_active == True).order_by(DeliveryZone.id)
+    ).scalars().all()
+    return FeeTable.build((_zone_from_row(zone), zone.postcodes) for zone in zones)
+
+
+def _signature(db: Session) -> tuple:
+    zones = db.execute(select(func.count(DeliveryZone.id), func.max(DeliveryZone.updated_at))).one()
+    rules = db.execute(select(func.count(DeliveryFeeRule.id), func.max(DeliveryFeeRule.updated_at))).one()
+    return tuple(zones) + tuple(rules)
+
+
+class FeeEngine:
+    """Per-process compiled fee table with signature-checked reloads"""
+
+    def __init__(self, reload_seconds: float):
+        self.reload_seconds = reload_seconds
+        self._lock = threading.Lock()
+        self._table: Optional[FeeTable] = None
+        self._signature: Optional[tuple] = None
+        self._checked_at = 0.0
+        self.loads = 0
+
+    def table(self, db: Session) -> FeeTable:
+        """The current table, reloaded first if the rule tables changed"""
+        table = self._table
+        if table is not None and time.monotonic() - self._checked_at < self.reload_seconds:
+            return table
+        with self._lock:
+            if self._table is not None and time.monotonic() - self._checked_at < self.reload_seconds:
+                return self._table
+            signature = _signature(db)
+            if self._table is None or signature != self._signature:
+                self._table = load_table(db)
+                self._signature = signature
+                self.loads += 1
+            self._checked_at = time.monotonic()
+            return self._table
+
+    def reload(self, db: Session) -> FeeTable:
+        """Recompile now (after an edit through this worker)"""
+        with self._lock:
+            self._checked_at = 0.0
+        return self.table(db)
+
+    def quote(self, db: Session, postcode: str, items: int, volume_l: int = 0, **flags: bool) -> Quote:
+        return self.table(db).quote(postcode, items, volume_l, **flags)
+
+
+fee_engine = FeeEngine(reload_seconds=settings.DELIVERY_FEE_RELOAD_SECONDS)
+
+
+def ensure_default_fee_rules(engine: Engine) -> None:
+    """Create the catch-all zone if no zones exist"""
+    with Session(engine) as db:
+        if db.execute(select(DeliveryZone.id).limit(1)).first() is None:
+            zone = DeliveryZone(**DEFAULT_ZONE)
+            zone.rules = [DeliveryFeeRule(**rule) for rule in DEFAULT_RULES]
+            db.add(zone)
+            db.commit()
+
+
+def cart_size(items: Iterable[Mapping]) -> Tuple[int, Dict[str, int]]:
+    """
+    (lines, units per SKU) for fee request items ({"sku", "qty"/"quantity"}).
+
+    Rules count cart lines, not units, as the old flat fee did
+    (``len(items) >= 3``); units only feed the volume estimate.
+    """
+    units: Dict[str, int] = {}
+    lines = 0
+    for item in items:
+        lines += 1
+        qty = item.get("qty", item.get("quantity", 1))
+        try:
+            qty = max(int(qty), 0)
+        except (TypeError, ValueError):
+            qty = 1
+        sku = item.get("sku")
+        if sku:
+            units[sku] = units.get(sku, 0) + qty
+    return lines, units
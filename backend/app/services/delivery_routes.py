@@ -0,0 +1,175 @@
+"""
+Route planning for a delivery day.
+
+Loads every non-cancelled sale delivering on the day, turns it into a
+routing stop and hands the lot to app/services/routing.py:
+
+- location: the customer's delivery address (billing address as a
+  fallback), looked up in the ``geocodes`` cache table. Nothing here calls
+  an external geocoder; coordinates are stored through PUT
+  /api/delivery/geocodes by whatever does the geocoding.
+- time window: the booked slot's time range ("8am-12pm"); unknown slots
+  get the whole shift
+- service time and load: what the sale booked in its slot (crew minutes,
+  litres), or the same estimate computed now for sales that never booked
+"""
+
+import hashlib
+import json
+import os
+import re
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.db import dialect_insert
+from app.models.delivery import DeliverySlot, Geocode
+from app.models.sale import Sale
+from app.services import delivery_slots
+from app.services.routing import RoutePlan, RoutingProblem, Stop, solve
+
+_TIME = re.compile(r"^\s*(\d{1,2})(?::(\d{2}))?\s*(am|pm)?\s*$", re.IGNORECASE)
+_ADDRESS_FIELDS = ("unit", "street", "street2", "city", "state", "zip")
+
+
+def parse_clock(value: str) -> Optional[int]:
+    """'8am', '12:30pm', '17:00' -> minutes after midnight"""
+    match = _TIME.match(value or "")
+    if not match:
+        return None
+    hours, minutes, meridiem = int(match.group(1)), int(match.group(2) or 0), (match.group(3) or "").lower()
+    if meridiem == "pm" and hours != 12:
+        hours += 12
+    elif meridiem == "am" and hours == 12:
+        hours = 0
+    if hours > 24 or minutes > 59:
+        return None
+    return hours * 60 + minutes
+
+
+def parse_time_range(value: Optional[str]) -> Optional[Tuple[int, int]]:
+    """'8am-12pm' -> (480, 720)"""
+    if not value or "-" not in value:
+        return None
+    opens, closes = (parse_clock(part) for part in value.split("-", 1))
+    if opens is None or closes is None or closes <= opens:
+        return None
+    return opens, closes
+
+
+def format_address(address: dict) -> str:
+    return ", ".join(str(address[f]).strip() for f in _ADDRESS_FIELDS if address.get(f))
+
+
+def address_key(address: dict) -> str:
+    """Cache key for an address: case, spacing and punctuation don't matter"""
+    normalized = " ".join(re.sub(r"[^\w]+", " ", format_address(address).lower()).split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def delivery_address(customer: dict) -> Optional[dict]:
+    address = customer.get("deliveryAddress") or customer.get("billingAddress")
+    return address if isinstance(address, dict) and address.get("street") else None
+
+
+def store_geocodes(db: Session, entries: Iterable[Tuple[dict, float, float]]) -> int:
+    """Upsert (address, lat, lon) entries into the cache and commit"""
+    rows: Dict[str, dict] = {}
+    for address, lat, lon in entries:
+        key = address_key(address)
+        rows[key] = {"address_key": key, "address": format_address(address), "lat": lat, "lon": lon,
+                     "updated_at": datetime.utcnow()}
+    if not rows:
+        return 0
+    stmt = dialect_insert(db)(Geocode)
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[Geocode.address_key],
+            set_={c: stmt.excluded[c] for c in ("address", "lat", "lon", "updated_at")},
+        ),
+        list(rows.values()),
+    )
+    db.commit()
+    return len(rows)
+
+
+def _shift_start() -> int:
+    start = parse_clock(settings.ROUTING_SHIFT_START)
+    return 7 * 60 + 30 if start is None else start
+
+
+def plan_day(
+    db: Session,
+    day: date,
+    vehicles: Optional[int] = None,
+    time_budget: Optional[float] = None,
+    workers: Optional[int] = None,
+) -> Tuple[RoutePlan, Dict[int, Sale]]:
+    """
+    Plan the routes for ``day``.
+
+    Args:
+        vehicles: Trucks on the road (default: the most any slot has)
+        time_budget: Local search seconds (default: ROUTING_TIME_BUDGET_SECONDS)
+        workers: Local search processes (default: ROUTING_WORKERS)
+
+    Returns:
+        The plan (stop ids are sale ids) and the sales by id
+    """
+    slots = {slot.code: slot for slot in delivery_slots.active_slots(db)}
+    if vehicles is None:
+        vehicles = max((slot.trucks for slot in slots.values()), default=1)
+    if workers is None:
+        workers = settings.ROUTING_WORKERS or os.cpu_count() or 1
+
+    sales = list(db.execute(
+        select(Sale).where(Sale.delivery_date == day, Sale.status != "cancelled").order_by(Sale.id)
+    ).scalars())
+    addresses = {sale.id: delivery_address(json.loads(sale.customer_json)) for sale in sales}
+    keys = {sale_id: address_key(a) for sale_id, a in addresses.items() if a}
+    coordinates = dict(
+        (row.address_key, (row.lat, row.lon))
+        for row in db.execute(
+            select(Geocode.address_key, Geocode.lat, Geocode.lon).where(Geocode.address_key.in_(set(keys.values())))
+        )
+    ) if keys else {}
+
+    shift = (_shift_start(), 24 * 60)
+    stops: List[Stop] = []
+    skipped: List[Tuple[int, str]] = []
+    for sale in sales:
+        if sale.id not in keys:
+            skipped.append((sale.id, "No delivery address"))
+            continue
+        location = coordinates.get(keys[sale.id])
+        if location is None:
+            skipped.append((sale.id, "Address not geocoded"))
+            continue
+        if sale.delivery_crew_minutes is not None:
+            minutes, volume = sale.delivery_crew_minutes, sale.delivery_volume_l or 0
+        else:
+            minutes, volume = delivery_slots.demand(db, sale)
+        slot: Optional[DeliverySlot] = slots.get(sale.delivery_time_slot)
+        window = (parse_time_range(slot.time_range) if slot else None) or shift
+        stops.append(Stop(id=sale.id, lat=location[0], lon=location[1],
+                          service_minutes=minutes, volume_l=volume, window=window))
+
+    problem = RoutingProblem(
+        depot=(settings.ROUTING_DEPOT_LAT, settings.ROUTING_DEPOT_LON),
+        stops=stops,
+        vehicles=vehicles,
+        capacity_l=settings.ROUTING_TRUCK_VOLUME_L,
+        shift_start=shift[0],
+        speed_kmh=settings.ROUTING_AVG_SPEED_KMH,
+        road_factor=settings.ROUTING_ROAD_FACTOR,
+    )
+    plan = solve(
+        problem,
+        time_budget=settings.ROUTING_TIME_BUDGET_SECONDS if time_budget is None else time_budget,
+        workers=workers,
+    )
+    plan.unassigned = skipped + plan.unassigned
+    return plan, {sale.id: sale for sale in sales}
@@ -0,0 +1,262 @@
+"""
+Delivery slot capacity.
+
+Each ``DeliverySlot`` (morning, afternoon, ...) has a daily capacity in
+orders (trucks x stops), crew minutes and load volume. A sale whose
+delivery names an ISO date and a defined slot code books its demand into
+``delivery_slot_occupancy`` for that (day, slot); the booked amounts are
+kept on the sale so later changes move exactly what was taken.
+
+Bookings use the same pattern as stock reservation: a conditional
+``UPDATE ... SET orders = orders + 1 ... WHERE orders + 1 <= :max AND ...``
+that the database evaluates under the row lock, in the sale's own
+transaction, so concurrent tills can't overbook a slot. Rows are touched
+in (day, slot) order so two orders swapping slots can't deadlock.
+
+Availability is read from the occupancy rows for the requested days (one
+primary-key range scan) and the slot definitions, never from sales.
+Sales with a free-text date or an unknown slot (e.g. "deliver later")
+book nothing.
+"""
+
+import json
+from collections import Counter, namedtuple
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from sqlalchemy import and_, delete, func, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.db import dialect_insert
+from app.models.delivery import DeliverySlot, DeliverySlotOccupancy
+from app.models.product import Product
+from app.models.sale import Sale
+
+# What one sale takes from a slot
+Booking = namedtuple("Booking", "day slot crew_minutes volume_l")
+
+DEFAULT_SLOTS = [
+    {"code": "morning", "label": "Morning", "time_range": "8am-12pm", "position": 1,
+     "trucks": 2, "stops_per_truck": 6, "crew_minutes": 480, "volume_l": 36000},
+    {"code": "afternoon", "label": "Afternoon", "time_range": "12pm-5pm", "position": 2,
+     "trucks": 2, "stops_per_truck": 7, "crew_minutes": 600, "volume_l": 36000},
+    {"code": "evening", "label": "Evening", "time_range": "5pm-8pm", "position": 3,
+     "trucks": 1, "stops_per_truck": 4, "crew_minutes": 180, "volume_l": 18000},
+]
+
+
+class SlotError(Exception):
+    """A booking didn't fit; the transaction should be rolled back"""
+
+    def __init__(self, day: date, slot: str, reason: str):
+        self.day = day
+        self.slot = slot
+        self.reason = reason
+        super().__init__(f"{day} {slot}: {reason}")
+
+
+def ensure_default_slots(engine: Engine) -> None:
+    """Create the default slot definitions if none exist"""
+    with Session(engine) as db:
+        if db.execute(select(DeliverySlot.id).limit(1)).first() is None:
+            db.add_all(DeliverySlot(**slot) for slot in DEFAULT_SLOTS)
+            db.commit()
+
+
+def active_slots(db: Session) -> List[DeliverySlot]:
+    return list(db.execute(
+        select(DeliverySlot).where(DeliverySlot.is_active == True).order_by(DeliverySlot.position, DeliverySlot.id)
+    ).scalars())
+
+
+def categories_for(db: Session, skus: Iterable[str]) -> Dict[str, Optional[str]]:
+    skus = set(skus)
+    if not skus:
+        return {}
+    return dict(db.execute(select(Product.sku, Product.category).where(Product.sku.in_(skus))).all())
+
+
+def load_volume_l(units: Mapping[str, int], categories: Mapping[str, Optional[str]]) -> int:
+    """Estimated load in litres for units per SKU, from their categories"""
+    return sum(
+        qty * settings.DELIVERY_CATEGORY_VOLUME_L.get(categories.get(sku), settings.DELIVERY_ITEM_VOLUME_L)
+        for sku, qty in units.items()
+    )
+
+
+def demand(db: Session, sale: Sale) -> Tuple[int, int]:
+    """(crew minutes, litres) a sale needs from its slot"""
+    delivery = json.loads(sale.delivery_json or "{}")
+    units = Counter()
+    for item in sale.items:
+        units[item.sku] += item.qty
+
+    minutes = settings.DELIVERY_BASE_MINUTES + settings.DELIVERY_MINUTES_PER_UNIT * sum(units.values())
+    if delivery.get("whiteGloveService"):
+        minutes += settings.DELIVERY_WHITE_GLOVE_MINUTES
+    if delivery.get("setupService"):
+        minutes += settings.DELIVERY_SETUP_MINUTES
+    if delivery.get("oldMattressRemoval"):
+        minutes += settings.DELIVERY_REMOVAL_MINUTES
+    return minutes, load_volume_l(units, categories_for(db, units))
+
+
+def booked(sale: Sale) -> Optional[Booking]:
+    """What the sale currently holds (take this before changing the sale)"""
+    if sale.delivery_crew_minutes is None or sale.delivery_date is None:
+        return None
+    return Booking(sale.delivery_date, sale.delivery_time_slot, sale.delivery_crew_minutes, sale.delivery_volume_l or 0)
+
+
+def plan(db: Session, sale: Sale) -> Optional[Booking]:
+    """What the sale should hold in its current state, if anything"""
+    if sale.status == "cancelled" or sale.delivery_date is None or not sale.delivery_time_slot:
+        return None
+    is_slot = db.execute(
+        select(DeliverySlot.id).where(DeliverySlot.code == sale.delivery_time_slot, DeliverySlot.is_active == True)
+    ).first()
+    if is_slot is None:
+        return None
+    minutes, volume = demand(db, sale)
+    return Booking(sale.delivery_date, sale.delivery_time_slot, minutes, volume)
+
+
+def _deltas(before: Optional[Booking], after: Optional[Booking]) -> Dict[Tuple[date, str], list]:
+    deltas: Dict[Tuple[date, str], list] = {}
+    for booking, sign in ((before, -1), (after, 1)):
+        if booking is None:
+            continue
+        delta = deltas.setdefault((booking.day, booking.slot), [0, 0, 0])
+        delta[0] += sign
+        delta[1] += sign * booking.crew_minutes
+        delta[2] += sign * booking.volume_l
+    return {key: d for key, d in deltas.items() if any(d)}
+
+
+def _apply(db: Session, day: date, slot_code: str, orders: int, minutes: int, volume: int) -> None:
+    occupancy = DeliverySlotOccupancy
+    if orders <= 0 and minutes <= 0 and volume <= 0:
+        # Giving capacity back never needs a guard
+        db.execute(
+            update(occupancy)
+            .where(occupancy.day == day, occupancy.slot_code == slot_code)
+            .values(
+                orders=occupancy.orders + orders,
+                crew_minutes=occupancy.crew_minutes + minutes,
+                volume_l=occupancy.volume_l + volume,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        return
+
+    slot = db.execute(select(DeliverySlot).where(DeliverySlot.code == slot_code)).scalar_one_or_none()
+    if slot is None or not slot.is_active:
+        raise SlotError(day, slot_code, "Unknown delivery slot")
+
+    db.execute(
+        dialect_insert(db)(occupancy)
+        .values(day=day, slot_code=slot_code, orders=0, crew_minutes=0, volume_l=0)
+        .on_conflict_do_nothing(index_elements=[occupancy.day, occupancy.slot_code])
+    )
+    # Only the dimensions that grow are checked against capacity
+    guards = []
+    if orders > 0:
+        guards.append(occupancy.orders + orders <= slot.max_orders)
+    if minutes > 0:
+        guards.append(occupancy.crew_minutes + minutes <= slot.crew_minutes)
+    if volume > 0:
+        guards.append(occupancy.volume_l + volume <= slot.volume_l)
+    row = db.execute(
+        update(occupancy)
+        .where(occupancy.day == day, occupancy.slot_code == slot_code, and_(*guards))
+        .values(
+            orders=occupancy.orders + orders,
+            crew_minutes=occupancy.crew_minutes + minutes,
+            volume_l=occupancy.volume_l + volume,
+        )
+        .returning(occupancy.orders)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if row is None:
+        raise SlotError(day, slot_code, "Delivery slot is full")
+
+
+def move(db: Session, sale: Sale, before: Optional[Booking], after: Optional[Booking]) -> None:
+    """
+    Change the sale's booking from ``before`` to ``after``, or raise SlotError.
+
+    Joins the caller's transaction (nothing is committed). Moving within
+    the same slot only checks the extra demand.
+    """
+    for (day, slot_code), (orders, minutes, volume) in sorted(_deltas(before, after).items()):
+        _apply(db, day, slot_code, orders, minutes, volume)
+    sale.delivery_crew_minutes = after.crew_minutes if after else None
+    sale.delivery_volume_l = after.volume_l if after else None
+
+
+def availability(db: Session, start: date, end: date) -> List[Tuple[date, List[Tuple[DeliverySlot, int, int, int]]]]:
+    """
+    Remaining capacity for every active slot on each day ``start``..``end``.
+
+    Returns:
+        [(day, [(slot, orders_left, crew_minutes_left, volume_l_left), ...]), ...]
+    """
+    slots = active_slots(db)
+    used = {
+        (row.day, row.slot_code): row
+        for row in db.execute(
+            select(DeliverySlotOccupancy).where(DeliverySlotOccupancy.day >= start, DeliverySlotOccupancy.day <= end)
+        ).scalars()
+    }
+    days = []
+    for offset in range((end - start).days + 1):
+        day = start + timedelta(days=offset)
+        remaining = []
+        for slot in slots:
+            row = used.get((day, slot.code))
+            remaining.append((
+                slot,
+                slot.max_orders - (row.orders if row else 0),
+                slot.crew_minutes - (row.crew_minutes if row else 0),
+                slot.volume_l - (row.volume_l if row else 0),
+            ))
+        days.append((day, remaining))
+    return days
+
+
+def capacity_label(slot: DeliverySlot, orders_left: int, minutes_left: int, volume_left: int) -> str:
+    """'available', 'few-left' or 'full' (the frontend's TimeSlot.capacity)"""
+    smallest_order = settings.DELIVERY_BASE_MINUTES + settings.DELIVERY_MINUTES_PER_UNIT
+    if orders_left <= 0 or minutes_left < smallest_order or volume_left <= 0:
+        return "full"
+    fraction = settings.DELIVERY_FEW_LEFT_FRACTION
+    if (orders_left < slot.max_orders * fraction
+            or minutes_left < slot.crew_minutes * fraction
+            or volume_left < slot.volume_l * fraction):
+        return "few-left"
+    return "available"
+
+
+def rebuild_occupancy(db: Session) -> int:
+    """Recompute the occupancy index from the sales' bookings, and commit"""
+    db.execute(delete(DeliverySlotOccupancy))
+    booked_sales = (
+        select(
+            Sale.delivery_date,
+            Sale.delivery_time_slot,
+            func.count(Sale.id),
+            func.sum(Sale.delivery_crew_minutes),
+            func.coalesce(func.sum(Sale.delivery_volume_l), 0),
+        )
+        .where(Sale.delivery_crew_minutes.is_not(None), Sale.delivery_date.is_not(None), Sale.status != "cancelled")
+        .group_by(Sale.delivery_date, Sale.delivery_time_slot)
+    )
+    count = db.execute(
+        DeliverySlotOccupancy.__table__.insert().from_select(
+            ["day", "slot_code", "orders", "crew_minutes", "volume_l"], booked_sales
+        )
+    ).rowcount
+    db.commit()
+    return count
@@ -0,0 +1,183 @@
+"""
+Streaming exports (NDJSON and CSV).
+
+Exports read through server-side cursors (``yield_per`` turns on
+``stream_results`` where the driver supports it) and encode rows into
+chunks of a few hundred lines, so memory is bounded by one chunk and one
+fetch partition whether the table has ten rows or ten million.
+
+Each export opens its own session: the generator keeps running after the
+endpoint has returned, so it can't borrow the request-scoped one.
+"""
+
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.models.product import Product
+from app.models.sale import Sale
+
+FORMATS = ("ndjson", "csv")
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+YIELD_PER = 1000
+LINES_PER_CHUNK = 500
+
+# Same columns the product importer reads, plus identity/timestamps, so an
+# export can be fed straight back into POST /products/import
+PRODUCT_CSV_COLUMNS = [
+    "sku", "name", "price", "category", "image", "stock_status", "stock_quantity",
+    "lead_time_days", "lead_time_text", "colors", "is_active", "id", "created_at", "updated_at",
+]
+
+SALE_CSV_COLUMNS = [
+    "sale_id", "order_number", "created_at", "status",
+    "customer_name", "customer_phone", "customer_email",
+    "delivery_date", "delivery_time_slot", "payment_method",
+    "subtotal", "delivery_fee", "discount", "total",
+    "item_id", "item_sku", "item_name", "item_qty", "item_price", "item_color",
+]
+
+
+def _json_default(value: Any):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def ndjson_chunks(records: Iterable[dict]) -> Iterator[bytes]:
+    """Encode dicts as newline-delimited JSON, several lines per chunk"""
+    lines: List[str] = []
+    for record in records:
+        lines.append(json.dumps(record, default=_json_default, separators=(",", ":")))
+        if len(lines) >= LINES_PER_CHUNK:
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+            lines.clear()
+    if lines:
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def csv_chunks(columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> Iterator[bytes]:
+    """Encode rows as CSV with a header line, several rows per chunk"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    count = 0
+    for row in rows:
+        writer.writerow(["" if v is None else v for v in row])
+        count += 1
+        if count >= LINES_PER_CHUNK:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+            count = 0
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _with_session(session_factory: sessionmaker, produce: Callable[[Session], Iterator[bytes]]) -> Iterator[bytes]:
+    db = session_factory()
+    try:
+        yield from produce(db)
+    finally:
+        db.close()
+
+
+def stream_products(session_factory: sessionmaker, fmt: str, to_read, active_only: bool = False) -> Iterator[bytes]:
+    """
+    Stream the products table ordered by id.
+
+    Args:
+        session_factory: Creates the export's own session
+        fmt: "ndjson" or "csv"
+        to_read: Product -> ProductRead converter (admin fields included)
+        active_only: Skip soft-deleted products
+    """
+    stmt = select(*Product.__table__.c).order_by(Product.id)
+    if active_only:
+        stmt = stmt.where(Product.is_active == True)
+
+    def produce(db: Session) -> Iterator[bytes]:
+        # Plain rows rather than ORM instances: nothing lands in the identity map
+        rows = db.execute(stmt.execution_options(yield_per=YIELD_PER))
+        records = (to_read(row, include_admin_fields=True).model_dump(mode="json") for row in rows)
+        if fmt == "ndjson":
+            yield from ndjson_chunks(records)
+        else:
+            yield from csv_chunks(PRODUCT_CSV_COLUMNS, (
+                [
+                    r["sku"], r["name"], r["price"], r["category"], r["image"],
+                    r["stock"]["status"], r["stock"]["quantity"],
+                    r["stock"]["leadTimeDays"], r["stock"]["leadTimeText"],
+                    json.dumps(r["colors"]) if r["colors"] is not None else None,
+                    r["is_active"], r["id"], r["created_at"], r["updated_at"],
+                ]
+                for r in records
+            ))
+
+    return _with_session(session_factory, produce)
+
+
+def stream_sales(
+    session_factory: sessionmaker,
+    fmt: str,
+    to_read,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+) -> Iterator[bytes]:
+    """
+    Stream sales (with their items) ordered by id.
+
+    NDJSON emits one SaleOrderRead per line; CSV emits one row per line
+    item with the sale's header columns repeated.
+
+    Args:
+        session_factory: Creates the export's own session
+        fmt: "ndjson" or "csv"
+        to_read: Sale -> SaleOrderRead converter
+        created_from: Include sales created at or after this time
+        created_to: Include sales created before this time
+    """
+    stmt = select(Sale).order_by(Sale.id)
+    if created_from is not None:
+        stmt = stmt.where(Sale.created_at >= created_from)
+    if created_to is not None:
+        stmt = stmt.where(Sale.created_at < created_to)
+
+    def produce(db: Session) -> Iterator[bytes]:
+        # Items are selectin-loaded once per partition, not once per sale
+        result = db.execute(stmt.execution_options(yield_per=YIELD_PER)).scalars()
+
+        def records() -> Iterator[dict]:
+            for partition in result.partitions():
+                for sale in partition:
+                    yield to_read(sale).model_dump(mode="json")
+                db.expunge_all()
+
+        if fmt == "ndjson":
+            yield from ndjson_chunks(records())
+        else:
+            yield from csv_chunks(SALE_CSV_COLUMNS, _sale_csv_rows(records()))
+
+    return _with_session(session_factory, produce)
+
+
+def _sale_csv_rows(records: Iterable[dict]) -> Iterator[list]:
+    for r in records:
+        customer, delivery, totals = r["customer"], r["delivery"], r["totals"]
+        name = customer.get("name") or f"{customer['firstName']} {customer['lastName']}"
+        header = [
+            r["id"], r["orderNumber"], r["createdAt"], r["status"],
+            name, customer["phone"], customer["email"],
+            delivery["preferredDate"], delivery["timeSlot"], r["payment"]["method"],
+            totals["subtotal"], totals["deliveryFee"], totals["discount"], totals["total"],
+        ]
+        if not r["items"]:
+            yield header + [None] * 6
+        for item in r["items"]:
+            yield header + [item["id"], item["sku"], item["name"], item["qty"], item["price"], item["color"]]
@@ -0,0 +1,276 @@
+"""
+Idempotency-Key handling for mutating endpoints.
+
+A till that times out waiting for POST /sales retries, and without this
+the retry creates a second sale. Clients send an ``Idempotency-Key``
+header (any unique string, e.g. a UUID per order); for the routes listed
+in IDEMPOTENCY_ROUTES the middleware:
+
+1. claims the key in ``idempotency_keys`` (an insert that does nothing if
+   the key exists), along with a hash of the method, path, query and body
+2. runs the request, then stores the status, headers and body bytes of a
+   2xx response for IDEMPOTENCY_TTL_SECONDS; any other response releases
+   the key so a retry runs again
+3. answers a retry of a finished key with the stored bytes (plus an
+   ``Idempotent-Replayed: true`` header) without running the endpoint
+
+A duplicate that arrives while the first request is still running waits
+for it (polling the row, up to IDEMPOTENCY_WAIT_SECONDS) instead of racing
+it; reusing a key for a different request is a 422. Requests without the
+header pass straight through.
+
+``locked_until`` is the first request's lease: if its process dies, the
+key can be taken over once the lease runs out. Expired rows are deleted
+by the next claim after IDEMPOTENCY_PURGE_SECONDS.
+"""
+
+import hashlib
+import json
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Tuple, Union
+
+import anyio
+from sqlalchemy import and_, delete, or_, select, update
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+
+from app.core.config import settings
+from app.core.db import SessionLocal, dialect_insert
+from app.models.idempotency import IdempotencyKey
+
+HEADER = b"idempotency-key"
+REPLAYED_HEADER = b"idempotent-replayed"
+MAX_KEY_LENGTH = 255
+
+# begin() outcomes besides a Stored response
+STARTED = "started"
+PENDING = "pending"
+MISMATCH = "mismatch"
+
+
+@dataclass
+class Stored:
+    status_code: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+
+
+def request_hash(method: str, path: str, query: bytes, body: bytes) -> str:
+    digest = hashlib.sha256()
+    for part in (method.encode(), path.encode(), query, body):
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+def _pending_values(fingerprint: str, now: datetime) -> dict:
+    return {
+        "request_hash": fingerprint,
+        "status": "pending",
+        "created_at": now,
+        "locked_until": now + timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS),
+        "expires_at": now + timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS),
+    }
+
+
+def begin(db: Session, key: str, fingerprint: str, now: Optional[datetime] = None) -> Union[str, Stored]:
+    """
+    Claim ``key`` for a request whose hash is ``fingerprint``. Commits.
+
+    Returns:
+        STARTED: the caller runs the request, then finish() or release()
+        a Stored response to replay
+        PENDING: another request holds the key
+        MISMATCH: the key was used for a different request
+    """
+    now = now or datetime.utcnow()
+    insert = dialect_insert(db)
+    claimed = db.execute(
+        insert(IdempotencyKey)
+        .values(key=key, **_pending_values(fingerprint, now))
+        .on_conflict_do_nothing(index_elements=["key"])
+    ).rowcount
+    if not claimed:
+        # Expired, or left pending by a request that died: take it over
+        claimed = db.execute(
+            update(IdempotencyKey)
+            .where(
+                IdempotencyKey.key == key,
+                or_(
+                    IdempotencyKey.expires_at <= now,
+                    and_(IdempotencyKey.status == "pending", IdempotencyKey.locked_until <= now),
+                ),
+            )
+            .values(status_code=None, headers_json=None, body=None, **_pending_values(fingerprint, now))
+            .execution_options(synchronize_session=False)
+        ).rowcount
+    if claimed:
+        db.commit()
+        return STARTED
+
+    row = db.execute(
+        select(
+            IdempotencyKey.request_hash, IdempotencyKey.status, IdempotencyKey.status_code,
+            IdempotencyKey.headers_json, IdempotencyKey.body,
+        ).where(IdempotencyKey.key == key)
+    ).one_or_none()
+    db.commit()
+    if row is None:
+        # Released between our insert and select; the caller tries again
+        return PENDING
+    if row.request_hash != fingerprint:
+        return MISMATCH
+    if row.status == "done":
+        headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in json.loads(row.headers_json)]
+        return Stored(row.status_code, headers, row.body)
+    return PENDING
+
+
+def finish(db: Session, key: str, response: Stored) -> None:
+    """Store the response for a key claimed with begin(). Commits."""
+    db.execute(
+        update(IdempotencyKey)
+        .where(IdempotencyKey.key == key, IdempotencyKey.status == "pending")
+        .values(
+            status="done",
+            status_code=response.status_code,
+            headers_json=json.dumps([(name.decode("latin-1"), value.decode("latin-1")) for name, value in response.headers]),
+            body=response.body,
+            locked_until=None,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+
+def release(db: Session, key: str) -> None:
+    """Give up a key claimed with begin() without storing anything. Commits."""
+    db.execute(
+        delete(IdempotencyKey)
+        .where(IdempotencyKey.key == key, IdempotencyKey.status == "pending")
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+
+def purge_expired(db: Session, now: Optional[datetime] = None) -> int:
+    """Delete expired keys; returns how many. Commits."""
+    deleted = db.execute(
+        delete(IdempotencyKey)
+        .where(IdempotencyKey.expires_at <= (now or datetime.utcnow()))
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    return deleted
+
+
+class IdempotencyMiddleware:
+    """ASGI middleware applying ``Idempotency-Key`` to ``routes`` ("METHOD /path")"""
+
+    def __init__(self, app, routes: Optional[Iterable[str]] = None, session_factory: sessionmaker = SessionLocal):
+        self.app = app
+        self.routes = {
+            tuple(route.split(" ", 1))
+            for route in (settings.IDEMPOTENCY_ROUTES if routes is None else routes)
+        }
+        self.session_factory = session_factory
+        self._next_purge = 0.0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or (scope["method"], scope["path"]) not in self.routes:
+            await self.app(scope, receive, send)
+            return
+        raw_key = next((value for name, value in scope["headers"] if name == HEADER), None)
+        if raw_key is None:
+            await self.app(scope, receive, send)
+            return
+        key = raw_key.decode("latin-1").strip()
+        if not 1 <= len(key) <= MAX_KEY_LENGTH:
+            await _error(scope, receive, send, 400, f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters")
+            return
+
+        body = await _read_body(receive)
+        fingerprint = request_hash(scope["method"], scope["path"], scope.get("query_string", b""), body)
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+        delay = 0.02
+        while True:
+            outcome = await run_in_threadpool(self._begin, key, fingerprint)
+            if outcome == STARTED:
+                break
+            if outcome == MISMATCH:
+                await _error(scope, receive, send, 422, "Idempotency-Key was already used for a different request")
+                return
+            if isinstance(outcome, Stored):
+                await send({
+                    "type": "http.response.start",
+                    "status": outcome.status_code,
+                    "headers": outcome.headers + [(REPLAYED_HEADER, b"true")],
+                })
+                await send({"type": "http.response.body", "body": outcome.body})
+                return
+            if time.monotonic() >= deadline:
+                await _error(scope, receive, send, 409, "A request with this Idempotency-Key is still in progress",
+                             headers={"Retry-After": "1"})
+                return
+            await anyio.sleep(delay)
+            delay = min(delay * 2, 0.25)
+
+        replayed = False
+
+        async def receive_body():
+            nonlocal replayed
+            if not replayed:
+                replayed = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        start = {}
+        chunks: List[bytes] = []
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                start.update(message)
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive_body, capture)
+        except BaseException:
+            await run_in_threadpool(self._with_session, release, key)
+            raise
+        if 200 <= start.get("status", 500) < 300:
+            stored = Stored(start["status"], list(start.get("headers", [])), b"".join(chunks))
+            await run_in_threadpool(self._with_session, finish, key, stored)
+        else:
+            await run_in_threadpool(self._with_session, release, key)
+
+    def _begin(self, key: str, fingerprint: str) -> Union[str, Stored]:
+        with self.session_factory() as db:
+            if time.monotonic() >= self._next_purge:
+                self._next_purge = time.monotonic() + settings.IDEMPOTENCY_PURGE_SECONDS
+                purge_expired(db)
+            return begin(db, key, fingerprint)
+
+    def _with_session(self, operation, *args) -> None:
+        with self.session_factory() as db:
+            operation(db, *args)
+
+
+async def _read_body(receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks)
+
+
+async def _error(scope, receive, send, status_code: int, detail: str, headers: Optional[dict] = None) -> None:
+    await JSONResponse({"detail": detail}, status_code=status_code, headers=headers)(scope, receive, send)
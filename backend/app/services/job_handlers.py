@@ -0,0 +1,67 @@
+"""
+Built-in background job kinds (see app/services/jobs.py).
+
+- ``reports.rebuild``: recompute the sales rollups; payload {"start", "end"}
+  (ISO dates, both optional)
+- ``delivery.slots.rebuild``: recompute slot occupancy from the sales
+- ``delivery.routes``: plan a day's routes; payload {"date", "trucks",
+  "time_budget"}. The result lists each truck's stops in order.
+"""
+
+from datetime import date
+from typing import Optional
+
+from app.services import delivery_routes, delivery_slots, reporting
+from app.services.jobs import JobContext, PermanentJobError, handler
+
+
+def _date(payload: dict, key: str, required: bool = False) -> Optional[date]:
+    value = payload.get(key)
+    if value is None:
+        if required:
+            raise PermanentJobError(f"'{key}' is required")
+        return None
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise PermanentJobError(f"'{key}' must be an ISO date, got {value!r}")
+
+
+@handler("reports.rebuild")
+def rebuild_rollups(ctx: JobContext) -> dict:
+    start, end = _date(ctx.payload, "start"), _date(ctx.payload, "end")
+    with ctx.session() as db:
+        days, sku_rows = reporting.rebuild(db, start, end)
+    return {"days": days, "skuRows": sku_rows}
+
+
+@handler("delivery.slots.rebuild")
+def rebuild_slot_occupancy(ctx: JobContext) -> dict:
+    with ctx.session() as db:
+        return {"slots": delivery_slots.rebuild_occupancy(db)}
+
+
+@handler("delivery.routes")
+def plan_routes(ctx: JobContext) -> dict:
+    day = _date(ctx.payload, "date", required=True)
+    ctx.progress(0.1, "Planning routes")
+    with ctx.session() as db:
+        plan, sales = delivery_routes.plan_day(
+            db, day, vehicles=ctx.payload.get("trucks"), time_budget=ctx.payload.get("time_budget")
+        )
+    return {
+        "date": day.isoformat(),
+        "routes": [
+            {
+                "truck": route.vehicle + 1,
+                "saleIds": [visit.stop.id for visit in route.visits],
+                "orderNumbers": [sales[visit.stop.id].order_number for visit in route.visits],
+                "distanceKm": round(route.distance_km, 2),
+                "lateStops": sum(1 for visit in route.visits if visit.late > 0),
+            }
+            for route in plan.routes
+        ],
+        "unassigned": [{"saleId": sale_id, "reason": reason} for sale_id, reason in plan.unassigned],
+        "distanceKm": round(sum(route.distance_km for route in plan.routes), 2),
+        "cost": round(plan.cost, 1),
+    }
@@ -0,0 +1,389 @@
+"""
+Background jobs.
+
+Slow work (rollup rebuilds, route planning, ...) is queued as a row in
+``jobs`` and run by a pool of worker threads instead of inside a request.
+Any number of pools (one per app process, plus ``python -m
+app.services.jobs`` processes) can share the table:
+
+- claiming is one statement, ``UPDATE jobs SET status = 'running' ...
+  WHERE id = (SELECT id ... ORDER BY run_at, id LIMIT 1 FOR UPDATE SKIP
+  LOCKED) RETURNING ...``. On PostgreSQL concurrent claimers skip each
+  other's locked rows instead of queueing behind them. SQLite has no row
+  locks (the FOR UPDATE clause is dropped when compiling); the UPDATE
+  takes the database write lock before its subquery reads, so claims are
+  serialized and each job still goes to exactly one worker.
+- a running job holds a lease (``locked_by``/``locked_at``), renewed by
+  every progress report. Leases older than ``JOB_LEASE_SECONDS`` (a worker
+  that died) are reclaimed: back to the queue, or failed if no attempts
+  are left.
+- a handler exception is retried with exponential back-off
+  (``JOB_RETRY_BASE_SECONDS * 2 ** (attempt - 1)``, capped at
+  ``JOB_RETRY_MAX_SECONDS``) until ``max_attempts``; raise
+  ``PermanentJobError`` to fail at once.
+- completion and failure only apply while the worker still holds the
+  lease, so a reclaimed job's original worker can't overwrite the rerun.
+
+Handlers are registered per kind with ``@handler("kind")`` and called
+with a ``JobContext``; their return value (JSON-serializable) becomes the
+job's result.
+"""
+
+import json
+import os
+import socket
+import threading
+import time
+import traceback
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import and_, func, select, update
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.config import settings
+from app.core.db import SessionLocal
+from app.models.job import Job
+
+STATUSES = ("queued", "running", "succeeded", "failed")
+
+_HANDLERS: Dict[str, Callable[["JobContext"], Any]] = {}
+
+
+class PermanentJobError(Exception):
+    """Raised by a handler for failures a retry can't fix"""
+
+
+def handler(kind: str):
+    """Register the decorated function as the handler for ``kind``"""
+    def register(fn: Callable[["JobContext"], Any]):
+        _HANDLERS[kind] = fn
+        return fn
+    return register
+
+
+def kinds() -> List[str]:
+    return sorted(_HANDLERS)
+
+
+def backoff_seconds(attempt: int, base: Optional[float] = None, cap: Optional[float] = None) -> float:
+    """Delay before retrying after failed attempt number ``attempt`` (1-based)"""
+    base = settings.JOB_RETRY_BASE_SECONDS if base is None else base
+    cap = settings.JOB_RETRY_MAX_SECONDS if cap is None else cap
+    return min(cap, base * 2 ** max(attempt - 1, 0))
+
+
+def enqueue(
+    db: Session,
+    kind: str,
+    payload: Optional[dict] = None,
+    max_attempts: Optional[int] = None,
+    run_at: Optional[datetime] = None,
+) -> Job:
+    """Add a job to the caller's transaction (visible to workers once committed)"""
+    if kind not in _HANDLERS:
+        raise ValueError(f"Unknown job kind '{kind}'")
+    now = datetime.utcnow()
+    job = Job(
+        kind=kind,
+        status="queued",
+        payload_json=json.dumps(payload or {}),
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+        run_at=run_at or now,
+        created_at=now,
+    )
+    db.add(job)
+    return job
+
+
+@dataclass
+class Claimed:
+    id: int
+    kind: str
+    payload: dict
+    attempt: int
+    max_attempts: int
+
+
+def claim(db: Session, worker: str) -> Optional[Claimed]:
+    """Take the next due job for ``worker`` and commit, or return None"""
+    now = datetime.utcnow()
+    due = (
+        select(Job.id)
+        .where(Job.status == "queued", Job.run_at <= now)
+        .order_by(Job.run_at, Job.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    row = db.execute(
+        update(Job)
+        .where(Job.id == due, Job.status == "queued")
+        .values(
+            status="running",
+            locked_by=worker,
+            locked_at=now,
+            attempts=Job.attempts + 1,
+            started_at=func.coalesce(Job.started_at, now),
+        )
+        .returning(Job.id, Job.kind, Job.payload_json, Job.attempts, Job.max_attempts)
+        .execution_options(synchronize_session=False)
+    ).first()
+    db.commit()
+    if row is None:
+        return None
+    return Claimed(row.id, row.kind, json.loads(row.payload_json or "{}"), row.attempts, row.max_attempts)
+
+
+def _held(job_id: int, worker: str):
+    return and_(Job.id == job_id, Job.status == "running", Job.locked_by == worker)
+
+
+def complete(db: Session, job_id: int, worker: str, result: Any) -> bool:
+    """Mark a job succeeded; False if the worker had lost its lease"""
+    now = datetime.utcnow()
+    updated = db.execute(
+        update(Job)
+        .where(_held(job_id, worker))
+        .values(status="succeeded", result_json=json.dumps(result, default=str), error=None,
+                progress=1.0, finished_at=now, locked_by=None, locked_at=None)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    return updated == 1
+
+
+def fail(db: Session, claimed: Claimed, worker: str, error: str, permanent: bool = False) -> Optional[str]:
+    """
+    Record a failed attempt: requeue with back-off, or fail for good.
+
+    Returns the new status ("queued" or "failed"), or None if the worker
+    had lost its lease.
+    """
+    now = datetime.utcnow()
+    if permanent or claimed.attempt >= claimed.max_attempts:
+        values = {"status": "failed", "finished_at": now}
+    else:
+        values = {"status": "queued", "run_at": now + timedelta(seconds=backoff_seconds(claimed.attempt))}
+    updated = db.execute(
+        update(Job)
+        .where(_held(claimed.id, worker))
+        .values(error=error[:4000], locked_by=None, locked_at=None, **values)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    return values["status"] if updated == 1 else None
+
+
+def reclaim_stale(db: Session, lease_seconds: Optional[float] = None) -> int:
+    """Requeue (or fail) running jobs whose lease expired; returns how many"""
+    lease_seconds = settings.JOB_LEASE_SECONDS if lease_seconds is None else lease_seconds
+    now = datetime.utcnow()
+    stale = and_(Job.status == "running", Job.locked_at < now - timedelta(seconds=lease_seconds))
+    released = dict(locked_by=None, locked_at=None, error="Worker lease expired")
+    count = db.execute(
+        update(Job).where(stale, Job.attempts < Job.max_attempts)
+        .values(status="queued", run_at=now, **released)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    count += db.execute(
+        update(Job).where(stale, Job.attempts >= Job.max_attempts)
+        .values(status="failed", finished_at=now, **released)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    return count
+
+
+class JobContext:
+    """What a handler gets: the payload, sessions, and progress reporting"""
+
+    def __init__(self, claimed: Claimed, worker: str, session_factory: sessionmaker):
+        self.job_id = claimed.id
+        self.kind = claimed.kind
+        self.payload = claimed.payload
+        self.attempt = claimed.attempt
+        self.worker = worker
+        self.session = session_factory
+
+    def progress(self, fraction: float, message: Optional[str] = None) -> None:
+        """Report progress (0..1); also renews the worker's lease"""
+        with self.session() as db:
+            db.execute(
+                update(Job)
+                .where(_held(self.job_id, self.worker))
+                .values(progress=min(max(fraction, 0.0), 1.0), progress_message=message,
+                        locked_at=datetime.utcnow())
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+
+
+class WorkerPool:
+    """
+    Threads that claim and run jobs until stopped.
+
+    Counters (``stats()``) make throughput and retry behaviour measurable.
+    """
+
+    def __init__(
+        self,
+        session_factory: sessionmaker,
+        workers: int,
+        poll_seconds: Optional[float] = None,
+        lease_seconds: Optional[float] = None,
+        name: Optional[str] = None,
+    ):
+        self.session_factory = session_factory
+        self.workers = workers
+        self.poll_seconds = settings.JOB_POLL_SECONDS if poll_seconds is None else poll_seconds
+        self.lease_seconds = settings.JOB_LEASE_SECONDS if lease_seconds is None else lease_seconds
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._last_reclaim = 0.0
+        self.started_at: Optional[float] = None
+
+        self.claimed = 0
+        self.succeeded = 0
+        self.retried = 0
+        self.failed = 0
+        self.lost = 0
+        self.reclaimed = 0
+        self.busy_seconds = 0.0
+
+    def _count(self, **increments) -> None:
+        with self._lock:
+            for counter, amount in increments.items():
+                setattr(self, counter, getattr(self, counter) + amount)
+
+    def run_once(self, worker: Optional[str] = None) -> bool:
+        """Claim and run one job in the calling thread; False if none was due"""
+        worker = worker or f"{self.name}/{threading.current_thread().name}"
+        with self.session_factory() as db:
+            claimed = claim(db, worker)
+        if claimed is None:
+            return False
+
+        started = time.perf_counter()
+        self._count(claimed=1)
+        outcome = None
+        try:
+            fn = _HANDLERS.get(claimed.kind)
+            if fn is None:
+                raise PermanentJobError(f"No handler for job kind '{claimed.kind}'")
+            result = fn(JobContext(claimed, worker, self.session_factory))
+        except Exception as exc:
+            error = "".join(traceback.format_exception_only(type(exc), exc)).strip()
+            with self.session_factory() as db:
+                outcome = fail(db, claimed, worker, error, permanent=isinstance(exc, PermanentJobError))
+            self._count(retried=outcome == "queued", failed=outcome == "failed")
+        else:
+            with self.session_factory() as db:
+                outcome = "succeeded" if complete(db, claimed.id, worker, result) else None
+            self._count(succeeded=outcome == "succeeded")
+        if outcome is None:
+            self._count(lost=1)
+        self._count(busy_seconds=time.perf_counter() - started)
+        return True
+
+    def _reclaim_if_due(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            # One reclaim per pool every few polls is plenty
+            if now - self._last_reclaim < max(self.poll_seconds * 10, 1.0):
+                return
+            self._last_reclaim = now
+        with self.session_factory() as db:
+            self._count(reclaimed=reclaim_stale(db, self.lease_seconds))
+
+    def _loop(self, index: int) -> None:
+        worker = f"{self.name}/{index}"
+        while not self._stop.is_set():
+            try:
+                self._reclaim_if_due()
+                ran = self.run_once(worker)
+            except Exception:
+                # Database unavailable or similar: back off and try again
+                traceback.print_exc()
+                ran = False
+            if not ran:
+                self._stop.wait(self.poll_seconds)
+
+    def start(self) -> None:
+        if self._threads or self.workers <= 0:
+            return
+        self._stop.clear()
+        self.started_at = time.monotonic()
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._loop, args=(index,), name=f"job-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop claiming; waits for running jobs to finish (up to ``timeout``)"""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def drain(self, timeout: float = 60.0) -> int:
+        """Run due jobs in the calling thread until none are left; returns how many ran"""
+        ran = 0
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline and self.run_once():
+            ran += 1
+        return ran
+
+    def stats(self) -> dict:
+        elapsed = time.monotonic() - self.started_at if self.started_at else None
+        with self._lock:
+            return {
+                "name": self.name,
+                "workers": self.workers,
+                "running": bool(self._threads),
+                "claimed": self.claimed,
+                "succeeded": self.succeeded,
+                "retried": self.retried,
+                "failed": self.failed,
+                "lost": self.lost,
+                "reclaimed": self.reclaimed,
+                "busy_seconds": round(self.busy_seconds, 3),
+                "uptime_seconds": round(elapsed, 3) if elapsed is not None else None,
+                "jobs_per_second": round(self.claimed / elapsed, 3) if elapsed else None,
+            }
+
+
+# This process's pool, started with the app when JOB_WORKERS > 0
+worker_pool = WorkerPool(SessionLocal, workers=settings.JOB_WORKERS)
+
+
+def queue_counts(db: Session) -> Dict[str, int]:
+    counts = dict(db.execute(select(Job.status, func.count(Job.id)).group_by(Job.status)).all())
+    return {status: counts.get(status, 0) for status in STATUSES}
+
+
+def main() -> None:
+    """Run a standalone worker process: python -m app.services.jobs [workers]"""
+    import sys
+
+    # Under ``-m`` this file is __main__; use the importable module, which
+    # is the registry the built-in handlers register with
+    from app.services import job_handlers, jobs  # noqa: F401
+
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else max(settings.JOB_WORKERS, 1)
+    pool = jobs.WorkerPool(SessionLocal, workers)
+    pool.start()
+    print(f"Job workers running: {workers} ({', '.join(jobs.kinds())})")
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        pool.stop()
+
+
+if __name__ == "__main__":
+    main()
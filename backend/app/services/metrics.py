@@ -0,0 +1,315 @@
+"""
+Request and database instrumentation, exposed at GET /metrics in the
+Prometheus text format (no client library needed).
+
+- ``MetricsMiddleware`` (ASGI): requests in flight, and per-route counts
+  and latency histograms labelled with the route template
+  (``/api/sales/{order_id}``), so ids don't explode the label space
+- ``before/after_cursor_execute`` listeners: statement counts and
+  durations by kind (SELECT/INSERT/...), plus each request's query count
+  and DB time, which is where N+1 loads show up. Statements longer than
+  SLOW_QUERY_LOG_SECONDS are logged to ``app.sql.slow``
+- pool: how long checkouts wait for a connection, timeouts, and the
+  connections checked out at scrape time
+
+Per-request numbers are collected through a context variable set by the
+middleware; starlette copies the context into the threadpool that runs
+sync endpoints, and queries outside a request (background jobs) only
+count towards the global totals.
+"""
+
+import bisect
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+slow_log = logging.getLogger("app.sql.slow")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+STATEMENT_KINDS = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH"}
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}", *self._samples()]
+
+    def _samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def _samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_labels(self.label_names, key)} {_number(value)}" for key, value in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+
+class CallbackGauge(_Metric):
+    """A gauge read at scrape time: ``read()`` returns {label values: value}"""
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str], read: Callable[[], Dict[Tuple[str, ...], float]]):
+        super().__init__(name, help, labels)
+        self.read = read
+
+    def _samples(self):
+        return [f"{self.name}{_labels(self.label_names, key)} {_number(value)}" for key, value in sorted(self.read().items())]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (+Inf last), sum]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def count(self, *labels: str) -> int:
+        entry = self._values.get(labels)
+        return sum(entry[0]) if entry else 0
+
+    def _samples(self):
+        with self._lock:
+            items = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        lines = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = 'le="%s"' % _number(bound)
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def add(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(line for metric in self._metrics for line in metric.render()) + "\n"
+
+
+registry = Registry()
+
+requests_total = registry.add(Counter(
+    "http_requests_total", "HTTP requests by route template and status", ("method", "route", "status")))
+request_seconds = registry.add(Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ("method", "route")))
+requests_in_flight = registry.add(Gauge(
+    "http_requests_in_flight", "HTTP requests being handled", ("method",)))
+request_queries = registry.add(Histogram(
+    "http_request_db_queries", "SQL statements executed per request", ("method", "route"), QUERY_COUNT_BUCKETS))
+request_db_seconds = registry.add(Histogram(
+    "http_request_db_seconds", "Time spent in SQL statements per request", ("method", "route")))
+
+queries_total = registry.add(Counter(
+    "db_queries_total", "SQL statements executed, by kind", ("kind",)))
+query_seconds = registry.add(Histogram(
+    "db_query_duration_seconds", "SQL statement duration, by kind", ("kind",)))
+slow_queries_total = registry.add(Counter(
+    "db_slow_queries_total", "SQL statements slower than SLOW_QUERY_LOG_SECONDS"))
+pool_wait_seconds = registry.add(Histogram(
+    "db_pool_checkout_wait_seconds", "Time waiting for a pooled connection", ("engine",)))
+pool_timeouts_total = registry.add(Counter(
+    "db_pool_timeouts_total", "Checkouts that gave up after DB_POOL_TIMEOUT", ("engine",)))
+
+_engines: Dict[str, Engine] = {}
+
+
+def _pool_state() -> Dict[Tuple[str, ...], float]:
+    state = {}
+    for name, engine in list(_engines.items()):
+        pool = engine.pool
+        for field in ("checkedout", "checkedin", "size"):
+            reader = getattr(pool, field, None)
+            if reader is not None:
+                state[(name, field)] = reader()
+    return state
+
+
+registry.add(CallbackGauge("db_pool_connections", "Pool state at scrape time", ("engine", "state"), _pool_state))
+
+
+@dataclass
+class RequestStats:
+    queries: int = 0
+    db_seconds: float = 0.0
+
+
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+def _statement_kind(statement: str) -> str:
+    words = statement.lstrip()[:7].split(None, 1)
+    word = words[0].upper() if words else ""
+    return word if word in STATEMENT_KINDS else "OTHER"
+
+
+def instrument_engine(engine: Engine, name: str = "default") -> None:
+    """Attach query and pool instrumentation to a sync engine (or an async engine's ``sync_engine``)"""
+    if name in _engines:
+        return
+    _engines[name] = engine
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["metrics_started"].pop()
+        kind = _statement_kind(statement)
+        queries_total.inc(kind)
+        query_seconds.observe(elapsed, kind)
+        stats = current_request.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_seconds += elapsed
+        threshold = settings.SLOW_QUERY_LOG_SECONDS
+        if threshold is not None and elapsed >= threshold:
+            slow_queries_total.inc()
+            slow_log.warning("%.1fms %s", elapsed * 1000, " ".join(statement.split())[:2000])
+
+    @event.listens_for(engine, "handle_error")
+    def _failed(context):
+        # after_cursor_execute doesn't run for a failed statement
+        started = context.connection.info.get("metrics_started") if context.connection is not None else None
+        if started:
+            started.pop()
+
+    # The pool has no "waiting for a connection" event, so time the pool's
+    # own get. engine.dispose() swaps in a new pool, so it's wrapped again
+    # on the next connect.
+    def _wrap(pool) -> None:
+        if getattr(pool, "_metrics_wrapped", False):
+            return
+        do_get = pool._do_get
+
+        def timed_get():
+            started = time.perf_counter()
+            try:
+                return do_get()
+            except exc.TimeoutError:
+                pool_timeouts_total.inc(name)
+                raise
+            finally:
+                pool_wait_seconds.observe(time.perf_counter() - started, name)
+
+        pool._do_get = timed_get
+        pool._metrics_wrapped = True
+
+    _wrap(engine.pool)
+
+    @event.listens_for(engine, "engine_connect")
+    def _rewrap(conn):
+        _wrap(conn.engine.pool)
+
+
+def _route_label(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request counts, latency and per-request DB use"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        status = [500]
+
+        async def record_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+        requests_in_flight.inc(method)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, record_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            requests_in_flight.dec(method)
+            current_request.reset(token)
+            route = _route_label(scope)
+            requests_total.inc(method, route, str(status[0]))
+            request_seconds.observe(elapsed, method, route)
+            request_queries.observe(stats.queries, method, route)
+            request_db_seconds.observe(stats.db_seconds, method, route)
@@ -0,0 +1,158 @@
+"""
+Order number allocation.
+
+``SELECT max(order_number) + 1`` races under concurrent ``create_order``
+calls (both tills read the same max and one insert hits the unique index)
+and gets slower as the sales table grows. Instead each worker process
+reserves a block of numbers at a time and hands them out from memory:
+
+- PostgreSQL: a native sequence whose INCREMENT is the block size, so one
+  ``nextval()`` reserves a whole block
+- SQLite (and anything else): a counter row in ``order_number_counters``
+  bumped with ``UPDATE ... RETURNING`` in its own short transaction
+
+Block reservation is committed independently of the order's transaction,
+so a rolled-back order leaves a gap rather than holding a lock. Numbers are
+unique but only increasing within a worker; with several workers they
+interleave.
+"""
+
+import threading
+from typing import List, Optional, Tuple
+
+from sqlalchemy import select, text, update
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.sale import OrderNumberCounter, Sale
+
+SEQUENCE_NAME = "sale_order_number_seq"
+COUNTER_NAME = "sales"
+
+
+def _max_order_number(conn: Connection) -> int:
+    return conn.execute(select(Sale.order_number).order_by(Sale.order_number.desc()).limit(1)).scalar() or 0
+
+
+def _ensure_sequence(engine: Engine, block_size: int) -> int:
+    """Create the PostgreSQL sequence if needed; returns its actual increment"""
+    with engine.begin() as conn:
+        exists = conn.execute(text("SELECT to_regclass(:name)"), {"name": SEQUENCE_NAME}).scalar()
+        if not exists:
+            start = _max_order_number(conn) + 1
+            conn.execute(text(
+                f"CREATE SEQUENCE IF NOT EXISTS {SEQUENCE_NAME} "
+                f"START WITH {start} INCREMENT BY {block_size} MINVALUE 1"
+            ))
+        # An existing sequence keeps the increment it was created with;
+        # using anything else would hand out overlapping blocks
+        return conn.execute(
+            text("SELECT increment_by FROM pg_sequences WHERE sequencename = :name"),
+            {"name": SEQUENCE_NAME},
+        ).scalar()
+
+
+def _ensure_counter(engine: Engine) -> None:
+    """Create the counter row, seeded from the current max order number"""
+    with engine.begin() as conn:
+        exists = conn.execute(
+            select(OrderNumberCounter.name).where(OrderNumberCounter.name == COUNTER_NAME)
+        ).first()
+        if exists:
+            return
+    try:
+        with engine.begin() as conn:
+            conn.execute(OrderNumberCounter.__table__.insert().values(
+                name=COUNTER_NAME, next_value=_max_order_number(conn) + 1
+            ))
+    except IntegrityError:
+        # Another worker created it first
+        pass
+
+
+class OrderNumberAllocator:
+    """
+    Hands out order numbers from per-process blocks.
+
+    Thread-safe; one instance per worker process.
+    """
+
+    def __init__(self, block_size: int):
+        self.block_size = max(1, block_size)
+        self._lock = threading.Lock()
+        self._next = 0
+        self._end = 0
+        self._backend: Optional[str] = None
+        self._sequence_step = self.block_size
+        self.blocks_reserved = 0
+
+    def _prepare(self, engine: Engine) -> None:
+        if engine.dialect.name == "postgresql":
+            self._sequence_step = _ensure_sequence(engine, self.block_size)
+            self._backend = "sequence"
+        else:
+            _ensure_counter(engine)
+            self._backend = "counter"
+
+    def _reserve_block(self, engine: Engine, size: int) -> Tuple[int, int]:
+        """Reserve at least ``size`` numbers; returns [start, end)"""
+        if self._backend is None:
+            self._prepare(engine)
+
+        if self._backend == "sequence":
+            # Each nextval() owns [value, value + step); take enough of them
+            calls = -(-size // self._sequence_step)
+            with engine.begin() as conn:
+                values = conn.execute(
+                    text(f"SELECT nextval('{SEQUENCE_NAME}') FROM generate_series(1, :n)"),
+                    {"n": calls},
+                ).scalars().all()
+            values.sort()
+            # Consecutive values are contiguous unless another worker got in
+            # between; keep only the first run so the block stays contiguous
+            start = values[0]
+            end = start + self._sequence_step
+            for value in values[1:]:
+                if value != end:
+                    break
+                end += self._sequence_step
+            return start, end
+
+        size = max(size, self.block_size)
+        with engine.begin() as conn:
+            end = conn.execute(
+                update(OrderNumberCounter)
+                .where(OrderNumberCounter.name == COUNTER_NAME)
+                .values(next_value=OrderNumberCounter.next_value + size)
+                .returning(OrderNumberCounter.next_value)
+            ).scalar_one()
+        return end - size, end
+
+    def allocate(self, db: Session, count: int = 1) -> List[int]:
+        """
+        Return ``count`` unique order numbers.
+
+        Args:
+            db: Any session bound to the application database (only its
+                engine is used; nothing is added to its transaction)
+            count: How many numbers are needed
+        """
+        engine = db.get_bind()
+        numbers: List[int] = []
+        with self._lock:
+            while len(numbers) < count:
+                if self._next >= self._end:
+                    self._next, self._end = self._reserve_block(engine, count - len(numbers))
+                    self.blocks_reserved += 1
+                take = min(count - len(numbers), self._end - self._next)
+                numbers.extend(range(self._next, self._next + take))
+                self._next += take
+        return numbers
+
+    def next(self, db: Session) -> int:
+        return self.allocate(db, 1)[0]
+
+
+allocator = OrderNumberAllocator(block_size=settings.ORDER_NUMBER_BLOCK_SIZE)
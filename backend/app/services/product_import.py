@@ -0,0 +1,197 @@
+"""
+Bulk product import (CSV and JSON Lines).
+
+Supplier price/stock files are streamed row by row, validated against
+``ProductCreate`` and written in batches of
+``INSERT ... ON CONFLICT (sku) DO UPDATE``. Only one batch is held in memory
+at a time and each batch is committed on its own, so memory stays flat no
+matter how large the file is; a failure part-way through leaves earlier
+batches imported and is reported like any other row error.
+
+CSV files use the ``ProductCreate`` field names as headers. ``colors`` is a
+JSON array in a single cell; empty cells mean "not set".
+"""
+
+import csv
+import io
+import json
+import time
+from typing import IO, Dict, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.db import dialect_insert
+from app.models.product import Product
+from app.schemas.product import ProductCreate, ProductImportError, ProductImportReport
+from app.services.catalog_cache import catalog_cache
+
+FORMATS = ("csv", "jsonl")
+
+# Columns rewritten when a SKU already exists (everything but identity/created_at)
+_UPDATE_COLUMNS = (
+    "name", "price", "category", "image", "stock_status", "stock_quantity",
+    "lead_time_days", "lead_time_text", "colors_json", "is_active", "updated_at",
+)
+
+
+def _upsert_statement(db: Session):
+    stmt = dialect_insert(db)(Product)
+    return stmt.on_conflict_do_update(
+        index_elements=[Product.sku],
+        set_={column: stmt.excluded[column] for column in _UPDATE_COLUMNS},
+    )
+
+
+def iter_rows(stream: IO[str], fmt: str) -> Iterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """
+    Yield (row_number, row, parse_error) for each record in the file.
+
+    Row numbers are 1-based data rows (the CSV header is not counted).
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for number, raw in enumerate(reader, start=1):
+            row = {k.strip(): v.strip() for k, v in raw.items() if k and v is not None and v.strip() != ""}
+            if "colors" in row:
+                try:
+                    row["colors"] = json.loads(row["colors"])
+                except json.JSONDecodeError:
+                    yield number, None, "colors: not a valid JSON array"
+                    continue
+            yield number, row, None
+    elif fmt == "jsonl":
+        number = 0
+        for line in stream:
+            if not line.strip():
+                continue
+            number += 1
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as exc:
+                yield number, None, f"invalid JSON: {exc.msg}"
+                continue
+            if not isinstance(row, dict):
+                yield number, None, "expected a JSON object"
+                continue
+            yield number, row, None
+    else:
+        raise ValueError(f"Unsupported import format '{fmt}' (expected one of {', '.join(FORMATS)})")
+
+
+def _to_db_row(product: ProductCreate) -> dict:
+    # Same column mapping as create_product
+    data = product.model_dump(exclude={"colors"})
+    data["colors_json"] = json.dumps([c.model_dump() for c in product.colors]) if product.colors else None
+    return data
+
+
+def _format_validation_error(exc: ValidationError) -> List[str]:
+    return [f"{'.'.join(str(p) for p in e['loc']) or 'row'}: {e['msg']}" for e in exc.errors()]
+
+
+def import_products(
+    db: Session,
+    stream: IO[str],
+    fmt: str,
+    batch_size: Optional[int] = None,
+    max_errors: Optional[int] = None,
+) -> ProductImportReport:
+    """
+    Validate and upsert every product in ``stream``.
+
+    Args:
+        db: Session used for the batched upserts (committed per batch)
+        stream: Text stream of CSV or JSON Lines
+        fmt: "csv" or "jsonl"
+        batch_size: Rows per INSERT ... ON CONFLICT statement
+        max_errors: Stop listing individual errors after this many
+            (they are still counted)
+
+    Returns:
+        Counts, per-row errors and throughput
+    """
+    batch_size = batch_size or settings.PRODUCT_IMPORT_BATCH_SIZE
+    max_errors = settings.PRODUCT_IMPORT_MAX_ERRORS if max_errors is None else max_errors
+    stmt = _upsert_statement(db)
+
+    started = time.perf_counter()
+    rows_read = rows_valid = upserted = error_count = batches = 0
+    errors: List[ProductImportError] = []
+    # Keyed by SKU: a repeated SKU within one batch keeps its last row, since
+    # a single ON CONFLICT statement may not touch the same row twice
+    batch: Dict[str, dict] = {}
+    batch_rows: Dict[str, int] = {}
+
+    def record(row_number: int, sku: Optional[str], messages: List[str]) -> None:
+        nonlocal error_count
+        error_count += 1
+        if len(errors) < max_errors:
+            errors.append(ProductImportError(row=row_number, sku=sku, errors=messages))
+
+    def flush() -> None:
+        nonlocal upserted, batches
+        if not batch:
+            return
+        try:
+            db.execute(stmt, list(batch.values()))
+            db.commit()
+            upserted += len(batch)
+            batches += 1
+        except Exception as exc:
+            db.rollback()
+            first = min(batch_rows.values())
+            record(first, None, [f"batch of {len(batch)} rows starting at row {first} failed: {exc.__class__.__name__}: {exc}"])
+        batch.clear()
+        batch_rows.clear()
+
+    for row_number, row, parse_error in iter_rows(stream, fmt):
+        rows_read += 1
+        if parse_error:
+            record(row_number, None, [parse_error])
+            continue
+        try:
+            product = ProductCreate.model_validate(row)
+        except ValidationError as exc:
+            sku = row.get("sku") if isinstance(row.get("sku"), str) else None
+            record(row_number, sku, _format_validation_error(exc))
+            continue
+
+        rows_valid += 1
+        batch.pop(product.sku, None)
+        batch[product.sku] = _to_db_row(product)
+        batch_rows[product.sku] = row_number
+        if len(batch) >= batch_size:
+            flush()
+    flush()
+
+    if upserted:
+        catalog_cache.invalidate()
+
+    elapsed = time.perf_counter() - started
+    return ProductImportReport(
+        rows_read=rows_read,
+        rows_valid=rows_valid,
+        upserted=upserted,
+        error_count=error_count,
+        errors=errors,
+        batches=batches,
+        elapsed_seconds=round(elapsed, 3),
+        rows_per_second=round(rows_read / elapsed, 1) if elapsed > 0 else None,
+    )
+
+
+def open_text(binary: IO[bytes]) -> IO[str]:
+    """Wrap a binary upload/file for import (UTF-8, BOM tolerated)"""
+    return io.TextIOWrapper(binary, encoding="utf-8-sig", newline="")
+
+
+def guess_format(filename_or_content_type: Optional[str]) -> Optional[str]:
+    """Pick an import format from a file name or Content-Type"""
+    value = (filename_or_content_type or "").lower()
+    if value.endswith(".csv") or "csv" in value:
+        return "csv"
+    if value.endswith((".jsonl", ".ndjson")) or "ndjson" in value or "jsonl" in value or "json-lines" in value:
+        return "jsonl"
+    return None
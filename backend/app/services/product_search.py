@@ -0,0 +1,218 @@
+"""
+Indexed product search over name and SKU.
+
+``ILIKE '%term%'`` can't use the btree indexes on ``products`` and turns
+every till keystroke into a full table scan. This module puts a trigram
+index behind the same substring semantics, using whatever the database
+offers natively:
+
+- PostgreSQL: ``pg_trgm`` GIN indexes on name and SKU (which ILIKE can use
+  directly); matches are ranked with ``similarity()`` and a ``simple``
+  tsvector word-prefix ``ts_rank``
+- SQLite: an FTS5 table with the trigram tokenizer, kept in sync with
+  ``products`` by triggers
+
+If the index can't be created (missing extension or privileges, SQLite
+built without FTS5) search falls back to plain ILIKE, so results stay the
+same, just slower.
+
+Terms shorter than three characters can't be answered from a trigram
+index; those use ILIKE as before.
+"""
+
+import logging
+import re
+from typing import List, Optional
+
+from sqlalchemy import Float, Integer, case, column, func, or_, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Query
+
+from app.models.product import Product
+from app.services.catalog_cache import CatalogEntry
+
+logger = logging.getLogger(__name__)
+
+MIN_TRIGRAM_LENGTH = 3
+
+# Set by ensure_search_index(); None means "no index, use ILIKE"
+_backend: Optional[str] = None
+
+_SQLITE_FTS_DDL = {
+    ("table", "products_fts"): """
+    CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+        name, sku, content='products', content_rowid='id', tokenize='trigram'
+    )
+    """,
+    ("trigger", "products_fts_ai"): """
+    CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts(rowid, name, sku) VALUES (new.id, new.name, new.sku);
+    END
+    """,
+    ("trigger", "products_fts_ad"): """
+    CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, sku) VALUES ('delete', old.id, old.name, old.sku);
+    END
+    """,
+    ("trigger", "products_fts_au"): """
+    CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF name, sku ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, sku) VALUES ('delete', old.id, old.name, old.sku);
+        INSERT INTO products_fts(rowid, name, sku) VALUES (new.id, new.name, new.sku);
+    END
+    """,
+}
+
+_POSTGRES_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS idx_product_name_trgm ON products USING gin (name gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS idx_product_sku_trgm ON products USING gin (sku gin_trgm_ops)",
+]
+
+
+def ensure_search_index(engine: Engine) -> Optional[str]:
+    """
+    Create the search index for this database if it doesn't exist yet.
+
+    Safe to call on every startup. Must run after the products table exists.
+    On SQLite a missing sync trigger is recreated too, and the index rebuilt.
+
+    Returns:
+        "postgresql", "sqlite-fts5", or None if search falls back to ILIKE
+    """
+    global _backend
+    dialect = engine.dialect.name
+
+    try:
+        if dialect == "postgresql":
+            with engine.begin() as conn:
+                for ddl in _POSTGRES_DDL:
+                    conn.execute(text(ddl))
+            _backend = "postgresql"
+        elif dialect == "sqlite":
+            with engine.begin() as conn:
+                existing = set(conn.execute(text(
+                    "SELECT type, name FROM sqlite_master WHERE name LIKE 'products_fts%'"
+                )).all())
+                missing = [ddl for key, ddl in _SQLITE_FTS_DDL.items() if key not in existing]
+                if missing:
+                    for ddl in missing:
+                        conn.execute(text(ddl))
+                    # Index rows written before the table, or while a trigger was missing
+                    conn.execute(text("INSERT INTO products_fts(products_fts) VALUES ('rebuild')"))
+            _backend = "sqlite-fts5"
+        else:
+            _backend = None
+    except Exception as exc:
+        logger.warning("Product search index unavailable, falling back to ILIKE: %s", exc)
+        _backend = None
+
+    return _backend
+
+
+def _ilike_filter(term: str):
+    pattern = f"%{term}%"
+    return or_(Product.name.ilike(pattern), Product.sku.ilike(pattern))
+
+
+def _fts_phrase(term: str) -> str:
+    # FTS5 string literal: double quotes, embedded quotes doubled
+    return '"' + term.replace('"', '""') + '"'
+
+
+def _fts_match_ids():
+    return text("SELECT rowid FROM products_fts WHERE products_fts MATCH :fts_query")
+
+
+def apply_filter(query: Query, term: str) -> Query:
+    """
+    Restrict a Product query to rows whose name or SKU contains ``term``.
+
+    Same case-insensitive substring semantics as the old ILIKE filter, but
+    answered from the trigram index when one is available.
+    """
+    if _backend == "sqlite-fts5" and len(term) >= MIN_TRIGRAM_LENGTH:
+        return query.filter(
+            Product.id.in_(_fts_match_ids().bindparams(fts_query=_fts_phrase(term)))
+        )
+    # pg_trgm indexes serve ILIKE directly
+    return query.filter(_ilike_filter(term))
+
+
+def apply_ranked_search(query: Query, term: str) -> Query:
+    """
+    Filter by ``term`` and order by relevance, best first.
+
+    Exact and prefix SKU/name matches always rank above plain substring
+    matches; ties are broken by the database's own relevance score and
+    then by name.
+    """
+    lowered = term.lower()
+    prefix_rank = case(
+        (func.lower(Product.sku) == lowered, 0),
+        (func.lower(Product.sku).startswith(lowered, autoescape=True), 1),
+        (func.lower(Product.name).startswith(lowered, autoescape=True), 2),
+        else_=3,
+    )
+
+    if _backend == "sqlite-fts5" and len(term) >= MIN_TRIGRAM_LENGTH:
+        fts = (
+            text(
+                "SELECT rowid AS id, bm25(products_fts) AS score "
+                "FROM products_fts WHERE products_fts MATCH :fts_query"
+            )
+            .bindparams(fts_query=_fts_phrase(term))
+            .columns(column("id", Integer), column("score", Float))
+            .subquery("fts")
+        )
+        # bm25() is lower-is-better
+        return (
+            query.join(fts, Product.id == fts.c.id)
+            .order_by(prefix_rank, fts.c.score, Product.name, Product.id)
+        )
+
+    query = query.filter(_ilike_filter(term))
+
+    if _backend == "postgresql":
+        similarity = func.greatest(
+            func.similarity(Product.name, term),
+            func.similarity(Product.sku, term),
+        )
+        order = [prefix_rank]
+        words = re.findall(r"\w+", term)
+        if words:
+            word_prefix = func.ts_rank(
+                func.to_tsvector("simple", Product.name + " " + Product.sku),
+                func.to_tsquery("simple", " & ".join(f"{w}:*" for w in words)),
+            )
+            order.append(word_prefix.desc())
+        return query.order_by(*order, similarity.desc(), Product.name, Product.id)
+
+    return query.order_by(prefix_rank, Product.name, Product.id)
+
+
+def rank_entries(entries: List[CatalogEntry], term: str) -> List[CatalogEntry]:
+    """
+    In-process equivalent of ``apply_ranked_search`` for the catalog snapshot.
+
+    Ranks exact SKU, SKU prefix, name prefix, word prefix and then substring
+    matches, keeping catalog order within each rank.
+    """
+    needle = term.lower()
+    ranked = []
+    for entry in entries:
+        name, sku = entry.search_text
+        if sku == needle:
+            rank = 0
+        elif sku.startswith(needle):
+            rank = 1
+        elif name.startswith(needle):
+            rank = 2
+        elif any(word.startswith(needle) for word in name.split()):
+            rank = 3
+        elif needle in name or needle in sku:
+            rank = 4
+        else:
+            continue
+        ranked.append((rank, entry))
+    ranked.sort(key=lambda pair: pair[0])
+    return [entry for _, entry in ranked]
@@ -0,0 +1,293 @@
+"""
+On-demand profiling of a single request.
+
+Off unless PROFILING_ENABLED is set: the middleware and SQL listeners
+below are only installed then, so a normal deployment runs none of this
+code. With it on, a request is profiled when it carries
+``X-Profile-Token: <PROFILING_TOKEN>`` (compared in constant time; there
+is no profiling without a token) and asks for a format, either with an
+``X-Profile`` header or a ``_profile`` query flag:
+
+    curl -H "X-Profile-Token: $TOKEN" "http://host/api/products?_profile=speedscope"
+
+Formats:
+
+- ``speedscope`` (default, also ``_profile=1``): speedscope JSON, loadable
+  at https://www.speedscope.app. It holds a sampled wall-time profile plus
+  an "SQL" timeline with every statement the request ran
+- ``collapsed``: one ``frame;frame;frame microseconds`` line per stack,
+  for flamegraph.pl and similar tools
+
+In both, a sample taken while a statement was running gets the statement
+as its leaf frame (``SQL: SELECT ...``), so database time shows up under
+the query that spent it.
+
+The profile replaces the response body (the endpoint's status goes in
+``X-Profile-Status``), or, with PROFILING_OUTPUT_DIR set, is written there
+and named in an ``X-Profile-File`` header on the normal response.
+
+A sampler thread reads ``sys._current_frames()`` every
+PROFILING_INTERVAL_SECONDS. It keeps the event-loop thread's stacks while
+the loop isn't idle (async endpoints, middleware, serialization), and any
+other thread's stacks that include the routed endpoint (sync endpoints
+run in the threadpool). Other requests running at the same time on the
+loop or the same endpoint can leak into the profile, so this is meant
+for replaying a slow request, not for profiling a busy server.
+"""
+
+import hmac
+import json
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+FORMATS = {"speedscope", "collapsed"}
+TOKEN_HEADER = b"x-profile-token"
+FORMAT_HEADER = b"x-profile"
+QUERY_FLAG = "_profile"
+SQL_FRAME_LENGTH = 120
+
+_active: ContextVar[Optional["Profile"]] = ContextVar("active_profile", default=None)
+
+
+def _frame_key(code) -> Tuple[str, str, int]:
+    return (code.co_qualname, code.co_filename, code.co_firstlineno)
+
+
+def _is_idle_loop(leaf) -> bool:
+    return leaf.co_name == "select" and leaf.co_filename.endswith("selectors.py")
+
+
+class Profile:
+    """Samples and SQL statements for one request"""
+
+    def __init__(self, scope: dict, interval: float):
+        self.scope = scope
+        self.interval = interval
+        self.loop_thread = threading.get_ident()
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        # (stack as frame keys root -> leaf, weight in seconds)
+        self.samples: List[Tuple[Tuple[Tuple[str, str, int], ...], float]] = []
+        # (start, end, statement), offsets from self.started
+        self.sql: List[Tuple[float, float, str]] = []
+        self._running_sql: Dict[int, Tuple[float, str]] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, name="request-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.finished = time.perf_counter()
+
+    @property
+    def duration(self) -> float:
+        return (self.finished or time.perf_counter()) - self.started
+
+    def sql_started(self, statement: str) -> None:
+        self._running_sql[threading.get_ident()] = (time.perf_counter(), statement)
+
+    def sql_finished(self) -> None:
+        running = self._running_sql.pop(threading.get_ident(), None)
+        if running is not None:
+            began, statement = running
+            self.sql.append((began - self.started, time.perf_counter() - self.started, statement))
+
+    def _endpoint_code(self):
+        route = self.scope.get("route")
+        endpoint = getattr(route, "endpoint", None)
+        return getattr(endpoint, "__code__", None)
+
+    def _sample(self) -> None:
+        me = threading.get_ident()
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            weight, last = now - last, now
+            endpoint = self._endpoint_code()
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == me:
+                    continue
+                codes = []
+                while frame is not None:
+                    codes.append(frame.f_code)
+                    frame = frame.f_back
+                if thread_id == self.loop_thread:
+                    if _is_idle_loop(codes[0]):
+                        continue
+                elif endpoint is None or endpoint not in codes:
+                    continue
+                stack = [_frame_key(code) for code in reversed(codes)]
+                running = self._running_sql.get(thread_id)
+                if running is not None:
+                    stack.append(("SQL: " + " ".join(running[1].split())[:SQL_FRAME_LENGTH], "<sql>", 0))
+                self.samples.append((tuple(stack), weight))
+
+    # -- output ---------------------------------------------------------------
+
+    def speedscope(self) -> dict:
+        frames: List[dict] = []
+        index: Dict[Tuple[str, str, int], int] = {}
+
+        def frame_id(key: Tuple[str, str, int]) -> int:
+            if key not in index:
+                index[key] = len(frames)
+                name, file, line = key
+                frames.append({"name": name, "file": file, "line": line} if line else {"name": name})
+            return index[key]
+
+        samples = [[frame_id(key) for key in stack] for stack, _ in self.samples]
+        events = []
+        cursor = 0.0
+        for began, ended, statement in sorted(self.sql):
+            # Speedscope needs properly nested events; statements from
+            # parallel threads are laid end to end
+            began = max(began, cursor)
+            ended = cursor = max(ended, began)
+            frame = frame_id(("SQL: " + " ".join(statement.split()), "<sql>", 0))
+            events += [{"type": "O", "frame": frame, "at": began}, {"type": "C", "frame": frame, "at": ended}]
+
+        name = f"{self.scope['method']} {self.scope['path']}"
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "schedular-api",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": [
+                {
+                    "type": "sampled", "name": f"{name} (wall time)", "unit": "seconds",
+                    "startValue": 0, "endValue": self.duration,
+                    "samples": samples, "weights": [weight for _, weight in self.samples],
+                },
+                {
+                    "type": "evented", "name": f"{name} SQL ({len(self.sql)} statements)", "unit": "seconds",
+                    "startValue": 0, "endValue": max(self.duration, cursor), "events": events,
+                },
+            ],
+        }
+
+    def collapsed(self) -> str:
+        # Weighted by wall time (microseconds) rather than sample count: the
+        # sampler waits for the GIL, so samples aren't evenly spaced
+        totals: Dict[str, float] = {}
+        for stack, weight in self.samples:
+            line = ";".join(
+                re.sub(r"[;\s]+", " ", name if not line else f"{name} ({os.path.basename(file)}:{line})")
+                for name, file, line in stack
+            )
+            totals[line] = totals.get(line, 0.0) + weight
+        return "".join(f"{line} {round(seconds * 1e6)}\n" for line, seconds in sorted(totals.items()))
+
+    def render(self, fmt: str) -> Tuple[bytes, str]:
+        if fmt == "collapsed":
+            return self.collapsed().encode(), "text/plain; charset=utf-8"
+        return json.dumps(self.speedscope()).encode(), "application/json"
+
+
+def install_sql_capture(engine: Engine) -> None:
+    """Record statements into the active profile (sync engine or an async engine's ``sync_engine``)"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        profile = _active.get()
+        if profile is not None:
+            profile.sql_started(statement)
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        profile = _active.get()
+        if profile is not None:
+            profile.sql_finished()
+
+    @event.listens_for(engine, "handle_error")
+    def _failed(context):
+        profile = _active.get()
+        if profile is not None:
+            profile.sql_finished()
+
+
+def requested_format(scope: dict) -> Optional[str]:
+    """The profile format an authorized request asks for, else None"""
+    token = settings.PROFILING_TOKEN
+    if not token:
+        return None
+    headers = dict(scope["headers"])
+    given = headers.get(TOKEN_HEADER)
+    if given is None or not hmac.compare_digest(given, token.encode()):
+        return None
+    fmt = headers.get(FORMAT_HEADER, b"").decode("latin-1").strip().lower()
+    if not fmt:
+        flags = parse_qs(scope.get("query_string", b"").decode("latin-1")).get(QUERY_FLAG)
+        if not flags:
+            return None
+        fmt = flags[-1].lower()
+    return fmt if fmt in FORMATS else "speedscope"
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that profiles requests asking for it (see module docstring)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        fmt = requested_format(scope) if scope["type"] == "http" else None
+        if fmt is None:
+            await self.app(scope, receive, send)
+            return
+
+        output_dir = settings.PROFILING_OUTPUT_DIR
+        filename = None
+        if output_dir:
+            suffix = "speedscope.json" if fmt == "speedscope" else "collapsed.txt"
+            filename = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}.{suffix}"
+        start = {}
+
+        async def capture(message):
+            if filename is not None:
+                if message["type"] == "http.response.start":
+                    message = {**message, "headers": [*message.get("headers", []), (b"x-profile-file", filename.encode())]}
+                await send(message)
+            elif message["type"] == "http.response.start":
+                start.update(message)
+
+        profile = Profile(scope, settings.PROFILING_INTERVAL_SECONDS)
+        token = _active.set(profile)
+        profile.start()
+        try:
+            await self.app(scope, receive, capture)
+        finally:
+            profile.stop()
+            _active.reset(token)
+
+        body, content_type = profile.render(fmt)
+        if filename is not None:
+            os.makedirs(output_dir, exist_ok=True)
+            with open(os.path.join(output_dir, filename), "wb") as f:
+                f.write(body)
+            return
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", content_type.encode()),
+                (b"content-length", str(len(body)).encode()),
+                (b"x-profile-status", str(start.get("status", 500)).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,265 @@
+"""
+Sales reporting: daily rollups maintained alongside the sales they summarise.
+
+Dashboards read ``report_daily_sales`` (one row per day) and
+``report_daily_sku_sales`` (one row per day and SKU) instead of scanning
+``sales``/``sale_items``, so a date-range report costs O(days) rather than
+O(line items).
+
+The rollups are kept current incrementally: every write path in the sales
+router takes the sale's ``contribution()`` before and after the change and
+``record()``s the difference as ``INSERT ... ON CONFLICT DO UPDATE SET
+x = x + excluded.x`` in the sale's own transaction, so a rolled-back order
+never reaches the reports. Cancelled sales contribute nothing; every other
+status counts.
+
+``rebuild()`` recomputes a date range from the raw tables with SQL
+``GROUP BY`` (sale_items joined to products), for backfilling a database
+that predates the rollups or repairing one after manual edits.
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import Date, cast, delete, func, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.db import dialect_insert
+from app.models.product import Product
+from app.models.report import DailySales, DailySkuSales
+from app.models.sale import Sale, SaleItem
+
+_DAILY_SUMS = ("orders", "units", "subtotal", "discount", "delivery_fee", "total")
+_SKU_SUMS = ("orders", "units", "revenue")
+ZERO = Decimal("0")
+
+
+@dataclass
+class Contribution:
+    """What one sale adds to the rollups"""
+    day: date
+    subtotal: Decimal
+    discount: Decimal
+    delivery_fee: Decimal
+    total: Decimal
+    # sku -> [units, revenue]
+    lines: Dict[str, list] = field(default_factory=dict)
+
+
+def contribution(sale: Sale) -> Optional[Contribution]:
+    """A sale's share of the rollups (None for cancelled sales)"""
+    if sale.status == "cancelled":
+        return None
+    lines: Dict[str, list] = {}
+    for item in sale.items:
+        line = lines.setdefault(item.sku, [0, ZERO])
+        line[0] += item.qty
+        line[1] += item.unit_price * item.qty
+    return Contribution(
+        day=(sale.created_at or datetime.utcnow()).date(),
+        subtotal=sale.subtotal or ZERO,
+        discount=sale.discount or ZERO,
+        delivery_fee=sale.delivery_fee or ZERO,
+        total=sale.total or ZERO,
+        lines=lines,
+    )
+
+
+def _add(daily: dict, skus: dict, part: Optional[Contribution], sign: int) -> None:
+    if part is None:
+        return
+    day = daily[part.day]
+    day["orders"] += sign
+    day["units"] += sign * sum(units for units, _ in part.lines.values())
+    day["subtotal"] += sign * part.subtotal
+    day["discount"] += sign * part.discount
+    day["delivery_fee"] += sign * part.delivery_fee
+    day["total"] += sign * part.total
+    for sku, (units, revenue) in part.lines.items():
+        row = skus[(part.day, sku)]
+        row["orders"] += sign
+        row["units"] += sign * units
+        row["revenue"] += sign * revenue
+
+
+def _upsert(db: Session, model, keys: Tuple[str, ...], sums: Tuple[str, ...], rows: List[dict]) -> None:
+    stmt = dialect_insert(db)(model)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(keys),
+        set_={column: getattr(model, column) + stmt.excluded[column] for column in sums},
+    )
+    db.execute(stmt, rows)
+
+
+def record(db: Session, before: Optional[Contribution], after: Optional[Contribution]) -> None:
+    """
+    Apply the change from ``before`` to ``after`` to the rollups.
+
+    Joins the caller's transaction (nothing is committed). Rows are written
+    in key order so concurrent orders can't deadlock on PostgreSQL.
+    """
+    record_many(db, [(before, after)])
+
+
+def record_many(db: Session, changes: Iterable[Tuple[Optional[Contribution], Optional[Contribution]]]) -> None:
+    """``record()`` for several sales at once: one upsert per rollup table"""
+    zero_day = lambda: {"orders": 0, "units": 0, "subtotal": ZERO, "discount": ZERO, "delivery_fee": ZERO, "total": ZERO}
+    zero_sku = lambda: {"orders": 0, "units": 0, "revenue": ZERO}
+    daily: Dict[date, dict] = defaultdict(zero_day)
+    skus: Dict[Tuple[date, str], dict] = defaultdict(zero_sku)
+    for before, after in changes:
+        _add(daily, skus, before, -1)
+        _add(daily, skus, after, 1)
+
+    daily_rows = [{"day": day, **sums} for day, sums in sorted(daily.items()) if any(sums.values())]
+    sku_rows = [{"day": day, "sku": sku, **sums} for (day, sku), sums in sorted(skus.items()) if any(sums.values())]
+    if daily_rows:
+        _upsert(db, DailySales, ("day",), _DAILY_SUMS, daily_rows)
+    if sku_rows:
+        # Category is only written when a (day, sku) row is first created
+        categories = dict(db.execute(
+            select(Product.sku, Product.category).where(Product.sku.in_({row["sku"] for row in sku_rows}))
+        ).all())
+        for row in sku_rows:
+            row["category"] = categories.get(row["sku"])
+        _upsert(db, DailySkuSales, ("day", "sku"), _SKU_SUMS, sku_rows)
+
+
+def _day_expr(db: Session, column):
+    # SQLite has no DATE type: CAST(... AS DATE) yields a number there
+    if db.get_bind().dialect.name == "sqlite":
+        return func.date(column)
+    return cast(column, Date)
+
+
+def rebuild(db: Session, start: Optional[date] = None, end: Optional[date] = None) -> Tuple[int, int]:
+    """
+    Recompute the rollups for days ``start``..``end`` (inclusive, None = open)
+    from the raw sales tables, and commit.
+
+    Returns:
+        (daily rows, sku rows) written
+    """
+    sale_filters = [Sale.status != "cancelled"]
+    if start is not None:
+        sale_filters.append(Sale.created_at >= datetime.combine(start, time.min))
+    if end is not None:
+        sale_filters.append(Sale.created_at < datetime.combine(end + timedelta(days=1), time.min))
+
+    for model in (DailySales, DailySkuSales):
+        stmt = delete(model)
+        if start is not None:
+            stmt = stmt.where(model.day >= start)
+        if end is not None:
+            stmt = stmt.where(model.day <= end)
+        db.execute(stmt)
+
+    day = _day_expr(db, Sale.created_at)
+    units = (
+        select(SaleItem.sale_id, func.sum(SaleItem.qty).label("units"))
+        .group_by(SaleItem.sale_id)
+        .subquery()
+    )
+    daily = (
+        select(
+            day.label("day"),
+            func.count(Sale.id),
+            func.coalesce(func.sum(units.c.units), 0),
+            func.sum(Sale.subtotal),
+            func.sum(Sale.discount),
+            func.sum(Sale.delivery_fee),
+            func.sum(Sale.total),
+        )
+        .outerjoin(units, units.c.sale_id == Sale.id)
+        .where(*sale_filters)
+        .group_by(day)
+    )
+    daily_count = db.execute(
+        DailySales.__table__.insert().from_select(["day", *_DAILY_SUMS], daily)
+    ).rowcount
+
+    by_sku = (
+        select(
+            day.label("day"),
+            SaleItem.sku,
+            func.max(Product.category),
+            func.count(func.distinct(Sale.id)),
+            func.sum(SaleItem.qty),
+            func.sum(SaleItem.qty * SaleItem.unit_price),
+        )
+        .join(Sale, Sale.id == SaleItem.sale_id)
+        .outerjoin(Product, Product.sku == SaleItem.sku)
+        .where(*sale_filters)
+        .group_by(day, SaleItem.sku)
+    )
+    sku_count = db.execute(
+        DailySkuSales.__table__.insert().from_select(["day", "sku", "category", *_SKU_SUMS], by_sku)
+    ).rowcount
+
+    db.commit()
+    return daily_count, sku_count
+
+
+def ensure_rollups(engine: Engine) -> None:
+    """Backfill the rollups once if they're empty but sales exist"""
+    with Session(engine) as db:
+        if db.execute(select(DailySales.day).limit(1)).first() is not None:
+            return
+        if db.execute(select(Sale.id).where(Sale.status != "cancelled").limit(1)).first() is None:
+            return
+        rebuild(db)
+
+
+def _range(stmt, model, start: Optional[date], end: Optional[date]):
+    if start is not None:
+        stmt = stmt.where(model.day >= start)
+    if end is not None:
+        stmt = stmt.where(model.day <= end)
+    return stmt
+
+
+def daily_totals(db: Session, start: Optional[date] = None, end: Optional[date] = None) -> List[DailySales]:
+    """Rollup rows for each day with sales, oldest first"""
+    stmt = _range(select(DailySales).where(DailySales.orders != 0), DailySales, start, end)
+    return list(db.execute(stmt.order_by(DailySales.day)).scalars())
+
+
+def category_totals(db: Session, start: Optional[date] = None, end: Optional[date] = None) -> list:
+    """(category, units, revenue) per category, highest revenue first"""
+    revenue = func.sum(DailySkuSales.revenue)
+    stmt = _range(
+        select(DailySkuSales.category, func.sum(DailySkuSales.units), revenue),
+        DailySkuSales, start, end,
+    )
+    return db.execute(
+        stmt.group_by(DailySkuSales.category).having(func.sum(DailySkuSales.units) != 0)
+        .order_by(revenue.desc(), DailySkuSales.category)
+    ).all()
+
+
+def top_skus(
+    db: Session,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    limit: int = 10,
+    by: str = "revenue",
+) -> list:
+    """(sku, category, orders, units, revenue) for the top ``limit`` SKUs"""
+    units = func.sum(DailySkuSales.units)
+    revenue = func.sum(DailySkuSales.revenue)
+    stmt = _range(
+        select(
+            DailySkuSales.sku, func.max(DailySkuSales.category),
+            func.sum(DailySkuSales.orders), units, revenue,
+        ),
+        DailySkuSales, start, end,
+    )
+    rank = units if by == "units" else revenue
+    return db.execute(
+        stmt.group_by(DailySkuSales.sku).having(units != 0)
+        .order_by(rank.desc(), DailySkuSales.sku).limit(limit)
+    ).all()
@@ -0,0 +1,349 @@
+"""
+Vehicle routing for a day's deliveries.
+
+Pure planning code with no database access (see app/services/delivery_routes.py
+for loading a day's orders), so it can run in worker processes:
+
+1. Travel times: one vectorized haversine matrix over depot + stops, scaled
+   by a road factor and average speed.
+2. Construction: stops are grouped by time window (morning, afternoon, ...)
+   and each group is swept by polar angle around the depot into one sector
+   per truck, balancing estimated work. Truck k gets sector k of every
+   window, so it stays in one part of town all day. Within a window the
+   truck visits its stops nearest-neighbour first.
+3. Local search: each route is improved independently with 2-opt and
+   or-opt (moving runs of 1-3 stops) until no move helps or its share of the
+   time budget runs out. Routes are spread over a process pool.
+
+A route's cost is its travel minutes plus a heavy penalty per minute of
+lateness, so moves never trade a time window for a shorter drive. Each
+truck carries one load for the whole day; stops that don't fit are
+returned unassigned.
+"""
+
+import math
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+LATE_PENALTY = 1000.0   # cost per minute late, against 1 per minute driven
+MAX_OR_OPT_SEGMENT = 3
+EPSILON = 1e-9
+# Below this many stops, starting worker processes costs more than it saves
+POOL_MIN_STOPS = 150
+
+
+@dataclass
+class Stop:
+    id: Any
+    lat: float
+    lon: float
+    service_minutes: int
+    volume_l: int = 0
+    window: Tuple[int, int] = (0, 24 * 60)   # minutes after midnight
+
+
+@dataclass
+class RoutingProblem:
+    depot: Tuple[float, float]
+    stops: List[Stop]
+    vehicles: int
+    capacity_l: int
+    shift_start: int = 7 * 60 + 30
+    speed_kmh: float = 35.0
+    road_factor: float = 1.3
+
+
+@dataclass
+class Visit:
+    stop: Stop
+    arrival: float
+    start: float
+    departure: float
+    late: float
+
+
+@dataclass
+class Route:
+    vehicle: int
+    visits: List[Visit]
+    distance_km: float
+    travel_minutes: float
+    finish: float
+    volume_l: int
+
+    @property
+    def late_minutes(self) -> float:
+        return sum(v.late for v in self.visits)
+
+
+@dataclass
+class RoutePlan:
+    routes: List[Route]
+    unassigned: List[Tuple[Any, str]] = field(default_factory=list)
+    construction_cost: float = 0.0
+    cost: float = 0.0
+    elapsed_seconds: float = 0.0
+
+
+def travel_matrix(points: np.ndarray, speed_kmh: float, road_factor: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Road-distance estimate (km) and travel time (minutes) between every pair.
+
+    Args:
+        points: (n, 2) array of latitude/longitude in degrees
+    """
+    lat = np.radians(points[:, 0])
+    lon = np.radians(points[:, 1])
+    dlat = lat[:, None] - lat[None, :]
+    dlon = lon[:, None] - lon[None, :]
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat)[:, None] * np.cos(lat)[None, :] * np.sin(dlon / 2) ** 2
+    km = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0))) * road_factor
+    return km, km / speed_kmh * 60.0
+
+
+# --- Route evaluation (plain lists: much faster than numpy scalars in loops) --
+
+def _schedule_cost(route: Sequence[int], times: List[List[float]], service: List[int],
+                   windows: List[Tuple[int, int]], start: float) -> Tuple[float, float]:
+    """(travel minutes, late minutes) for depot -> route -> depot"""
+    clock = start
+    travel = 0.0
+    late = 0.0
+    previous = 0
+    for node in route:
+        leg = times[previous][node]
+        travel += leg
+        clock += leg
+        opens, closes = windows[node]
+        if clock < opens:
+            clock = opens
+        elif clock > closes:
+            late += clock - closes
+        clock += service[node]
+        previous = node
+    travel += times[previous][0]
+    return travel, late
+
+
+def _cost(route, times, service, windows, start) -> float:
+    travel, late = _schedule_cost(route, times, service, windows, start)
+    return travel + LATE_PENALTY * late
+
+
+def _two_opt(route: List[int], times, service, windows, start, cost: float, deadline: float,
+             exhaustive: bool) -> Tuple[List[int], float, bool]:
+    n = len(route)
+    path = [0] + route + [0]
+    for i in range(1, n):
+        if time.time() > deadline:
+            return route, cost, False
+        a, b = path[i - 1], path[i]
+        for j in range(i + 1, n + 1):
+            c, d = path[j], path[j + 1]
+            # Reversing path[i..j] only changes the two edges at its ends
+            if exhaustive or times[a][c] + times[b][d] - times[a][b] - times[c][d] < -EPSILON:
+                candidate = route[:i - 1] + route[i - 1:j][::-1] + route[j:]
+                candidate_cost = _cost(candidate, times, service, windows, start)
+                if candidate_cost < cost - EPSILON:
+                    return candidate, candidate_cost, True
+    return route, cost, False
+
+
+def _or_opt(route: List[int], times, service, windows, start, cost: float, deadline: float,
+            exhaustive: bool) -> Tuple[List[int], float, bool]:
+    n = len(route)
+    path = [0] + route + [0]
+    for length in range(1, min(MAX_OR_OPT_SEGMENT, n - 1) + 1):
+        for i in range(1, n - length + 2):
+            if time.time() > deadline:
+                return route, cost, False
+            first, last = path[i], path[i + length - 1]
+            before, after = path[i - 1], path[i + length]
+            removed = times[before][first] + times[last][after] - times[before][after]
+            for j in range(0, n + 1):
+                # Insert between path[j] and path[j + 1], outside the segment
+                if i - 1 <= j <= i + length - 1:
+                    continue
+                p, q = path[j], path[j + 1]
+                if exhaustive or times[p][first] + times[last][q] - times[p][q] - removed < -EPSILON:
+                    segment = route[i - 1:i - 1 + length]
+                    rest = route[:i - 1] + route[i - 1 + length:]
+                    at = j if j < i else j - length
+                    candidate = rest[:at] + segment + rest[at:]
+                    candidate_cost = _cost(candidate, times, service, windows, start)
+                    if candidate_cost < cost - EPSILON:
+                        return candidate, candidate_cost, True
+    return route, cost, False
+
+
+def improve_route(args) -> List[int]:
+    """
+    2-opt / or-opt local search on one route until no move helps or the
+    budget runs out. Runs in worker processes, so takes and returns plain data.
+
+    Args:
+        args: (route, times, service, windows, start, budget_seconds, hard_deadline)
+            with route as indices into the route-local matrix (0 = depot)
+    """
+    route, times, service, windows, start, budget, hard_deadline = args
+    deadline = min(time.time() + budget, hard_deadline)
+    cost = _cost(route, times, service, windows, start)
+    improved = True
+    while improved and time.time() < deadline:
+        # While the route is late, moves that lengthen the drive may still
+        # help, so every move gets a full schedule check (O(n) each)
+        exhaustive = _schedule_cost(route, times, service, windows, start)[1] > 0
+        route, cost, improved = _two_opt(route, times, service, windows, start, cost, deadline, exhaustive)
+        if not improved:
+            route, cost, improved = _or_opt(route, times, service, windows, start, cost, deadline, exhaustive)
+    return route
+
+
+# --- Construction --------------------------------------------------------------
+
+def _sweep(problem: RoutingProblem, times: np.ndarray) -> Tuple[List[List[int]], List[Tuple[Any, str]]]:
+    """Assign stops (1-based matrix indices) to trucks and order them"""
+    stops = problem.stops
+    depot_lat, depot_lon = problem.depot
+    angles = [math.atan2(s.lat - depot_lat, (s.lon - depot_lon) * math.cos(math.radians(depot_lat))) for s in stops]
+
+    # Rough work per stop: its service time plus the hop from its nearest neighbour
+    nearest = np.partition(times[1:, 1:], 1, axis=1)[:, 1] if len(stops) > 1 else np.zeros(len(stops))
+    work = [s.service_minutes + float(nearest[k]) for k, s in enumerate(stops)]
+
+    routes: List[List[int]] = [[] for _ in range(problem.vehicles)]
+    loads = [0] * problem.vehicles
+    unassigned: List[Tuple[Any, str]] = []
+
+    windows = sorted({s.window for s in stops})
+    for window in windows:
+        group = sorted((k for k, s in enumerate(stops) if s.window == window), key=lambda k: angles[k])
+        target = sum(work[k] for k in group) / problem.vehicles
+        vehicle, filled = 0, 0.0
+        sectors: List[List[int]] = [[] for _ in range(problem.vehicles)]
+        for k in group:
+            if filled >= target and vehicle < problem.vehicles - 1:
+                vehicle, filled = vehicle + 1, 0.0
+            # Spill to the next truck with room if this one's load is full
+            for candidate in list(range(vehicle, problem.vehicles)) + list(range(vehicle)):
+                if loads[candidate] + stops[k].volume_l <= problem.capacity_l:
+                    sectors[candidate].append(k + 1)
+                    loads[candidate] += stops[k].volume_l
+                    break
+            else:
+                unassigned.append((stops[k].id, "No truck has capacity left"))
+                continue
+            filled += work[k]
+
+        # Nearest neighbour within the window, starting where the truck is
+        for v, sector in enumerate(sectors):
+            position = routes[v][-1] if routes[v] else 0
+            remaining = set(sector)
+            while remaining:
+                position = min(remaining, key=lambda node: times[position, node])
+                routes[v].append(position)
+                remaining.discard(position)
+    return routes, unassigned
+
+
+# --- Driver --------------------------------------------------------------------
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_size = 0
+
+
+def _executor(workers: int) -> ProcessPoolExecutor:
+    # Reused between plans; "spawn" because the server process has threads
+    global _pool, _pool_size
+    if _pool is None or _pool_size != workers:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+        _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        _pool_size = workers
+    return _pool
+
+
+def _local(route: List[int], times: np.ndarray, service: List[int], windows: List[Tuple[int, int]]):
+    nodes = [0] + route
+    local_times = times[np.ix_(nodes, nodes)].tolist()
+    return list(range(1, len(nodes))), local_times, [service[n] for n in nodes], [windows[n] for n in nodes]
+
+
+def _build_route(vehicle: int, route: List[int], problem: RoutingProblem, km: np.ndarray, times: np.ndarray) -> Route:
+    visits: List[Visit] = []
+    clock = float(problem.shift_start)
+    distance = travel = 0.0
+    previous = 0
+    for node in route:
+        stop = problem.stops[node - 1]
+        leg = float(times[previous, node])
+        distance += float(km[previous, node])
+        travel += leg
+        arrival = clock + leg
+        begin = max(arrival, stop.window[0])
+        late = max(0.0, begin - stop.window[1])
+        clock = begin + stop.service_minutes
+        visits.append(Visit(stop=stop, arrival=arrival, start=begin, departure=clock, late=late))
+        previous = node
+    distance += float(km[previous, 0])
+    travel += float(times[previous, 0])
+    return Route(
+        vehicle=vehicle, visits=visits, distance_km=distance, travel_minutes=travel,
+        finish=clock + float(times[previous, 0]), volume_l=sum(v.stop.volume_l for v in visits),
+    )
+
+
+def solve(problem: RoutingProblem, time_budget: float = 5.0, workers: int = 1) -> RoutePlan:
+    """
+    Plan routes for every stop.
+
+    Args:
+        problem: Depot, stops, fleet and speed assumptions
+        time_budget: Seconds of local search in total (construction is extra)
+        workers: Processes for local search; 1 runs it in this process
+    """
+    started = time.time()
+    if not problem.stops or problem.vehicles <= 0:
+        reason = "No trucks available" if problem.stops else ""
+        return RoutePlan(routes=[], unassigned=[(s.id, reason) for s in problem.stops])
+
+    points = np.array([problem.depot] + [(s.lat, s.lon) for s in problem.stops], dtype=float)
+    km, times = travel_matrix(points, problem.speed_kmh, problem.road_factor)
+    service = [0] + [s.service_minutes for s in problem.stops]
+    windows: List[Tuple[int, int]] = [(0, 24 * 60)] + [s.window for s in problem.stops]
+    start = float(problem.shift_start)
+
+    routes, unassigned = _sweep(problem, times)
+    locals_ = [_local(route, times, service, windows) for route in routes]
+    construction_cost = sum(_cost(*local, start) for local in locals_)
+
+    # Each route gets an equal share of the budget per worker slot
+    busy = [k for k, route in enumerate(routes) if len(route) > 2]
+    hard_deadline = started + time_budget
+    if busy:
+        share = min(time_budget, time_budget * max(1, workers) / len(busy))
+        jobs = [(*locals_[k], start, share, hard_deadline) for k in busy]
+        if workers > 1 and len(busy) > 1 and len(problem.stops) >= POOL_MIN_STOPS:
+            improved = list(_executor(workers).map(improve_route, jobs))
+        else:
+            improved = [improve_route(job) for job in jobs]
+        for k, local_route in zip(busy, improved):
+            # Map route-local indices back to matrix indices
+            nodes = [0] + routes[k]
+            routes[k] = [nodes[i] for i in local_route]
+            locals_[k] = _local(routes[k], times, service, windows)
+
+    cost = sum(_cost(*local, start) for local in locals_)
+    return RoutePlan(
+        routes=[_build_route(v, route, problem, km, times) for v, route in enumerate(routes) if route],
+        unassigned=unassigned,
+        construction_cost=construction_cost,
+        cost=cost,
+        elapsed_seconds=time.time() - started,
+    )
@@ -0,0 +1,86 @@
+"""
+Indexed lookup columns for sales.
+
+Customer, delivery and payment details live in JSON text columns on
+``Sale``, which can't be indexed. The fields people search by (phone,
+email, name, delivery date/slot, payment method) are copied into plain
+indexed columns whenever a sale is written. The JSON stays the source for
+``SaleOrderRead``, so responses are unchanged.
+
+Phones are stored as digits only (plus a leading ``+``), emails and names
+lower-cased, so lookups should normalize their input the same way.
+"""
+
+import json
+import re
+from datetime import date
+from typing import Optional
+
+from app.models.sale import Sale
+
+LOOKUP_COLUMNS = (
+    "customer_phone", "customer_email", "customer_name",
+    "delivery_date", "delivery_time_slot", "payment_method",
+)
+
+
+def normalize_phone(phone: Optional[str]) -> Optional[str]:
+    if not phone:
+        return None
+    digits = re.sub(r"\D", "", phone)
+    if not digits:
+        return None
+    return ("+" + digits) if phone.strip().startswith("+") else digits
+
+
+def normalize_email(email: Optional[str]) -> Optional[str]:
+    return email.strip().lower() if email and email.strip() else None
+
+
+def normalize_name(name: Optional[str]) -> Optional[str]:
+    return " ".join(name.lower().split()) if name and name.strip() else None
+
+
+def parse_delivery_date(value: Optional[str]) -> Optional[date]:
+    """preferredDate is free text; only ISO dates (YYYY-MM-DD...) are indexed"""
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value.strip()[:10])
+    except ValueError:
+        return None
+
+
+def _loads(raw: Optional[str]) -> dict:
+    try:
+        value = json.loads(raw) if raw else {}
+    except (json.JSONDecodeError, TypeError):
+        return {}
+    return value if isinstance(value, dict) else {}
+
+
+def lookup_values(customer_json: Optional[str], delivery_json: Optional[str], payment_json: Optional[str]) -> dict:
+    """Lookup column values for a sale's JSON blobs"""
+    customer = _loads(customer_json)
+    delivery = _loads(delivery_json)
+    payment = _loads(payment_json)
+
+    name = customer.get("name") or " ".join(
+        part for part in (customer.get("firstName"), customer.get("lastName")) if part
+    )
+    time_slot = delivery.get("timeSlot")
+    method = payment.get("method")
+    return {
+        "customer_phone": normalize_phone(customer.get("phone")),
+        "customer_email": normalize_email(customer.get("email")),
+        "customer_name": normalize_name(name),
+        "delivery_date": parse_delivery_date(delivery.get("preferredDate")),
+        "delivery_time_slot": time_slot[:50] if isinstance(time_slot, str) else None,
+        "payment_method": method if isinstance(method, str) else None,
+    }
+
+
+def apply(sale: Sale) -> None:
+    """Refresh a sale's lookup columns from its JSON blobs (before commit)"""
+    for column, value in lookup_values(sale.customer_json, sale.delivery_json, sale.payment_json).items():
+        setattr(sale, column, value)
@@ -0,0 +1,190 @@
+"""
+Partial updates to a sale (PATCH /sales/{id}).
+
+Line items are diffed against the sale's current lines instead of being
+deleted and re-inserted, so editing one quantity on a 40-line order
+issues one UPDATE and existing ``SaleItem.id``s stay stable. Incoming
+lines are matched to existing ones:
+
+1. by ``id``, when the client sends one that belongs to this sale
+2. otherwise by (sku, color), first unmatched line wins
+
+Matched lines get only the changed columns written, unmatched existing
+lines are deleted and unmatched incoming lines inserted. The subtotal
+moves by the value of the lines that changed rather than being summed
+again.
+
+Single-line edits can also be sent as an RFC 6902 JSON Patch (a JSON
+array of operations) against the sale as GET /sales/{id} returns it:
+
+    [{"op": "test", "path": "/items/3/id", "value": 57},
+     {"op": "replace", "path": "/items/3/qty", "value": 2}]
+
+``apply_json_patch`` applies the operations to that document and returns
+the top-level fields that changed, which then go through the same path as
+a merge patch.
+"""
+
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.models.sale import SaleItem
+
+ZERO = Decimal("0.00")
+
+
+class PatchError(Exception):
+    """A JSON Patch that can't be applied; ``conflict`` for a failed test op"""
+
+    def __init__(self, message: str, conflict: bool = False):
+        self.conflict = conflict
+        super().__init__(message)
+
+
+@dataclass
+class ItemDiff:
+    inserted: int = 0
+    updated: int = 0
+    deleted: int = 0
+    subtotal_delta: Decimal = ZERO
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.inserted or self.updated or self.deleted)
+
+
+def _line_value(price: Decimal, qty: int) -> Decimal:
+    return price * qty
+
+
+def diff_items(current: List[SaleItem], incoming: Iterable) -> Tuple[List[SaleItem], ItemDiff]:
+    """
+    Reconcile ``current`` lines with ``incoming`` LineItemPayloads.
+
+    Existing SaleItem objects are updated in place; returns the new list
+    (assign it to ``sale.items`` so removed lines are deleted) and what
+    changed.
+    """
+    diff = ItemDiff()
+    by_id = {item.id: item for item in current if item.id is not None}
+    pairs: List[Tuple[Any, Optional[SaleItem]]] = []
+    claimed = set()
+    for line in incoming:
+        item = by_id.get(line.id) if line.id is not None else None
+        if item is not None and id(item) not in claimed:
+            claimed.add(id(item))
+            pairs.append((line, item))
+        else:
+            pairs.append((line, None))
+    unmatched = [item for item in current if id(item) not in claimed]
+
+    result: List[SaleItem] = []
+    for line, item in pairs:
+        if item is None:
+            item = next((i for i in unmatched if i.sku == line.sku and i.color == line.color), None)
+            if item is not None:
+                unmatched.remove(item)
+        price = Decimal(str(line.price))
+        if item is None:
+            item = SaleItem(sku=line.sku, name=line.name, unit_price=price, qty=line.qty, color=line.color)
+            diff.inserted += 1
+            diff.subtotal_delta += _line_value(price, line.qty)
+        else:
+            before = _line_value(item.unit_price, item.qty)
+            changes = {
+                field: value
+                for field, value in (("sku", line.sku), ("name", line.name), ("unit_price", price),
+                                     ("qty", line.qty), ("color", line.color))
+                if getattr(item, field) != value
+            }
+            if changes:
+                for field, value in changes.items():
+                    setattr(item, field, value)
+                diff.updated += 1
+                diff.subtotal_delta += _line_value(item.unit_price, item.qty) - before
+        result.append(item)
+
+    for item in unmatched:
+        diff.deleted += 1
+        diff.subtotal_delta -= _line_value(item.unit_price, item.qty)
+    return result, diff
+
+
+# ---------------------------------------------------------------------------
+# JSON Patch
+# ---------------------------------------------------------------------------
+
+def _tokens(path: str) -> List[str]:
+    if not path.startswith("/"):
+        raise PatchError(f"Invalid JSON pointer '{path}'")
+    return [token.replace("~1", "/").replace("~0", "~") for token in path[1:].split("/")]
+
+
+def _child(container: Any, token: str, path: str, appending: bool = False):
+    """Resolve one pointer token: a dict key or a list index"""
+    if isinstance(container, dict):
+        return token
+    if isinstance(container, list):
+        if appending and token == "-":
+            return len(container)
+        if not token.isdigit() or (token != "0" and token.startswith("0")):
+            raise PatchError(f"Invalid array index in '{path}'")
+        index = int(token)
+        if index > len(container) or (index == len(container) and not appending):
+            raise PatchError(f"Index out of range in '{path}'")
+        return index
+    raise PatchError(f"Path '{path}' goes through a scalar")
+
+
+def _parent(document: dict, path: str) -> Tuple[Any, str]:
+    tokens = _tokens(path)
+    node: Any = document
+    for token in tokens[:-1]:
+        key = _child(node, token, path)
+        try:
+            node = node[key]
+        except (KeyError, IndexError):
+            raise PatchError(f"Path '{path}' does not exist")
+    return node, tokens[-1]
+
+
+def apply_json_patch(document: dict, operations: Iterable) -> Dict[str, Any]:
+    """
+    Apply add/remove/replace/test operations to ``document`` in place.
+
+    Only paths inside an existing top-level field can be changed. Returns
+    {field: new value} for each top-level field an operation touched.
+    Raises PatchError if an operation doesn't apply; nothing is saved in
+    that case because the caller hasn't touched the sale yet.
+    """
+    touched = set()
+    for operation in operations:
+        op, path, value = operation.op, operation.path, operation.value
+        tokens = _tokens(path)
+        if not tokens or tokens[0] not in document:
+            raise PatchError(f"Unknown field in '{path}'")
+        if len(tokens) == 1 and op in ("add", "remove"):
+            raise PatchError(f"Can't {op} the top-level field '{tokens[0]}'")
+
+        parent, last = _parent(document, path)
+        key = _child(parent, last, path, appending=op == "add")
+        exists = key in parent if isinstance(parent, dict) else key < len(parent)
+
+        if op == "test":
+            if not exists or parent[key] != value:
+                raise PatchError(f"Test failed at '{path}'", conflict=True)
+            continue
+        if op in ("remove", "replace") and not exists:
+            raise PatchError(f"Path '{path}' does not exist")
+
+        if op == "remove":
+            del parent[key]
+        elif op == "replace":
+            parent[key] = value
+        elif isinstance(parent, list):
+            parent.insert(key, value)
+        else:
+            parent[key] = value
+        touched.add(tokens[0])
+    return {field: document[field] for field in touched}
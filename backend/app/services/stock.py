@@ -0,0 +1,210 @@
+"""
+Stock reservation for sales.
+
+Stock is moved with conditional ``UPDATE`` statements rather than
+read-modify-write, so concurrent tills can't both sell the last unit:
+
+    UPDATE products
+       SET stock_quantity = stock_quantity - :qty, stock_status = ...
+     WHERE sku = :sku AND stock_quantity >= :qty AND ...
+
+The database evaluates the guard under the row's write lock, so a decrement
+either fits or touches no rows. Nothing here commits; callers run these in
+the sale's own transaction and roll back if a reservation fails.
+
+SKUs are always updated in sorted order so two orders locking overlapping
+products can't deadlock each other on PostgreSQL.
+"""
+
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, Mapping, Optional, Tuple
+
+from sqlalchemy import case, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.product import Product
+
+# sku -> (stock_quantity, stock_status) after the change
+StockLevels = Dict[str, Tuple[int, str]]
+
+
+class StockError(Exception):
+    """A reservation could not be made; the transaction should be rolled back"""
+
+    def __init__(self, sku: str, reason: str, requested: int, in_stock: Optional[int] = None):
+        self.sku = sku
+        self.reason = reason
+        self.requested = requested
+        self.in_stock = in_stock
+        super().__init__(f"{sku}: {reason}")
+
+
+def stock_status_for(quantity: int) -> str:
+    """Stock status implied by a quantity (never 'discontinued')"""
+    if quantity <= 0:
+        return 'out-of-stock'
+    if quantity <= settings.LOW_STOCK_THRESHOLD:
+        return 'low-stock'
+    return 'in-stock'
+
+
+def _status_expr(new_quantity):
+    # Same thresholds as stock_status_for(), evaluated by the database
+    return case(
+        (Product.stock_status == 'discontinued', Product.stock_status),
+        (new_quantity <= 0, 'out-of-stock'),
+        (new_quantity <= settings.LOW_STOCK_THRESHOLD, 'low-stock'),
+        else_='in-stock',
+    )
+
+
+def quantities_by_sku(lines: Iterable) -> Counter:
+    """
+    Total quantity per SKU for a set of sale lines.
+
+    Accepts anything with ``sku`` and ``qty`` attributes (SaleItem,
+    LineItemPayload).
+    """
+    totals: Counter = Counter()
+    for line in lines:
+        totals[line.sku] += line.qty
+    return totals
+
+
+def _raise_for(db: Session, sku: str, quantity: int) -> None:
+    """Raise the StockError for a failed decrement; returns if the SKU isn't in the catalog"""
+    product = db.execute(
+        select(Product.stock_quantity, Product.stock_status, Product.is_active).where(Product.sku == sku)
+    ).first()
+    if product is None:
+        return
+    if not product.is_active:
+        raise StockError(sku, "Product not found", quantity)
+    if product.stock_status == 'discontinued':
+        raise StockError(sku, "Product discontinued", quantity, 0)
+    raise StockError(sku, "Insufficient stock", quantity, product.stock_quantity)
+
+
+def reserve(db: Session, quantities: Mapping[str, int]) -> StockLevels:
+    """
+    Decrement stock for every SKU, or raise StockError.
+
+    SKUs that aren't in the catalog (custom or special-order lines) have no
+    stock to take and are skipped, as release() skips them.
+
+    Args:
+        db: Session whose transaction the updates join (not committed here)
+        quantities: Units to take per SKU
+
+    Returns:
+        New (stock_quantity, stock_status) for each SKU touched
+    """
+    levels: StockLevels = {}
+    for sku in sorted(quantities):
+        quantity = quantities[sku]
+        if quantity <= 0:
+            continue
+        new_quantity = Product.stock_quantity - quantity
+        row = db.execute(
+            update(Product)
+            .where(
+                Product.sku == sku,
+                Product.is_active == True,
+                Product.stock_status != 'discontinued',
+                Product.stock_quantity >= quantity,
+            )
+            .values(
+                stock_quantity=new_quantity,
+                stock_status=_status_expr(new_quantity),
+                updated_at=datetime.utcnow(),
+            )
+            .returning(Product.stock_quantity, Product.stock_status)
+            .execution_options(synchronize_session=False)
+        ).first()
+        if row is None:
+            _raise_for(db, sku, quantity)
+            continue
+        levels[sku] = (row.stock_quantity, row.stock_status)
+    return levels
+
+
+def reserve_or_undo(db: Session, quantities: Mapping[str, int]) -> StockLevels:
+    """
+    Like reserve(), but gives back its own partial decrements before
+    raising StockError, so the transaction can go on with other orders
+    (batch submission) instead of being rolled back.
+    """
+    levels: StockLevels = {}
+    taken: Dict[str, int] = {}
+    try:
+        for sku in sorted(quantities):
+            levels.update(reserve(db, {sku: quantities[sku]}))
+            taken[sku] = quantities[sku]
+    except StockError:
+        release(db, taken)
+        raise
+    return levels
+
+
+def lock(db: Session, skus: Iterable[str]) -> None:
+    """
+    Lock the product rows for ``skus`` in sorted order, for a transaction
+    that will reserve them across several orders in an arbitrary order.
+    A no-op on SQLite, where writers are serialized anyway.
+    """
+    skus = sorted(set(skus))
+    if skus:
+        db.execute(
+            select(Product.id).where(Product.sku.in_(skus)).order_by(Product.sku).with_for_update()
+        ).all()
+
+
+def release(db: Session, quantities: Mapping[str, int]) -> StockLevels:
+    """
+    Return stock for every SKU (cancelled orders, removed lines).
+
+    SKUs no longer in the catalog are skipped.
+
+    Returns:
+        New (stock_quantity, stock_status) for each SKU touched
+    """
+    levels: StockLevels = {}
+    for sku in sorted(quantities):
+        quantity = quantities[sku]
+        if quantity <= 0:
+            continue
+        new_quantity = Product.stock_quantity + quantity
+        row = db.execute(
+            update(Product)
+            .where(Product.sku == sku)
+            .values(
+                stock_quantity=new_quantity,
+                stock_status=_status_expr(new_quantity),
+                updated_at=datetime.utcnow(),
+            )
+            .returning(Product.stock_quantity, Product.stock_status)
+            .execution_options(synchronize_session=False)
+        ).first()
+        if row is not None:
+            levels[sku] = (row.stock_quantity, row.stock_status)
+    return levels
+
+
+def adjust(db: Session, old: Mapping[str, int], new: Mapping[str, int]) -> StockLevels:
+    """
+    Move stock from an order's old lines to its new lines.
+
+    Only the per-SKU difference is applied: releases first, then
+    reservations, so a line can be swapped for another without
+    transiently needing both. The rows are locked in one sorted pass up
+    front, since releasing and then reserving would otherwise take them
+    in two separately sorted runs.
+    """
+    deltas = Counter(new)
+    deltas.subtract(old)
+    lock(db, (sku for sku, d in deltas.items() if d))
+    levels = release(db, {sku: -d for sku, d in deltas.items() if d < 0})
+    levels.update(reserve(db, {sku: d for sku, d in deltas.items() if d > 0}))
+    return levels
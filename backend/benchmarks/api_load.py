@@ -0,0 +1,375 @@
+"""
+API load test: latency percentiles and throughput for the main endpoints.
+
+Seeds a synthetic database (benchmarks/synthetic_data.py), then drives
+the real app with concurrent clients through each scenario in turn:
+
+    catalog      GET   /api/products/paginated (a category's first page)
+    search       GET   /api/products/search?q=...
+    availability POST  /api/products/availability (3-line carts)
+    create       POST  /api/sales
+    patch        PATCH /api/sales/{id} (JSON Patch on a line quantity)
+    cancel       POST  /api/sales/{id}/cancel
+
+Two ways to reach the app:
+
+- ``--mode inprocess`` (default): httpx over ASGITransport in this process,
+  so it measures the app without a network or server in between. The
+  client shares the event loop with the app, which keeps absolute numbers
+  conservative at high concurrency
+- ``--mode http``: real HTTP, against ``--url`` or a uvicorn started here
+  (``--server-workers`` processes) on the seeded database
+
+Results (per scenario: requests, errors, throughput, p50/p95/p99/max in
+ms) are printed and written as JSON, together with the scale, mode and
+git revision, so runs can be compared.
+
+Run from the backend directory:
+    python -m benchmarks.api_load run --scale small
+    python -m benchmarks.api_load run --scale medium --mode http --concurrency 64 --out medium-http.json
+    python -m benchmarks.api_load run --db-url sqlite:///bench.db --no-seed --scenarios catalog,search
+    python -m benchmarks.api_load compare baseline.json current.json --threshold 0.15
+
+``compare`` flags a scenario when its p95 rises or its throughput falls
+by more than the threshold, or when it errors more, and exits 1 if
+anything regressed.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Callable, List, Optional
+
+import httpx
+
+SCENARIOS = ["catalog", "search", "availability", "create", "patch", "cancel"]
+SEARCH_TERMS = ["oak", "table", "velvet chair", "lamp", "SYN-00001", "nordic", "brass pend", "desk", "ru"]
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return 0.0
+    rank = max(1, int(round(fraction * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(latencies: List[float], errors: Counter, elapsed: float) -> dict:
+    ordered = sorted(latencies)
+    ms = lambda seconds: round(seconds * 1000, 3)  # noqa: E731
+    return {
+        "requests": len(ordered),
+        "errors": sum(errors.values()),
+        "error_statuses": {str(status): count for status, count in sorted(errors.items())},
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(ordered) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": ms(percentile(ordered, 0.50)),
+        "p95_ms": ms(percentile(ordered, 0.95)),
+        "p99_ms": ms(percentile(ordered, 0.99)),
+        "mean_ms": ms(sum(ordered) / len(ordered)) if ordered else 0.0,
+        "max_ms": ms(ordered[-1]) if ordered else 0.0,
+    }
+
+
+class Workload:
+    """Request builders for each scenario; create feeds patch and cancel with order ids"""
+
+    def __init__(self, skus: List[str], categories: List[str], seed: int):
+        self.skus = skus
+        self.categories = categories
+        self.rng = random.Random(seed)
+        self.created: List[int] = []
+
+    def _customer(self, i: int) -> dict:
+        return {"firstName": "Load", "lastName": f"Test{i}", "phone": f"04{i % 10**8:08d}",
+                "email": f"load{i}@example.com"}
+
+    def request(self, scenario: str, i: int) -> Optional[tuple]:
+        """(method, url, json body, expected status), or None when there's nothing to do"""
+        rng = self.rng
+        if scenario == "catalog":
+            params = f"page_size=50&include_total=false&category={rng.choice(self.categories)}"
+            return "GET", f"/api/products/paginated?{params}", None, 200
+        if scenario == "search":
+            return "GET", f"/api/products/search?q={rng.choice(SEARCH_TERMS)}", None, 200
+        if scenario == "availability":
+            items = [{"sku": sku, "quantity": rng.randint(1, 3)} for sku in rng.sample(self.skus, 3)]
+            return "POST", "/api/products/availability", {"items": items}, 200
+        if scenario == "create":
+            items = [{"sku": sku, "name": sku, "qty": rng.randint(1, 3), "price": 10}
+                     for sku in rng.sample(self.skus, rng.randint(1, 5))]
+            body = {
+                "customer": self._customer(i), "items": items,
+                "delivery": {"preferredDate": "", "timeSlot": "", "specialInstructions": "",
+                             "whiteGloveService": False, "oldMattressRemoval": False, "setupService": False},
+                "payment": {"method": "card", "discountPercent": 0},
+                "status": "confirmed",
+            }
+            return "POST", "/api/sales", body, 201
+        if not self.created:
+            return None
+        if scenario == "patch":
+            order_id = self.created[i % len(self.created)]
+            return "PATCH", f"/api/sales/{order_id}", [
+                {"op": "replace", "path": "/items/0/qty", "value": 1 + i % 3}
+            ], 200
+        if scenario == "cancel":
+            if i >= len(self.created):
+                return None
+            return "POST", f"/api/sales/{self.created[i]}/cancel", None, 204
+        raise ValueError(f"Unknown scenario '{scenario}'")
+
+    def completed(self, scenario: str, response: httpx.Response) -> None:
+        if scenario == "create":
+            self.created.append(response.json()["id"])
+
+
+async def drive(client: httpx.AsyncClient, workload: Workload, scenario: str, requests: int, concurrency: int) -> dict:
+    latencies: List[float] = []
+    errors: Counter = Counter()
+    indexes = iter(range(requests))
+
+    async def user() -> None:
+        for i in indexes:
+            planned = workload.request(scenario, i)
+            if planned is None:
+                return
+            method, url, body, expected = planned
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, url, json=body)
+            except httpx.HTTPError as exc:
+                latencies.append(time.perf_counter() - started)
+                errors[type(exc).__name__] += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != expected:
+                errors[response.status_code] += 1
+            else:
+                workload.completed(scenario, response)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+async def run_scenarios(client: httpx.AsyncClient, workload: Workload, scenarios: List[str],
+                        requests: int, concurrency: int, warmup: int, log: Callable = print) -> dict:
+    results = {}
+    for scenario in scenarios:
+        if warmup and scenario in ("catalog", "search", "availability"):
+            await drive(client, workload, scenario, warmup, concurrency)
+        results[scenario] = result = await drive(client, workload, scenario, requests, concurrency)
+        log(f"  {scenario:<13} {result['requests']:>6} req  {result['throughput_rps']:>8.1f} req/s  "
+            f"p50={result['p50_ms']:.1f}ms p95={result['p95_ms']:.1f}ms p99={result['p99_ms']:.1f}ms  "
+            f"errors={result['errors']}")
+    return results
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start_server(db_url: str, workers: int) -> tuple:
+    port = _free_port()
+    env = {**os.environ, "DATABASE_URL": db_url, "JOB_WORKERS": "0"}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))), env=env,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{url}/api/health", timeout=1).status_code == 200:
+                return server, url
+        except httpx.HTTPError:
+            pass
+        if server.poll() is not None:
+            raise RuntimeError("uvicorn exited during startup")
+        time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("uvicorn did not start within 60s")
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(__file__)).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args) -> dict:
+    tmpdir = None
+    db_url = args.db_url
+    if db_url is None:
+        tmpdir = tempfile.mkdtemp(prefix="api-load-")
+        db_url = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+    # The app reads its settings at import; point it at the benchmark database first
+    os.environ["DATABASE_URL"] = db_url
+    os.environ["JOB_WORKERS"] = "0"
+    from benchmarks import synthetic_data
+    from sqlalchemy import create_engine, select
+
+    products, sales = synthetic_data.SCALES[args.scale]
+    products = args.products or products
+    sales = args.sales if args.sales is not None else sales
+    seeded = None
+    if not args.no_seed:
+        print(f"seeding {products} products, {sales} sales into {db_url}")
+        seeded = synthetic_data.seed(db_url, products, sales, args.seed)
+
+    from app.models.product import Product
+    engine = create_engine(db_url)
+    with engine.connect() as conn:
+        skus = list(conn.execute(select(Product.sku).where(Product.is_active == True).limit(50_000)).scalars())  # noqa: E712
+        categories = list(conn.execute(select(Product.category).distinct()).scalars())
+    engine.dispose()
+    workload = Workload(skus, [c for c in categories if c], args.seed)
+    scenarios = args.scenarios.split(",") if args.scenarios else SCENARIOS
+
+    async def go() -> dict:
+        if args.mode == "inprocess":
+            from app import main as app_main
+            app_main.on_startup()
+            transport = httpx.ASGITransport(app=app_main.app)
+            try:
+                async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                    return await run_scenarios(client, workload, scenarios, args.requests, args.concurrency, args.warmup)
+            finally:
+                app_main.on_shutdown()
+        server, url = (None, args.url) if args.url else _start_server(db_url, args.server_workers)
+        try:
+            limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+            async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+                return await run_scenarios(client, workload, scenarios, args.requests, args.concurrency, args.warmup)
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait(timeout=30)
+
+    print(f"{args.mode}: {args.concurrency} concurrent clients, {args.requests} requests per scenario")
+    results = asyncio.run(go())
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_revision": _git_revision(),
+            "mode": args.mode,
+            "scale": args.scale,
+            "products": products,
+            "sales": sales,
+            "seeded": seeded,
+            "database": db_url.split(":", 1)[0],
+            "concurrency": args.concurrency,
+            "requests_per_scenario": args.requests,
+            "server_workers": args.server_workers if args.mode == "http" and not args.url else None,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> List[dict]:
+    """Per-scenario changes; ``regressed`` when p95, throughput or errors got worse past ``threshold``"""
+    rows = []
+    for scenario, new in current["results"].items():
+        old = baseline["results"].get(scenario)
+        if old is None:
+            continue
+        p95_change = (new["p95_ms"] - old["p95_ms"]) / old["p95_ms"] if old["p95_ms"] else 0.0
+        rps_change = (new["throughput_rps"] - old["throughput_rps"]) / old["throughput_rps"] if old["throughput_rps"] else 0.0
+        old_rate = old["errors"] / max(old["requests"], 1)
+        new_rate = new["errors"] / max(new["requests"], 1)
+        reasons = []
+        if p95_change > threshold:
+            reasons.append(f"p95 +{p95_change:.0%}")
+        if rps_change < -threshold:
+            reasons.append(f"throughput {rps_change:.0%}")
+        if new_rate > old_rate:
+            reasons.append(f"error rate {old_rate:.1%} -> {new_rate:.1%}")
+        rows.append({
+            "scenario": scenario,
+            "p95_ms": (old["p95_ms"], new["p95_ms"]),
+            "p95_change": p95_change,
+            "throughput_rps": (old["throughput_rps"], new["throughput_rps"]),
+            "throughput_change": rps_change,
+            "regressed": bool(reasons),
+            "reasons": reasons,
+        })
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Seed a database and load-test the API")
+    run_parser.add_argument("--mode", choices=["inprocess", "http"], default="inprocess")
+    run_parser.add_argument("--url", default=None, help="http mode: test a running server instead of starting one")
+    run_parser.add_argument("--server-workers", type=int, default=1, help="http mode: uvicorn worker processes")
+    run_parser.add_argument("--db-url", default=None, help="Default: a temporary SQLite file")
+    run_parser.add_argument("--no-seed", action="store_true", help="Use the data already in --db-url")
+    run_parser.add_argument("--scale", choices=["small", "medium", "large"], default="small")
+    run_parser.add_argument("--products", type=int, default=None)
+    run_parser.add_argument("--sales", type=int, default=None)
+    run_parser.add_argument("--scenarios", default=None, help=f"Comma-separated subset of {','.join(SCENARIOS)}")
+    run_parser.add_argument("--requests", type=int, default=1000, help="Requests per scenario")
+    run_parser.add_argument("--concurrency", type=int, default=16)
+    run_parser.add_argument("--warmup", type=int, default=100, help="Unmeasured requests before each read scenario")
+    run_parser.add_argument("--seed", type=int, default=1)
+    run_parser.add_argument("--out", default=None, help=f"Result file (default: a timestamped file in {RESULTS_DIR})")
+
+    compare_parser = commands.add_parser("compare", help="Compare two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.10, help="Allowed fractional change")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        report = run(args)
+        out = args.out
+        if out is None:
+            os.makedirs(RESULTS_DIR, exist_ok=True)
+            stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+            out = os.path.join(RESULTS_DIR, f"api_load-{args.scale}-{args.mode}-{stamp}.json")
+        with open(out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"results written to {out}")
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    for field in ("mode", "scale", "products", "sales", "concurrency", "database"):
+        if baseline["meta"].get(field) != current["meta"].get(field):
+            print(f"warning: {field} differs ({baseline['meta'].get(field)} vs {current['meta'].get(field)})")
+    rows = compare(baseline, current, args.threshold)
+    for row in rows:
+        (old_p95, new_p95), (old_rps, new_rps) = row["p95_ms"], row["throughput_rps"]
+        flag = "REGRESSED " + ", ".join(row["reasons"]) if row["regressed"] else "ok"
+        print(f"  {row['scenario']:<13} p95 {old_p95:.1f} -> {new_p95:.1f}ms ({row['p95_change']:+.0%})  "
+              f"{old_rps:.0f} -> {new_rps:.0f} req/s ({row['throughput_change']:+.0%})  {flag}")
+    if any(row["regressed"] for row in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
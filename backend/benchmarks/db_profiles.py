@@ -0,0 +1,126 @@
+"""
+Connection pool / SQLite pragma profile benchmark.
+
+Runs the same mixed read/write workload against a fresh SQLite file twice:
+
+- baseline: the old engine setup (pre-ping on every checkout, rollback
+  journal, default synchronous/cache settings)
+- tuned: the settings-driven setup from app/core/db.py (WAL,
+  synchronous=NORMAL, mmap, larger cache, busy_timeout, no pre-ping)
+
+Reads look products up by SKU; writes take and return a unit of stock
+through app.services.stock, each in its own transaction.
+
+Run from the backend directory:
+    python -m benchmarks.db_profiles
+    python -m benchmarks.db_profiles --threads 32 --seconds 10 --write-ratio 0.3
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import Settings
+from app.core.db import Base, create_db_engine
+from app.models.product import Product
+from app.services import stock
+
+PROFILES = {
+    "baseline": dict(SQLITE_PRAGMAS_ENABLED=False, DB_POOL_PRE_PING=True),
+    "tuned": dict(),
+}
+
+
+def _seed(engine, products: int) -> list:
+    Base.metadata.create_all(bind=engine, tables=[Product.__table__])
+    skus = [f"P-{i:06d}" for i in range(products)]
+    with engine.begin() as conn:
+        conn.execute(Product.__table__.insert(), [
+            {"sku": sku, "name": f"Product {i}", "price": 10, "stock_status": "in-stock",
+             "stock_quantity": 1_000_000, "is_active": True}
+            for i, sku in enumerate(skus)
+        ])
+    return skus
+
+
+def run(profile: str, threads: int, seconds: float, write_ratio: float, products: int) -> dict:
+    tmpdir = tempfile.mkdtemp(prefix="db-profile-")
+    url = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+    config = Settings(DB_POOL_SIZE=threads, DB_MAX_OVERFLOW=0, **PROFILES[profile])
+    engine = create_db_engine(url, config)
+    Session = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+    skus = _seed(engine, products)
+
+    counts = Counter()
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker(seed: int) -> None:
+        rng = random.Random(seed)
+        local = Counter()
+        while time.perf_counter() < deadline:
+            sku = rng.choice(skus)
+            db = Session()
+            try:
+                if rng.random() < write_ratio:
+                    stock.reserve(db, {sku: 1})
+                    db.commit()
+                    stock.release(db, {sku: 1})
+                    db.commit()
+                    local["writes"] += 1
+                else:
+                    db.execute(select(Product).where(Product.sku == sku)).scalar_one()
+                    local["reads"] += 1
+            except OperationalError:
+                db.rollback()
+                local["locked_errors"] += 1
+            finally:
+                db.close()
+        with lock:
+            counts.update(local)
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - started
+    engine.dispose()
+
+    ops = counts["reads"] + counts["writes"]
+    return {
+        "profile": profile,
+        "threads": threads,
+        "ops_per_s": round(ops / elapsed, 1),
+        "reads_per_s": round(counts["reads"] / elapsed, 1),
+        "writes_per_s": round(counts["writes"] / elapsed, 1),
+        "locked_errors": counts["locked_errors"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profile", choices=[*PROFILES, "both"], default="both")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    parser.add_argument("--products", type=int, default=5000)
+    args = parser.parse_args()
+
+    profiles = list(PROFILES) if args.profile == "both" else [args.profile]
+    for profile in profiles:
+        result = run(profile, args.threads, args.seconds, args.write_ratio, args.products)
+        print("  ".join(f"{k}={v}" for k, v in result.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Delivery fee quote benchmark.
+
+Builds a fee table with a mix of exact postcodes, ranges and prefixes
+(like a national zone map) and times ``FeeTable.quote`` on random
+postcodes. No database involved: this is the per-request cost once a
+worker has its compiled table.
+
+Run from the backend directory:
+    python -m benchmarks.fee_quotes
+    python -m benchmarks.fee_quotes --zones 2000 --quotes 500000
+"""
+
+import argparse
+import random
+import time
+from decimal import Decimal
+
+from app.services.delivery_fees import FeeRule, FeeTable, Zone
+
+
+def synthetic_table(zones: int, seed: int) -> FeeTable:
+    rng = random.Random(seed)
+    rules = (
+        FeeRule(0, 2, 0, 3000, Decimal("29"), Decimal("5"), Decimal("0")),
+        FeeRule(0, None, 0, None, Decimal("49"), Decimal("0"), Decimal("1.50")),
+    )
+    specs = []
+    for i in range(zones):
+        kind = rng.choice(("range", "range", "exact", "prefix"))
+        if kind == "range":
+            low = rng.randrange(800, 9900)
+            spec = f"{low}-{low + rng.randrange(1, 100)}"
+        elif kind == "exact":
+            spec = ", ".join(str(rng.randrange(800, 9999)) for _ in range(rng.randrange(1, 10)))
+        else:
+            spec = f"{rng.randrange(1, 99)}*"
+        zone = Zone(f"z{i}", f"Zone {i}", Decimal("150"), Decimal("75"), Decimal("50"), rules)
+        specs.append((zone, spec))
+    specs.append((Zone("rest", "Everywhere", Decimal("0"), Decimal("0"), Decimal("0"), rules), "*"))
+    return FeeTable.build(specs)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--zones", type=int, default=500)
+    parser.add_argument("--quotes", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    table = synthetic_table(args.zones, args.seed)
+    built = time.perf_counter() - started
+
+    rng = random.Random(args.seed)
+    carts = [(str(rng.randrange(800, 9999)), rng.randrange(1, 6), rng.randrange(0, 6000), rng.random() < 0.2)
+             for _ in range(args.quotes)]
+    started = time.perf_counter()
+    for postcode, items, volume, white_glove in carts:
+        table.quote(postcode, items, volume, white_glove=white_glove)
+    elapsed = time.perf_counter() - started
+
+    print(f"zones={args.zones} segments={len(table.range_segments)} build={built * 1000:.1f}ms")
+    print(f"{args.quotes} quotes in {elapsed:.2f}s: {elapsed / args.quotes * 1e6:.2f}us/quote")
+
+
+if __name__ == "__main__":
+    main()
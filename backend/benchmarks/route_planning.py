@@ -0,0 +1,91 @@
+"""
+Route planning benchmark on synthetic delivery days.
+
+Generates days of N stops scattered around the depot, each in one of the
+default morning/afternoon/evening windows with a random service time and
+load, and plans them with app.services.routing.solve. Reports the
+construction and final cost (travel minutes + lateness penalty), late
+stops, total distance and wall time.
+
+Run from the backend directory:
+    python -m benchmarks.route_planning
+    python -m benchmarks.route_planning --sizes 50 200 1000 --budget 5 --workers 4
+"""
+
+import argparse
+import math
+import os
+import random
+import time
+
+from app.services.routing import RoutingProblem, Stop, solve
+
+DEPOT = (-33.8688, 151.2093)
+WINDOWS = [(8 * 60, 12 * 60), (12 * 60, 17 * 60), (17 * 60, 20 * 60)]
+# Fleet sized so service plus this much driving fits each window
+TRAVEL_ALLOWANCE = 0.6
+
+
+def synthetic_day(stops: int, radius_km: float, seed: int) -> RoutingProblem:
+    rng = random.Random(seed)
+    km_per_degree = 111.32
+    points = []
+    for i in range(stops):
+        # Denser towards the centre, like a city
+        distance = radius_km * math.sqrt(rng.random()) * rng.choice((0.4, 1.0))
+        bearing = rng.uniform(0, 2 * math.pi)
+        lat = DEPOT[0] + distance * math.sin(bearing) / km_per_degree
+        lon = DEPOT[1] + distance * math.cos(bearing) / (km_per_degree * math.cos(math.radians(DEPOT[0])))
+        points.append(Stop(
+            id=i, lat=lat, lon=lon,
+            service_minutes=rng.choice((20, 30, 30, 40, 60)),
+            volume_l=rng.choice((200, 500, 1200, 1500)),
+            window=rng.choices(WINDOWS, weights=(4, 5, 1))[0],
+        ))
+    vehicles = max(
+        math.ceil(sum(s.service_minutes for s in points if s.window == w) * (1 + TRAVEL_ALLOWANCE) / (w[1] - w[0]))
+        for w in WINDOWS
+    )
+    return RoutingProblem(depot=DEPOT, stops=points, vehicles=max(1, vehicles), capacity_l=36000)
+
+
+def run(stops: int, budget: float, workers: int, radius_km: float, seed: int) -> dict:
+    problem = synthetic_day(stops, radius_km, seed)
+    started = time.perf_counter()
+    plan = solve(problem, time_budget=budget, workers=workers)
+    elapsed = time.perf_counter() - started
+    return {
+        "stops": stops,
+        "trucks": problem.vehicles,
+        "routed": sum(len(r.visits) for r in plan.routes),
+        "unassigned": len(plan.unassigned),
+        "late": sum(1 for r in plan.routes for v in r.visits if v.late > 0),
+        "distance_km": sum(r.distance_km for r in plan.routes),
+        "construction_cost": plan.construction_cost,
+        "cost": plan.cost,
+        "seconds": elapsed,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 200, 1000])
+    parser.add_argument("--budget", type=float, default=5.0, help="Local search seconds per day")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--radius-km", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"budget={args.budget}s workers={args.workers}")
+    print(f"{'stops':>6} {'trucks':>6} {'routed':>6} {'late':>5} {'km':>9} {'built':>10} {'final':>10} {'gain':>6} {'secs':>6}")
+    for size in args.sizes:
+        r = run(size, args.budget, args.workers, args.radius_km, args.seed)
+        gain = 1 - r["cost"] / r["construction_cost"] if r["construction_cost"] else 0.0
+        print(
+            f"{r['stops']:>6} {r['trucks']:>6} {r['routed']:>6} {r['late']:>5} {r['distance_km']:>9.1f} "
+            f"{r['construction_cost']:>10.0f} {r['cost']:>10.0f} {gain:>6.1%} {r['seconds']:>6.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
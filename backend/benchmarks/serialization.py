@@ -0,0 +1,168 @@
+"""
+Response serialization microbenchmark.
+
+Times, per endpoint, turning the endpoint's content into response bytes:
+
+- ``response_model``: what FastAPI does with a returned model (validate it
+  against the route's response_model, serialize, JSONResponse)
+- ``jsonable_encoder``: what the catalog cache did for its bodies
+- ``fast path``: app/api/serialization.render, which the endpoints use now
+
+plus ``build``, the cost of making the models from ORM rows, which both
+paths share. Rows are built in memory, so no database is involved; each
+case also checks that every path produced the same bytes.
+
+Run from the backend directory:
+    python -m benchmarks.serialization
+    python -m benchmarks.serialization --repeat 2000 --lines 40
+"""
+
+import argparse
+import json
+import random
+import time
+import warnings
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any, Callable, List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+
+from app.api.routers.products import _product_to_read
+from app.api.routers.sales import _sale_to_read, _sale_to_summary
+from app.api.serialization import render
+from app.models.product import Product
+from app.models.sale import Sale, SaleItem
+from app.schemas.product import ProductList, ProductRead
+from app.schemas.sale import SaleList, SaleOrderRead
+from benchmarks.synthetic_data import ADJECTIVES, CATEGORIES, COLORS, FIRST_NAMES, LAST_NAMES, NOUNS, product_sku
+
+
+def synthetic_products(count: int, rng: random.Random) -> List[Product]:
+    now = datetime.utcnow()
+    products = []
+    for i in range(count):
+        colors = rng.sample(COLORS, rng.randint(0, 3))
+        products.append(Product(
+            id=i + 1, sku=product_sku(i), name=f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {i}",
+            price=Decimal(rng.randrange(1_000, 500_000)) / 100, category=rng.choice(CATEGORIES), image=None,
+            stock_status="in-stock", stock_quantity=rng.randrange(100),
+            colors_json=json.dumps([
+                {"name": name, "value": value, "inStock": True, "image": None} for name, value in colors
+            ]) if colors else None,
+            is_active=True, created_at=now, updated_at=now,
+        ))
+    return products
+
+
+def synthetic_sales(count: int, lines: int, rng: random.Random) -> List[Sale]:
+    start = datetime(2024, 1, 1)
+    sales = []
+    for i in range(count):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        sale = Sale(
+            id=i + 1, order_number=1000 + i, status="confirmed",
+            created_at=start + timedelta(seconds=rng.randrange(365 * 86400)),
+            customer_json=json.dumps({
+                "firstName": first, "lastName": last, "name": None, "phone": f"04{rng.randrange(10**8):08d}",
+                "email": f"{first}.{last}@example.com".lower(), "additionalPhone": None, "secondPerson": None,
+                "billingAddress": None, "sameAsDelivery": True,
+                "deliveryAddress": {"unit": None, "street": f"{i} Main St", "street2": None, "city": "Perth",
+                                    "state": "WA", "zip": "6000", "notes": None},
+            }),
+            delivery_json=json.dumps({
+                "preferredDate": "2024-06-10", "timeSlot": "am", "specialInstructions": "",
+                "whiteGloveService": False, "oldMattressRemoval": False, "setupService": False,
+            }),
+            payment_json=json.dumps({"method": "card", "depositAmount": 0.0, "discountPercent": 0.0}),
+        )
+        sale.items = [
+            SaleItem(id=i * lines + n, sku=product_sku(n), name=f"Item {n}",
+                     unit_price=Decimal(rng.randrange(1_000, 500_000)) / 100, qty=rng.randint(1, 3), color=None)
+            for n in range(lines)
+        ]
+        sale.subtotal = sum(item.unit_price * item.qty for item in sale.items)
+        sale.delivery_fee = sale.discount = Decimal("0.00")
+        sale.total = sale.subtotal
+        sales.append(sale)
+    return sales
+
+
+def _timed(fn: Callable[[], Any], repeat: int) -> float:
+    """Best of three runs, in microseconds per call"""
+    best = float("inf")
+    for _ in range(3):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        best = min(best, time.perf_counter() - started)
+    return best / repeat * 1e6
+
+
+def bench(name: str, response_model: Any, build: Callable[[], Any], repeat: int, catalog: bool = False) -> dict:
+    field = APIRoute("/bench", lambda: None, response_model=response_model).response_field
+    content = build()
+
+    def via_response_model() -> bytes:
+        value, errors = field.validate(content, {}, loc=("response",))
+        assert not errors
+        return JSONResponse(content=field.serialize(value, by_alias=True)).body
+
+    def via_jsonable_encoder() -> bytes:
+        return JSONResponse(content=jsonable_encoder(content)).body
+
+    fast = render(content)
+    assert via_response_model() == fast, f"{name}: fast path bytes differ"
+    assert not catalog or via_jsonable_encoder() == fast, f"{name}: catalog bytes differ"
+
+    result = {
+        "endpoint": name,
+        "bytes": len(fast),
+        "build_us": _timed(build, repeat),
+        "response_model_us": _timed(via_response_model, repeat),
+        "fast_us": _timed(lambda: render(content), repeat),
+    }
+    if catalog:
+        result["jsonable_encoder_us"] = _timed(via_jsonable_encoder, repeat)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=500, help="Calls per timing run")
+    parser.add_argument("--lines", type=int, default=20, help="Line items per sale")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    products = synthetic_products(100, rng)
+    reads = [_product_to_read(p) for p in products]
+    sales = synthetic_sales(50, args.lines, rng)
+
+    cases = [
+        ("GET /products (100)", List[ProductRead], lambda: [_product_to_read(p) for p in products], True),
+        ("GET /products/paginated (50)", ProductList,
+         lambda: ProductList(items=reads[:50], total=len(reads), page=1, page_size=50, has_more=True), True),
+        ("GET /products/search (20)", List[ProductRead], lambda: [_product_to_read(p) for p in products[:20]], False),
+        ("GET /products/{sku}", ProductRead, lambda: _product_to_read(products[0]), False),
+        (f"GET /sales/{{id}} ({args.lines} lines)", SaleOrderRead, lambda: _sale_to_read(sales[0]), False),
+        ("GET /sales (50 summaries)", SaleList,
+         lambda: SaleList(items=[_sale_to_summary(s) for s in sales], page_size=50, has_more=True), False),
+        (f"GET /sales?include_items (50 x {args.lines})", SaleList,
+         lambda: SaleList(items=[_sale_to_read(s) for s in sales], page_size=50, has_more=True), False),
+    ]
+    print(f"{'endpoint':<34} {'bytes':>8} {'build':>10} {'resp_model':>11} {'encoder':>10} {'fast':>10} {'speedup':>8}")
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        for name, response_model, build, catalog in cases:
+            r = bench(name, response_model, build, args.repeat, catalog)
+            baseline = r.get("jsonable_encoder_us", r["response_model_us"])
+            encoder = f"{r['jsonable_encoder_us']:.1f}" if catalog else "-"
+            print(f"{name:<34} {r['bytes']:>8} {r['build_us']:>8.1f}us {r['response_model_us']:>9.1f}us "
+                  f"{encoder:>8}us {r['fast_us']:>8.1f}us {baseline / r['fast_us']:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import pytest
+from decimal import Decimal
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.api.routers import products, reports, sales
+from app.core.db import Base, get_db
+from app.models.product import Product
+from app.services import order_numbers
+from app.services.catalog_cache import catalog_cache
+from app.services.product_search import ensure_search_index
+from app.services.reporting import ensure_rollups
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    """A file-backed SQLite database with the full schema (file, not :memory:, so threads share it)"""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'app.db'}",
+        connect_args={"check_same_thread": False, "timeout": 30},
+    )
+    Base.metadata.create_all(bind=engine)
+    ensure_search_index(engine)
+    ensure_rollups(engine)
+    yield sessionmaker(bind=engine, autocommit=False, autoflush=False)
+    engine.dispose()
+
+
+@pytest.fixture
+def add_products(session_factory):
+    def add(*specs):
+        """Insert products from (sku, price, stock_quantity[, category]) tuples"""
+        with session_factory() as db:
+            for sku, price, quantity, *category in specs:
+                db.add(Product(sku=sku, name=sku, price=Decimal(price), category=category[0] if category else None,
+                               stock_quantity=quantity, stock_status="in-stock" if quantity else "out-of-stock"))
+            db.commit()
+    return add
+
+
+@pytest.fixture
+def client(session_factory, monkeypatch):
+    """The products, sales and reports routers on the test database"""
+    # The allocator caches its counter per process; give each database its own
+    monkeypatch.setattr(order_numbers, "allocator", order_numbers.OrderNumberAllocator(block_size=10))
+    catalog_cache.invalidate()
+
+    app = FastAPI()
+    for router in (products.router, sales.router, reports.router):
+        app.include_router(router, prefix="/api")
+
+    def get_test_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = get_test_db
+    with TestClient(app) as test_client:
+        yield test_client
+    catalog_cache.invalidate()
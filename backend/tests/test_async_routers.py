@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.api.routers import products, products_async, sales_async
+from app.core.db import engine_options, get_async_db, install_sqlite_pragmas
+from app.models.product import Product
+from app.services import order_numbers
+from app.services.catalog_cache import catalog_cache
+
+ORDER = {
+    "customer": {"firstName": "A", "lastName": "B", "phone": "0400 000 000", "email": "a@b.c"},
+    "delivery": {"preferredDate": "", "timeSlot": "", "specialInstructions": "",
+                 "whiteGloveService": False, "oldMattressRemoval": False, "setupService": False},
+    "payment": {"method": "cash"},
+    "items": [{"sku": "CH-1", "name": "Chair", "qty": 3, "price": "10.00"}],
+    "status": "confirmed",
+}
+
+
+@pytest.fixture
+def async_client(session_factory, tmp_path, monkeypatch):
+    """The async products and sales routers (DB_ASYNC=true) on the test database through aiosqlite"""
+    monkeypatch.setattr(order_numbers, "allocator", order_numbers.OrderNumberAllocator(block_size=10))
+    catalog_cache.invalidate()
+    url = f"sqlite+aiosqlite:///{tmp_path / 'app.db'}"
+    engine = create_async_engine(url, **engine_options(url))
+    install_sqlite_pragmas(engine.sync_engine)
+    sessions = async_sessionmaker(bind=engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+    app = FastAPI()
+    for router in (products_async.router, sales_async.router):
+        app.include_router(router, prefix="/api")
+
+    async def get_test_db():
+        async with sessions() as db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = get_test_db
+    with TestClient(app) as client:
+        yield client
+        client.portal.call(engine.dispose)
+    catalog_cache.invalidate()
+
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def test_products_and_sales_through_the_async_routers(async_client, add_products, session_factory, monkeypatch):
+    add_products(("CH-1", "10.00", 10, "Chairs"), ("TB-1", "99.00", 2, "Tables"))
+    # The snapshot is built and the body rendered off the event loop
+    install, store_body = catalog_cache.install, products._store_body
+    on_loop = []
+    monkeypatch.setattr(catalog_cache, "install", lambda *args: on_loop.append(_on_event_loop()) or install(*args))
+    monkeypatch.setattr(products, "_store_body", lambda *args: on_loop.append(_on_event_loop()) or store_body(*args))
+
+    listed = async_client.get("/api/products")
+    assert listed.status_code == 200
+    assert [p["sku"] for p in listed.json()] == ["CH-1", "TB-1"]
+    assert on_loop == [False, False]
+    assert async_client.get("/api/products", headers={"If-None-Match": listed.headers["etag"]}).status_code == 304
+    assert async_client.get("/api/products/categories/list").json() == ["Chairs", "Tables"]
+    assert [p["sku"] for p in async_client.get("/api/products/search", params={"q": "tb"}).json()] == ["TB-1"]
+    assert async_client.get("/api/products/paginated", params={"page_size": 1}).json()["has_more"]
+
+    created = async_client.post("/api/sales", json=ORDER)
+    assert created.status_code == 201
+    order_id = created.json()["id"]
+    assert async_client.get(f"/api/sales/{order_id}").json()["items"][0]["qty"] == 3
+    assert [s["id"] for s in async_client.get("/api/sales").json()["items"]] == [order_id]
+    chair = next(p for p in async_client.get("/api/products").json() if p["sku"] == "CH-1")
+    assert chair["stock"]["quantity"] == 7
+
+    assert async_client.post(f"/api/sales/{order_id}/cancel").status_code == 204
+    assert async_client.get(f"/api/sales/{order_id}").json()["status"] == "cancelled"
+    with session_factory() as db:
+        assert db.execute(select(Product.stock_quantity).where(Product.sku == "CH-1")).scalar_one() == 10
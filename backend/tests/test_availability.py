@@ -0,0 +1,51 @@
+import json
+
+from app.models.product import Product
+
+COLORS = json.dumps([
+    {"name": "Oak", "value": "#C8956D", "inStock": True},
+    {"name": "Black", "value": "#000000", "inStock": True},
+    {"name": "Red", "value": "#FF0000", "inStock": False},
+])
+
+
+def _add_chairs(session_factory, quantity):
+    with session_factory() as db:
+        db.add(Product(sku="CH-1", name="Chair", price=10, stock_quantity=quantity, stock_status="in-stock",
+                       colors_json=COLORS))
+        db.commit()
+
+
+def _check(client, *lines):
+    response = client.post("/api/products/availability", json={"items": [
+        {"sku": sku, "quantity": quantity, **({"color": color} if color else {})} for sku, quantity, color in lines
+    ]})
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_lines_of_one_sku_share_its_stock(client, session_factory):
+    _add_chairs(session_factory, 5)
+
+    # Each line fits on its own, but not together
+    body = _check(client, ("CH-1", 3, "Oak"), ("CH-1", 3, "Black"))
+    assert [line["available"] for line in body["items"]] == [False, False]
+    assert [line["requested"] for line in body["items"]] == [3, 3]
+    assert body["items"][0]["reason"] == "Insufficient stock" and not body["allAvailable"]
+
+    body = _check(client, ("CH-1", 3, "Oak"), ("CH-1", 2, "Black"))
+    assert body["allAvailable"]
+
+
+def test_line_results_keep_request_order(client, session_factory):
+    _add_chairs(session_factory, 5)
+    body = _check(client, ("NOPE", 1, None), ("CH-1", 1, "Red"), ("CH-1", 1, "Blue"), ("CH-1", 2, None))
+
+    assert [(line["sku"], line["available"], line["reason"]) for line in body["items"]] == [
+        ("NOPE", False, "Product not found"),
+        ("CH-1", False, "Color out of stock"),
+        ("CH-1", False, "Color not available"),
+        # 1 + 1 + 2 chairs asked for, 5 in stock
+        ("CH-1", True, None),
+    ]
+    assert not body["allAvailable"]
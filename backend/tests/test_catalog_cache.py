@@ -0,0 +1,120 @@
+import threading
+from decimal import Decimal
+
+from sqlalchemy import event, select
+
+from app.api.routers.products import _product_to_read
+from app.models.product import Product
+from app.services.catalog_cache import CachedBody, CatalogCache, catalog_cache
+
+
+def _skus(entries):
+    return [entry.sku for entry in entries]
+
+
+def _product(db, sku):
+    return db.execute(select(Product).where(Product.sku == sku)).scalar_one()
+
+
+def test_writes_patch_the_snapshot_in_place(session_factory, add_products):
+    add_products(("B-1", "10.00", 5), ("D-1", "10.00", 5))
+    cache = CatalogCache(max_items=10, ttl_seconds=0)
+    with session_factory() as db:
+        assert _skus(cache.entries(db, _product_to_read)) == ["B-1", "D-1"]
+        cache.put_body("all", CachedBody.from_bytes(b"[]"), cache.version)
+
+        db.add(Product(sku="C-1", name="C-1", price=Decimal("10.00"), stock_quantity=1, stock_status="in-stock"))
+        db.commit()
+        cache.upsert(_product(db, "C-1"), _product_to_read)
+        assert cache.get_body("all") is None
+
+        cache.apply_stock({"B-1": (0, "out-of-stock")})
+        cache.discard("D-1")
+
+        # Patched without going back to the database
+        entries = cache.entries(db, _product_to_read)
+        assert _skus(entries) == ["B-1", "C-1"]
+        assert (entries[0].stock_status, entries[0].read.stock.quantity) == ("out-of-stock", 0)
+        assert cache.select(db, _product_to_read, in_stock_only=True)[0].sku == "C-1"
+        assert (cache.loads, cache.patches) == (1, 3)
+
+
+def test_catalogs_over_the_bound_are_not_cached(session_factory, add_products):
+    add_products(("A-1", "10.00", 5), ("B-1", "10.00", 5), ("C-1", "10.00", 5))
+    cache = CatalogCache(max_items=2, ttl_seconds=0)
+    with session_factory() as db:
+        assert cache.entries(db, _product_to_read) is None
+        assert cache.stats()["oversized"] and cache.bypasses == 1
+
+        cache.max_items = 3
+        assert len(cache.entries(db, _product_to_read)) == 3
+        # A write that would grow the snapshot past the bound drops it instead
+        db.add(Product(sku="D-1", name="D-1", price=Decimal("10.00"), stock_quantity=1, stock_status="in-stock"))
+        db.commit()
+        cache.upsert(_product(db, "D-1"), _product_to_read)
+        assert cache.stats()["size"] == 0 and cache.invalidations == 1
+
+
+def test_invalidate_reloads_and_discards_a_racing_load(session_factory, add_products):
+    add_products(("A-1", "10.00", 5))
+    cache = CatalogCache(max_items=10, ttl_seconds=0)
+    with session_factory() as db:
+        cache.entries(db, _product_to_read)
+        version = cache.version
+        _product(db, "A-1").name = "Renamed"
+        db.commit()
+
+        cache.invalidate()
+        assert cache.version > version
+        assert cache.entries(db, _product_to_read)[0].read.name == "Renamed"
+
+        # A write landing mid-load wins over the stale rows being loaded
+        to_read = lambda product: cache.invalidate() or _product_to_read(product)  # noqa: E731
+        cache.invalidate()
+        assert cache.entries(db, to_read) is not None
+        assert cache.stats()["size"] == 0
+
+
+def test_counters_add_up_across_threads(session_factory, add_products):
+    add_products(("A-1", "10.00", 5))
+    cache = CatalogCache(max_items=10, ttl_seconds=0)
+    with session_factory() as db:
+        cache.entries(db, _product_to_read)
+
+    def read():
+        for _ in range(2000):
+            cache.entries(None, _product_to_read)
+            cache.get_body("missing")
+
+    threads = [threading.Thread(target=read) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert (cache.hits, cache.misses) == (8 * 2000, 1)
+    assert (cache.body_hits, cache.body_misses) == (0, 8 * 2000)
+
+
+def test_categories_come_from_the_snapshot(client, session_factory, add_products, monkeypatch):
+    add_products(("A-1", "10.00", 5, "Tables"), ("B-1", "10.00", 5, "Chairs"), ("C-1", "10.00", 5, "Sofas"),
+                 ("D-1", "10.00", 5))
+    with session_factory() as db:
+        _product(db, "A-1").is_active = False
+        db.commit()
+    # Without a snapshot it falls back to SQL
+    monkeypatch.setattr(catalog_cache, "enabled", False)
+    assert client.get("/api/products/categories/list").json() == ["Chairs", "Sofas"]
+    monkeypatch.setattr(catalog_cache, "enabled", True)
+    assert client.get("/api/products/categories/list").json() == ["Chairs", "Sofas"]
+
+    statements = []
+    engine = session_factory.kw["bind"]
+    record = lambda conn, cursor, statement, *args: statements.append(statement)  # noqa: E731
+    event.listen(engine, "before_cursor_execute", record)
+    client.delete("/api/products/C-1")
+    body = client.get("/api/products/categories/list")
+    event.remove(engine, "before_cursor_execute", record)
+
+    assert body.json() == ["Chairs"]
+    assert not any("DISTINCT" in statement for statement in statements)
@@ -0,0 +1,84 @@
+from typing import List
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.routers import products
+from app.schemas.product import ProductList, ProductRead
+from app.services.catalog_cache import catalog_cache
+
+ORDER = {
+    "customer": {"firstName": "A", "lastName": "B", "phone": "0400 000 000", "email": "a@b.c"},
+    "delivery": {"preferredDate": "", "timeSlot": "", "specialInstructions": "",
+                 "whiteGloveService": False, "oldMattressRemoval": False, "setupService": False},
+    "payment": {"method": "cash"},
+    "items": [{"sku": "CH-1", "name": "Chair", "qty": 1, "price": "10.00"}],
+    "status": "confirmed",
+}
+
+
+@pytest.fixture
+def catalog(add_products):
+    add_products(("CH-1", "10.00", 5, "Chairs"), ("LP-1", "0.10", 0, "Lamps"), ("TB-1", "1999.00", 2))
+
+
+def _etag(client, url="/api/products"):
+    response = client.get(url)
+    assert response.status_code == 200
+    return response.headers["etag"]
+
+
+def test_current_etag_is_304(client, catalog):
+    first = client.get("/api/products")
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"] == "no-cache"
+
+    for header in (etag, f"W/{etag}", f'"stale", {etag}', "*"):
+        response = client.get("/api/products", headers={"If-None-Match": header})
+        assert response.status_code == 304
+        assert response.content == b"" and response.headers["etag"] == etag
+    assert client.get("/api/products", headers={"If-None-Match": '"stale"'}).content == first.content
+    # Each query has its own body
+    assert _etag(client, "/api/products?category=Chairs") != etag
+
+
+def test_writes_change_the_etag(client, catalog):
+    etags = [_etag(client)]
+    assert client.post("/api/products", json={"sku": "SF-1", "name": "Sofa", "price": "500.00"}).status_code == 201
+    etags.append(_etag(client))
+    assert client.patch("/api/products/SF-1", json={"price": "450.00"}).status_code == 200
+    etags.append(_etag(client))
+    # A sale reserves stock, which shows in the catalog
+    assert client.post("/api/sales", json=ORDER).status_code == 201
+    etags.append(_etag(client))
+
+    assert len(set(etags)) == 4
+    assert client.get("/api/products", headers={"If-None-Match": etags[0]}).status_code == 200
+    chair = next(p for p in client.get("/api/products").json() if p["sku"] == "CH-1")
+    assert chair["stock"]["quantity"] == 4
+
+
+def test_cached_bytes_match_the_response_model(client, session_factory, catalog):
+    with session_factory() as db:
+        expected = {
+            "/api/products": (products._list_products(db, True, None, False, None, 0, 100), List[ProductRead]),
+            "/api/products/paginated?page_size=2": (
+                products._paginate_products(db, 1, 2, True, None, None), ProductList,
+            ),
+            "/api/products/categories/list": (products._list_categories(db), List[str]),
+        }
+
+    reference = FastAPI()
+    for k, (content, response_model) in enumerate(expected.values()):
+        reference.add_api_route(f"/{k}", lambda content=content: content, response_model=response_model)
+    reference_client = TestClient(reference)
+
+    for k, url in enumerate(expected):
+        # The first response builds the body, the second is served from the cache
+        built = client.get(url)
+        hits = catalog_cache.body_hits
+        cached = client.get(url)
+        assert catalog_cache.body_hits == hits + 1
+        assert built.content == cached.content == reference_client.get(f"/{k}").content
+        assert cached.headers["content-type"] == "application/json"
@@ -0,0 +1,78 @@
+from decimal import Decimal
+
+import pytest
+
+from app.services.delivery_fees import (
+    DEFAULT_RULES, DEFAULT_ZONE, FeeRule, FeeTable, Zone, cart_size, parse_patterns,
+)
+
+
+def _zone(code, base, **fees):
+    rule = FeeRule(0, None, 0, None, Decimal(base), Decimal("0"), Decimal("0"))
+    return Zone(code, code.title(), fees.get("white_glove", Decimal("0")), Decimal("0"), Decimal("0"), (rule,))
+
+
+def test_postcode_precedence():
+    table = FeeTable.build([
+        (_zone("everywhere", 99), "*"),
+        (_zone("metro", 29), "2000-2199"),
+        (_zone("inner", 9), "2010-2019, 2150"),
+        (_zone("coast", 49), "22*, 225*"),
+        (_zone("cbd", 0), "2000"),
+    ])
+    assert table.zone_for("2000").code == "cbd"
+    assert table.zone_for("2012").code == "inner"     # narrowest range wins
+    assert table.zone_for("2150").code == "inner"     # exact beats any range
+    assert table.zone_for("2020").code == "metro"
+    assert table.zone_for(" 2251 ").code == "coast"
+    assert table.zone_for("3000").code == "everywhere"
+
+
+def test_postcodes_with_pattern_characters_dont_match_patterns():
+    table = FeeTable.build([(_zone("cbd", 0), "2000"), (_zone("north", 19), "21*")])
+    assert table.zone_for("2000=") is None
+    assert table.zone_for("21*9").code == "north"
+    assert table.zone_for("*") is None
+    assert not table.quote("2000=", items=1).deliverable
+
+
+def test_quote_rules_and_surcharges():
+    zone = Zone("metro", "Metro", Decimal("150"), Decimal("75"), Decimal("50"), (
+        FeeRule(3, None, 0, None, Decimal("0"), Decimal("0"), Decimal("0")),
+        FeeRule(0, None, 0, 2000, Decimal("29"), Decimal("5"), Decimal("0")),
+    ))
+    table = FeeTable.build([(zone, "2000-2099")])
+
+    assert table.quote("2000", items=3).fee == Decimal("0.00")
+    assert table.quote("2000", items=2, volume_l=500).fee == Decimal("39.00")
+    assert table.quote("2000", items=1, white_glove=True, removal=True).fee == Decimal("234.00")
+
+    too_big = table.quote("2000", items=1, volume_l=2500)
+    assert not too_big.deliverable and too_big.zone == "metro"
+    assert not table.quote("4000", items=1).deliverable
+
+
+def test_invalid_patterns():
+    with pytest.raises(ValueError):
+        parse_patterns("2099-2000")
+    with pytest.raises(ValueError):
+        parse_patterns("2*1")
+
+
+def test_default_rules_count_lines_like_the_flat_fee():
+    rules = tuple(
+        FeeRule(rule["min_items"], None, 0, None, rule["base_fee"], Decimal("0"), Decimal("0"))
+        for rule in DEFAULT_RULES
+    )
+    zone = Zone("default", "Everywhere", DEFAULT_ZONE["white_glove_fee"], DEFAULT_ZONE["setup_fee"],
+                DEFAULT_ZONE["removal_fee"], rules)
+    table = FeeTable.build([(zone, "*")])
+
+    # One line of 4 chairs paid $49 before; three single lines were free
+    lines, units = cart_size([{"sku": "CH-1", "qty": 4}])
+    assert (lines, units) == (1, {"CH-1": 4})
+    assert table.quote("2000", lines).fee == Decimal("49.00")
+
+    lines, units = cart_size([{"sku": "CH-1"}, {"sku": "TB-1", "quantity": 2}, {"sku": "CH-1", "qty": "x"}])
+    assert (lines, units) == (3, {"CH-1": 2, "TB-1": 2})
+    assert table.quote("2000", lines).fee == Decimal("0.00")
@@ -0,0 +1,87 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+import pytest
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.core.db import Base
+from app.models.delivery import DeliverySlot, DeliverySlotOccupancy
+from app.models.sale import Sale
+from app.services import delivery_slots
+
+DAY = date(2026, 11, 2)
+
+
+def _session_factory(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'slots.db'}",
+        connect_args={"check_same_thread": False, "timeout": 30},
+    )
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+    with Session() as db:
+        # Two trucks, five stops each: room for ten orders
+        db.add(DeliverySlot(code="morning", label="Morning", trucks=2, stops_per_truck=5,
+                            crew_minutes=10_000, volume_l=100_000))
+        db.commit()
+    return engine, Session
+
+
+def _book(Session, number, slot="morning"):
+    db = Session()
+    try:
+        sale = Sale(order_number=number, customer_json="{}", delivery_json="{}", payment_json="{}",
+                    delivery_date=DAY, delivery_time_slot=slot)
+        db.add(sale)
+        delivery_slots.move(db, sale, None, delivery_slots.plan(db, sale))
+        db.commit()
+        return True
+    except delivery_slots.SlotError:
+        db.rollback()
+        return False
+    finally:
+        db.close()
+
+
+def test_concurrent_bookings_never_exceed_capacity(tmp_path):
+    engine, Session = _session_factory(tmp_path)
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        results = list(pool.map(lambda n: _book(Session, n), range(1, 41)))
+
+    assert results.count(True) == 10
+    with engine.connect() as conn:
+        occupancy = conn.execute(select(DeliverySlotOccupancy)).one()
+        assert occupancy.orders == 10
+        assert conn.execute(select(func.count(Sale.id))).scalar() == 10
+        assert occupancy.crew_minutes == conn.execute(select(func.sum(Sale.delivery_crew_minutes))).scalar()
+
+
+def test_cancel_and_reschedule_move_the_booking(tmp_path):
+    engine, Session = _session_factory(tmp_path)
+    with Session() as db:
+        db.add(DeliverySlot(code="afternoon", label="Afternoon", trucks=1, stops_per_truck=1,
+                            crew_minutes=600, volume_l=10_000))
+        db.commit()
+    assert _book(Session, 1)
+    assert _book(Session, 2, "afternoon")
+    assert not _book(Session, 3, "afternoon")
+
+    with Session() as db:
+        sale = db.execute(select(Sale).where(Sale.order_number == 1)).scalar_one()
+        before = delivery_slots.booked(sale)
+        sale.delivery_time_slot = "afternoon"
+        # The afternoon slot is full, so the move fails as a whole
+        with pytest.raises(delivery_slots.SlotError):
+            delivery_slots.move(db, sale, before, delivery_slots.plan(db, sale))
+        db.rollback()
+
+        sale = db.execute(select(Sale).where(Sale.order_number == 2)).scalar_one()
+        delivery_slots.move(db, sale, delivery_slots.booked(sale), None)
+        db.commit()
+
+    with Session() as db:
+        [(_, slots)] = delivery_slots.availability(db, DAY, DAY)
+    assert {slot.code: orders_left for slot, orders_left, _, _ in slots} == {"morning": 9, "afternoon": 1}
@@ -0,0 +1,119 @@
+import csv
+import io
+import json
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select
+
+from app.api.routers import products, sales
+from app.api.routers.products import _product_to_read
+from app.api.routers.sales import _sale_to_read
+from app.models.product import Product
+from app.models.sale import Sale
+from app.services import export
+
+ORDER = {
+    "customer": {"firstName": "Zoë", "lastName": "O'Brien", "phone": "0400 000 000", "email": "z@b.c"},
+    "delivery": {"preferredDate": "", "timeSlot": "", "specialInstructions": "Ring, then wait",
+                 "whiteGloveService": False, "oldMattressRemoval": False, "setupService": False},
+    "payment": {"method": "card"},
+    "items": [{"sku": "CH-1", "name": "Chair", "qty": 2, "price": "129.00", "color": "Oak"},
+              {"sku": "TB-1", "name": "Table", "qty": 1, "price": "999.50"}],
+    "status": "confirmed",
+}
+
+
+@pytest.fixture
+def data(client, session_factory, monkeypatch):
+    """Products (one inactive, one with colors) and two sales, one without items"""
+    monkeypatch.setattr(products, "SessionLocal", session_factory)
+    monkeypatch.setattr(sales, "SessionLocal", session_factory)
+    # Several chunks per export
+    monkeypatch.setattr(export, "LINES_PER_CHUNK", 2)
+    with session_factory() as db:
+        db.add_all([
+            Product(sku="CH-1", name='Chair "Oak", large', price=Decimal("129.00"), category="Chairs",
+                    stock_quantity=5, stock_status="in-stock",
+                    colors_json=json.dumps([{"name": "Oak", "value": "#C8956D", "inStock": True}])),
+            Product(sku="TB-1", name="Table", price=Decimal("999.50"), stock_quantity=1, stock_status="low-stock",
+                    lead_time_days=14, lead_time_text="2 weeks"),
+            Product(sku="OLD-1", name="Old", price=Decimal("1.00"), stock_quantity=0, stock_status="discontinued",
+                    is_active=False),
+        ])
+        db.commit()
+    assert client.post("/api/sales", json=ORDER).status_code == 201
+    with session_factory() as db:
+        db.add(Sale(order_number=500, customer_json=json.dumps({**ORDER["customer"], "name": "Sam Lee"}),
+                    delivery_json=json.dumps(ORDER["delivery"]), payment_json=json.dumps({"method": "cash"}),
+                    status="draft", created_at=datetime(2026, 1, 2, 3, 4, 5)))
+        db.commit()
+
+
+def _get(client, url, **params):
+    response = client.get(url, params=params)
+    assert response.status_code == 200
+    return response
+
+
+def _csv(response):
+    assert response.headers["content-type"].startswith("text/csv")
+    return list(csv.reader(io.StringIO(response.text)))
+
+
+def test_product_export(client, session_factory, data):
+    with session_factory() as db:
+        reads = [_product_to_read(p, include_admin_fields=True).model_dump(mode="json")
+                 for p in db.execute(select(Product).order_by(Product.id)).scalars()]
+
+    ndjson = _get(client, "/api/products/export")
+    assert ndjson.headers["content-type"] == "application/x-ndjson"
+    assert ndjson.headers["content-disposition"] == 'attachment; filename="products.ndjson"'
+    assert [json.loads(line) for line in ndjson.text.splitlines()] == reads
+    active = _get(client, "/api/products/export", active_only=True).text.splitlines()
+    assert [json.loads(line)["sku"] for line in active] == ["CH-1", "TB-1"]
+
+    header, *rows = _csv(_get(client, "/api/products/export", format="csv"))
+    assert header == export.PRODUCT_CSV_COLUMNS
+    assert len(rows) == 3
+    for row, read in zip(rows, reads):
+        row = dict(zip(header, row))
+        assert (row["sku"], row["name"], float(row["price"]), row["category"] or None) == \
+            (read["sku"], read["name"], read["price"], read["category"])
+        assert (row["stock_status"], int(row["stock_quantity"])) == (read["stock"]["status"], read["stock"]["quantity"])
+        assert (json.loads(row["colors"]) if row["colors"] else None) == read["colors"]
+        assert (row["is_active"], int(row["id"]), row["created_at"]) == \
+            (str(read["is_active"]), read["id"], read["created_at"])
+    assert dict(zip(header, rows[1]))["lead_time_text"] == "2 weeks"
+
+
+def test_product_csv_export_imports_back(client, data):
+    body = _get(client, "/api/products/export", format="csv").content
+    report = client.post("/api/products/import", content=body, headers={"Content-Type": "text/csv"}).json()
+    assert (report["rows_read"], report["upserted"], report["error_count"]) == (3, 3, 0)
+
+
+def test_sale_export(client, session_factory, data):
+    with session_factory() as db:
+        reads = [_sale_to_read(s).model_dump(mode="json")
+                 for s in db.execute(select(Sale).order_by(Sale.id)).scalars()]
+
+    ndjson = _get(client, "/api/sales/export")
+    assert ndjson.headers["content-disposition"] == 'attachment; filename="sales.ndjson"'
+    assert [json.loads(line) for line in ndjson.text.splitlines()] == reads
+
+    header, *rows = _csv(_get(client, "/api/sales/export", format="csv"))
+    assert header == export.SALE_CSV_COLUMNS
+    rows = [dict(zip(header, row)) for row in rows]
+    # One row per line item; a sale without items still gets a row
+    assert [(row["order_number"], row["item_sku"]) for row in rows] == [
+        (str(reads[0]["orderNumber"]), "CH-1"), (str(reads[0]["orderNumber"]), "TB-1"), ("500", ""),
+    ]
+    first, _, empty = rows
+    assert (first["sale_id"], first["created_at"], first["status"]) == \
+        (str(reads[0]["id"]), reads[0]["createdAt"], "confirmed")
+    assert (first["customer_name"], first["customer_email"], first["payment_method"]) == ("Zoë O'Brien", "z@b.c", "card")
+    assert (first["total"], first["item_qty"], first["item_price"], first["item_color"]) == \
+        (str(reads[0]["totals"]["total"]), "2", str(reads[0]["items"][0]["price"]), "Oak")
+    assert (empty["customer_name"], empty["item_id"], empty["item_qty"]) == ("Sam Lee", "", "")
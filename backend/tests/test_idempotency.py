@@ -0,0 +1,73 @@
+import threading
+import time
+
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.db import Base
+from app.services.idempotency import IdempotencyMiddleware
+
+
+def _client(tmp_path, calls):
+    engine = create_engine(f"sqlite:///{tmp_path / 'keys.db'}", connect_args={"check_same_thread": False, "timeout": 30})
+    Base.metadata.create_all(bind=engine)
+    app = FastAPI()
+    app.add_middleware(
+        IdempotencyMiddleware, routes=["POST /orders"],
+        session_factory=sessionmaker(bind=engine, autocommit=False, autoflush=False),
+    )
+
+    @app.post("/orders", status_code=201)
+    def create(payload: dict):
+        time.sleep(payload.get("sleep", 0))
+        calls.append(payload)
+        if payload.get("fail"):
+            raise HTTPException(status_code=409, detail="out of stock")
+        return {"n": len(calls), **payload}
+
+    return TestClient(app)
+
+
+def test_retry_replays_stored_response(tmp_path):
+    calls = []
+    client = _client(tmp_path, calls)
+    first = client.post("/orders", json={"a": 1}, headers={"Idempotency-Key": "k1"})
+    again = client.post("/orders", json={"a": 1}, headers={"Idempotency-Key": "k1"})
+
+    assert first.status_code == again.status_code == 201
+    assert again.content == first.content and again.headers["idempotent-replayed"] == "true"
+    assert len(calls) == 1
+    assert client.post("/orders", json={"a": 2}, headers={"Idempotency-Key": "k1"}).status_code == 422
+    # No key: not deduplicated
+    client.post("/orders", json={"a": 1})
+    assert len(calls) == 2
+
+
+def test_failures_are_not_stored(tmp_path):
+    calls = []
+    client = _client(tmp_path, calls)
+    assert client.post("/orders", json={"fail": True}, headers={"Idempotency-Key": "k"}).status_code == 409
+    assert client.post("/orders", json={"fail": True}, headers={"Idempotency-Key": "k"}).status_code == 409
+    assert len(calls) == 2
+
+
+def test_concurrent_duplicates_wait_for_the_first(tmp_path):
+    calls = []
+    client = _client(tmp_path, calls)
+    responses = []
+
+    def post():
+        responses.append(client.post("/orders", json={"sleep": 0.3}, headers={"Idempotency-Key": "same"}))
+
+    threads = [threading.Thread(target=post) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert {r.status_code for r in responses} == {201}
+    assert len({r.content for r in responses}) == 1
+    assert sum(r.headers.get("idempotent-replayed") == "true" for r in responses) == 3
@@ -0,0 +1,135 @@
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app.core.db import Base
+from app.models.job import Job
+from app.services import jobs
+
+_runs = Counter()
+_runs_lock = threading.Lock()
+
+
+@jobs.handler("test.count")
+def _count(ctx):
+    with _runs_lock:
+        _runs[ctx.job_id] += 1
+    ctx.progress(0.5)
+    return {"n": ctx.payload["n"]}
+
+
+@jobs.handler("test.flaky")
+def _flaky(ctx):
+    if ctx.attempt < ctx.payload["succeed_on"]:
+        raise RuntimeError(f"attempt {ctx.attempt} failed")
+    return "ok"
+
+
+@jobs.handler("test.broken")
+def _broken(ctx):
+    raise jobs.PermanentJobError("bad payload")
+
+
+def _session_factory(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'jobs.db'}",
+        connect_args={"check_same_thread": False, "timeout": 30},
+    )
+    Base.metadata.create_all(bind=engine)
+    return engine, sessionmaker(bind=engine, autocommit=False, autoflush=False)
+
+
+def _enqueue(Session, kind, payloads, **options):
+    with Session() as db:
+        added = [jobs.enqueue(db, kind, payload, **options) for payload in payloads]
+        db.commit()
+        return [job.id for job in added]
+
+
+def _wait_until_done(Session, count, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with Session() as db:
+            counts = jobs.queue_counts(db)
+            if counts["succeeded"] + counts["failed"] >= count:
+                return
+        time.sleep(0.05)
+    raise AssertionError("jobs did not finish in time")
+
+
+def test_concurrent_pools_run_each_job_once(tmp_path):
+    engine, Session = _session_factory(tmp_path)
+    ids = _enqueue(Session, "test.count", [{"n": i} for i in range(200)])
+
+    # Two pools stand in for two app processes sharing the table
+    pools = [jobs.WorkerPool(Session, workers=4, poll_seconds=0.01, name=f"p{i}") for i in range(2)]
+    for pool in pools:
+        pool.start()
+    try:
+        _wait_until_done(Session, 200)
+    finally:
+        for pool in pools:
+            pool.stop()
+
+    assert all(_runs[job_id] == 1 for job_id in ids)
+    assert sum(pool.claimed for pool in pools) == 200
+    assert sum(pool.lost for pool in pools) == 0
+    with Session() as db:
+        done = db.execute(select(Job).where(Job.id.in_(ids))).scalars().all()
+        assert {job.status for job in done} == {"succeeded"}
+        assert all(job.attempts == 1 and job.progress == 1.0 and job.locked_by is None for job in done)
+
+
+def test_failed_attempts_retry_with_backoff(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs.settings, "JOB_RETRY_BASE_SECONDS", 0.2)
+    engine, Session = _session_factory(tmp_path)
+    (retried,) = _enqueue(Session, "test.flaky", [{"succeed_on": 3}], max_attempts=3)
+    (exhausted,) = _enqueue(Session, "test.flaky", [{"succeed_on": 9}], max_attempts=2)
+    pool = jobs.WorkerPool(Session, workers=1)
+
+    assert pool.drain() == 2          # both first attempts; neither retry is due yet
+    with Session() as db:
+        job = db.get(Job, retried)
+        assert job.status == "queued" and job.attempts == 1 and "attempt 1 failed" in job.error
+        assert job.run_at >= datetime.utcnow() + timedelta(seconds=0.05)
+
+    time.sleep(0.25)
+    assert pool.drain() == 2          # second attempts: one more retry, one exhausted
+    time.sleep(0.45)                  # back-off doubled to 0.4s
+    assert pool.drain() == 1
+
+    with Session() as db:
+        assert db.get(Job, retried).status == "succeeded"
+        assert db.get(Job, retried).attempts == 3
+        assert db.get(Job, exhausted).status == "failed"
+        assert db.get(Job, exhausted).attempts == 2
+    assert (pool.succeeded, pool.retried, pool.failed) == (1, 3, 1)
+    assert jobs.backoff_seconds(10, base=1, cap=30) == 30
+
+
+def test_permanent_errors_and_expired_leases(tmp_path):
+    engine, Session = _session_factory(tmp_path)
+    (broken,) = _enqueue(Session, "test.broken", [{}], max_attempts=5)
+    pool = jobs.WorkerPool(Session, workers=1)
+    pool.drain()
+
+    (orphan,) = _enqueue(Session, "test.count", [{"n": 1}])
+    with Session() as db:
+        claimed = jobs.claim(db, "dead-worker")
+        assert claimed.id == orphan
+        assert jobs.claim(db, "other-worker") is None
+        db.get(Job, orphan).locked_at = datetime.utcnow() - timedelta(minutes=10)
+        db.commit()
+        assert jobs.reclaim_stale(db, lease_seconds=60) == 1
+
+    pool.drain()
+    with Session() as db:
+        assert db.get(Job, broken).status == "failed"
+        assert db.get(Job, broken).attempts == 1
+        assert db.get(Job, orphan).status == "succeeded"
+        # The dead worker's late report is ignored
+        assert not jobs.complete(db, orphan, "dead-worker", None)
@@ -0,0 +1,40 @@
+from sqlalchemy import create_engine, text
+
+from app.services import metrics
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = metrics.Histogram("t_seconds", "test", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(value, '/a/"b"')
+
+    lines = histogram.render()
+    assert lines[:2] == ["# HELP t_seconds test", "# TYPE t_seconds histogram"]
+    assert lines[2:] == [
+        't_seconds_bucket{route="/a/\\"b\\"",le="0.1"} 1',
+        't_seconds_bucket{route="/a/\\"b\\"",le="1.0"} 3',
+        't_seconds_bucket{route="/a/\\"b\\"",le="+Inf"} 4',
+        't_seconds_sum{route="/a/\\"b\\""} 4.05',
+        't_seconds_count{route="/a/\\"b\\""} 4',
+    ]
+
+
+def test_engine_listeners_count_queries_per_request(caplog, monkeypatch):
+    monkeypatch.setattr(metrics.settings, "SLOW_QUERY_LOG_SECONDS", 0.0)
+    engine = create_engine("sqlite://")
+    metrics.instrument_engine(engine, "test")
+    selects = metrics.queries_total.value("SELECT")
+
+    stats = metrics.RequestStats()
+    token = metrics.current_request.set(stats)
+    try:
+        with engine.connect() as conn:
+            for _ in range(3):
+                conn.execute(text("SELECT 1"))
+    finally:
+        metrics.current_request.reset(token)
+
+    assert stats.queries == 3 and stats.db_seconds > 0
+    assert metrics.queries_total.value("SELECT") == selects + 3
+    assert metrics.pool_wait_seconds.count("test") >= 1
+    assert any("SELECT 1" in record.getMessage() for record in caplog.records)
@@ -0,0 +1,57 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.core.db import Base
+from app.models.sale import Sale
+from app.services.order_numbers import OrderNumberAllocator
+
+
+def _session_factory(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'orders.db'}",
+        connect_args={"check_same_thread": False, "timeout": 30},
+    )
+    Base.metadata.create_all(bind=engine)
+    return engine, sessionmaker(bind=engine, autocommit=False, autoflush=False)
+
+
+def _insert_sale(Session, allocator):
+    db = Session()
+    try:
+        number = allocator.next(db)
+        db.add(Sale(order_number=number, customer_json="{}", delivery_json="{}", payment_json="{}"))
+        db.commit()
+        return number
+    finally:
+        db.close()
+
+
+def test_parallel_orders_get_unique_numbers_without_retries(tmp_path):
+    engine, Session = _session_factory(tmp_path)
+    # Two allocators stand in for two worker processes sharing the database
+    workers = [OrderNumberAllocator(block_size=7), OrderNumberAllocator(block_size=7)]
+
+    with ThreadPoolExecutor(max_workers=32) as pool:
+        futures = [pool.submit(_insert_sale, Session, workers[i % 2]) for i in range(200)]
+        # Any IntegrityError from a duplicate number would surface here
+        numbers = [f.result() for f in futures]
+
+    assert len(set(numbers)) == 200
+    with engine.connect() as conn:
+        assert conn.execute(select(func.count(Sale.id))).scalar() == 200
+    # Numbers come from blocks, not one round trip each
+    assert sum(w.blocks_reserved for w in workers) < 200
+
+
+def test_counter_starts_after_existing_orders(tmp_path):
+    engine, Session = _session_factory(tmp_path)
+    with Session() as db:
+        db.add(Sale(order_number=41, customer_json="{}", delivery_json="{}", payment_json="{}"))
+        db.commit()
+
+        allocator = OrderNumberAllocator(block_size=5)
+        assert allocator.allocate(db, 3) == [42, 43, 44]
+        # A request larger than the block is served contiguously
+        assert allocator.allocate(db, 8) == [45, 46, 47, 48, 49, 50, 51, 52]
@@ -0,0 +1,116 @@
+import io
+import json
+from decimal import Decimal
+
+from sqlalchemy import select
+
+from app.core import import_products as import_cli
+from app.models.product import Product
+from app.services import product_import
+from app.services.catalog_cache import catalog_cache
+
+CSV = """sku,name,price,category,stock_quantity,colors
+CH-1,Oak Chair,129.00,Chairs,4,"[{""name"": ""Oak"", ""value"": ""#C8956D""}]"
+TB-1,Dining Table,999.50,,2,
+,No SKU,10.00,,1,
+LP-1,Lamp,-5,,1,
+SF-1,Sofa,1500,Sofas,1,[not json
+"""
+
+
+def _products(session_factory):
+    with session_factory() as db:
+        return {p.sku: p for p in db.execute(select(Product)).scalars()}
+
+
+def _import(client, body, content_type="text/csv", **params):
+    response = client.post("/api/products/import", content=body.encode("utf-8"),
+                           headers={"Content-Type": content_type}, params=params)
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_csv_upserts_and_reports_rows(client, session_factory, add_products):
+    add_products(("CH-1", "99.00", 10, "Old"))
+    report = _import(client, CSV)
+
+    assert (report["rows_read"], report["rows_valid"], report["upserted"], report["error_count"]) == (5, 2, 2, 3)
+    assert [(e["row"], e["sku"]) for e in report["errors"]] == [(3, None), (4, "LP-1"), (5, None)]
+    assert report["errors"][1]["errors"][0].startswith("price:")
+    assert report["errors"][2]["errors"] == ["colors: not a valid JSON array"]
+
+    products = _products(session_factory)
+    assert sorted(products) == ["CH-1", "TB-1"]
+    chair = products["CH-1"]
+    # Updated in place, not duplicated
+    assert (chair.name, chair.price, chair.category, chair.stock_quantity) == ("Oak Chair", Decimal("129.00"), "Chairs", 4)
+    assert json.loads(chair.colors_json)[0]["name"] == "Oak"
+    assert products["TB-1"].category is None
+
+
+def test_jsonl_upserts_and_keeps_the_last_duplicate(client, session_factory, add_products):
+    add_products(("CH-1", "99.00", 10))
+    lines = [
+        {"sku": "CH-1", "name": "Chair v1", "price": 100},
+        "",
+        {"sku": "TB-1", "name": "Table", "price": 500, "stock_quantity": 3},
+        {"sku": "CH-1", "name": "Chair v2", "price": 110, "stock_quantity": 7},
+        "[1, 2]",
+        "{broken",
+    ]
+    body = "\n".join(line if isinstance(line, str) else json.dumps(line) for line in lines)
+    report = _import(client, body, content_type="application/x-ndjson")
+
+    # Blank lines aren't rows; the second CH-1 wins within the batch
+    assert (report["rows_read"], report["rows_valid"], report["upserted"]) == (5, 3, 2)
+    assert [(e["row"], e["errors"][0].split(":")[0]) for e in report["errors"]] == [
+        (4, "expected a JSON object"), (5, "invalid JSON"),
+    ]
+    products = _products(session_factory)
+    assert (products["CH-1"].name, products["CH-1"].stock_quantity) == ("Chair v2", 7)
+    assert products["TB-1"].price == Decimal("500.00")
+
+
+def test_failed_batch_keeps_the_others(session_factory):
+    with session_factory() as db:
+        db.connection().exec_driver_sql(
+            "CREATE TRIGGER reject_boom BEFORE INSERT ON products WHEN new.sku = 'BOOM' "
+            "BEGIN SELECT RAISE(ABORT, 'boom'); END"
+        )
+        db.commit()
+        rows = [{"sku": sku, "name": sku, "price": 1} for sku in ("A-1", "A-2", "BOOM", "A-4", "A-5", "A-6")]
+        stream = io.StringIO("\n".join(json.dumps(row) for row in rows))
+        report = product_import.import_products(db, stream, "jsonl", batch_size=2)
+
+    assert (report.rows_valid, report.upserted, report.batches, report.error_count) == (6, 4, 2, 1)
+    assert report.errors[0].row == 3
+    assert "batch of 2 rows starting at row 3 failed" in report.errors[0].errors[0]
+    assert sorted(_products(session_factory)) == ["A-1", "A-2", "A-5", "A-6"]
+
+
+def test_import_invalidates_the_catalog_cache(client, add_products):
+    add_products(("CH-1", "99.00", 10))
+    assert [p["price"] for p in client.get("/api/products").json()] == [99.0]
+    invalidations = catalog_cache.invalidations
+
+    _import(client, "sku,name,price\nCH-1,Chair,120\n")
+    assert catalog_cache.invalidations == invalidations + 1
+    assert [p["price"] for p in client.get("/api/products").json()] == [120.0]
+
+
+def test_format_is_required(client):
+    response = client.post("/api/products/import", content=b"x", headers={"Content-Type": "application/octet-stream"})
+    assert response.status_code == 415
+    assert _import(client, "sku,name,price\nX-1,X,1\n", content_type="application/octet-stream",
+                   format="csv")["upserted"] == 1
+
+
+def test_command_line_import(session_factory, tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(import_cli, "SessionLocal", session_factory)
+    path = tmp_path / "prices.csv"
+    path.write_text(CSV, encoding="utf-8-sig")
+
+    assert import_cli.main([str(path), "--batch-size", "1"]) == 1
+    out = capsys.readouterr().out
+    assert "upserted 2 in 2 batches" in out and "3 rows rejected" in out and "row 4 LP-1: price:" in out
+    assert sorted(_products(session_factory)) == ["CH-1", "TB-1"]
@@ -0,0 +1,103 @@
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine, event, inspect
+
+from app.core.migrations import ensure_schema
+from app.models.product import Product
+from app.models.sale import Sale
+from app.services.catalog_cache import catalog_cache
+
+
+@pytest.fixture
+def catalog(session_factory):
+    """23 products over 4 names, so pages split runs of equal names"""
+    with session_factory() as db:
+        for k in range(23):
+            name = ("Armchair", "Bed", "Chair", "Desk")[k % 4]
+            db.add(Product(sku=f"P-{k:02d}", name=name, price=Decimal("10.00"), stock_quantity=1,
+                           stock_status="in-stock", category="Even" if k % 2 == 0 else "Odd"))
+        db.commit()
+        return [(p.name, p.id) for p in db.query(Product).order_by(Product.name, Product.id)]
+
+
+def _walk(client, **params):
+    pages, cursor = [], None
+    while True:
+        body = client.get("/api/products/paginated",
+                          params={**params, **({"cursor": cursor} if cursor else {})}).json()
+        pages.append(body)
+        cursor = body["next_cursor"]
+        if not body["has_more"]:
+            assert cursor is None
+            return pages
+
+
+@pytest.mark.parametrize("snapshot", [True, False], ids=["snapshot", "sql"])
+def test_cursor_walk_visits_every_product_once(client, catalog, monkeypatch, snapshot):
+    monkeypatch.setattr(catalog_cache, "enabled", snapshot)
+    pages = _walk(client, page_size=5)
+
+    skus = [item["sku"] for page in pages for item in page["items"]]
+    assert len(pages) == 5 and len(skus) == len(set(skus)) == 23
+    assert [item["name"] for page in pages for item in page["items"]] == [name for name, _ in catalog]
+    assert pages[0]["page"] == 1 and all(page["page"] is None for page in pages[1:])
+
+    # Filters carry through the cursor
+    odd = [item["sku"] for page in _walk(client, page_size=4, category="Odd") for item in page["items"]]
+    assert len(odd) == 11 and all(int(sku[2:]) % 2 for sku in odd)
+
+
+@pytest.mark.parametrize("snapshot", [True, False], ids=["snapshot", "sql"])
+def test_page_numbers_work_as_before(client, catalog, monkeypatch, snapshot):
+    monkeypatch.setattr(catalog_cache, "enabled", snapshot)
+    body = client.get("/api/products/paginated", params={"page": 3, "page_size": 10}).json()
+
+    assert (body["page"], body["page_size"], body["total"], body["has_more"]) == (3, 10, 23, False)
+    assert [item["name"] for item in body["items"]] == [name for name, _ in catalog[20:]]
+    assert client.get("/api/products/paginated", params={"page": 9}).json()["items"] == []
+    assert client.get("/api/products/paginated", params={"include_total": False}).json()["total"] is None
+
+
+@pytest.mark.parametrize("cursor", ["not base64!", "bm90IGpzb24", "WyJDaGFpciJd", "WzEsMl0"])
+def test_invalid_cursor_is_400(client, catalog, cursor):
+    response = client.get("/api/products/paginated", params={"cursor": cursor})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid pagination cursor"
+
+
+def test_total_is_counted_once_per_filter_set(client, session_factory, catalog, monkeypatch):
+    monkeypatch.setattr(catalog_cache, "enabled", False)
+    counts = []
+    engine = session_factory.kw["bind"]
+
+    def record(conn, cursor, statement, *args):
+        if "count(" in statement:
+            counts.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        first = client.get("/api/products/paginated", params={"page_size": 5}).json()
+        second = client.get("/api/products/paginated", params={"page_size": 5, "cursor": first["next_cursor"]}).json()
+        assert first["total"] == second["total"] == 23
+        assert len(counts) == 1
+
+        # A write drops the cached count
+        client.delete("/api/products/P-00")
+        assert client.get("/api/products/paginated", params={"page_size": 5}).json()["total"] == 22
+        assert len(counts) == 2
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def test_ensure_schema_adds_the_keyset_index(tmp_path):
+    # A database created before the (name, id) index existed
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    Product.__table__.create(engine)
+    Sale.__table__.create(engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DROP INDEX idx_product_name_id")
+
+    ensure_schema(engine)
+    assert "idx_product_name_id" in {index["name"] for index in inspect(engine).get_indexes("products")}
+    engine.dispose()
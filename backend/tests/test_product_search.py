@@ -0,0 +1,92 @@
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import text
+
+from app.models.product import Product
+from app.services import product_search
+from app.services.catalog_cache import catalog_cache
+
+
+@pytest.fixture
+def catalog(session_factory):
+    with session_factory() as db:
+        for sku, name in [
+            ("CH-100", "Oak Chair"),
+            ("CHA-1", "Bar Stool"),
+            ("TB-9", "Chaise Table"),
+            ("LP-2", "Armchair Lamp"),
+            ("DK-3", "Writing Desk"),
+        ]:
+            db.add(Product(sku=sku, name=name, price=Decimal("10.00"), stock_quantity=1, stock_status="in-stock"))
+        db.commit()
+
+
+def _search(client, q, **params):
+    response = client.get("/api/products/search", params={"q": q, **params})
+    assert response.status_code == 200
+    return [p["sku"] for p in response.json()]
+
+
+def _fts(session_factory, term):
+    with session_factory() as db:
+        return sorted(db.execute(
+            text("SELECT sku FROM products_fts WHERE products_fts MATCH :q"), {"q": f'"{term}"'}
+        ).scalars())
+
+
+@pytest.fixture(params=[True, False], ids=["snapshot", "index"])
+def snapshot(request, monkeypatch):
+    monkeypatch.setattr(catalog_cache, "enabled", request.param)
+    return request.param
+
+
+def test_prefix_matches_on_sku_and_name(client, catalog, snapshot):
+    assert _search(client, "ch-1") == ["CH-100"]
+    assert _search(client, "writ") == ["DK-3"]
+    assert _search(client, "desk") == ["DK-3"]
+
+
+def test_rank_order(client, catalog, snapshot):
+    # SKU prefix, name prefix, word prefix, then substring
+    assert _search(client, "cha") == ["CHA-1", "TB-9", "CH-100", "LP-2"]
+    assert _search(client, "cha", limit=2) == ["CHA-1", "TB-9"]
+
+
+def test_short_terms_fall_back_to_ilike(client, catalog, snapshot, session_factory):
+    assert _search(client, "k") == ["CH-100", "DK-3"]
+    with session_factory() as db:
+        query = product_search.apply_filter(db.query(Product), "ok")
+        assert "products_fts" not in str(query.statement)
+        assert [p.sku for p in query] == []
+        assert "products_fts" in str(product_search.apply_filter(db.query(Product), "oak").statement)
+
+
+def test_triggers_keep_the_index_in_sync(client, catalog, session_factory, monkeypatch):
+    monkeypatch.setattr(catalog_cache, "enabled", False)
+    assert client.patch("/api/products/DK-3", json={"name": "Standing Table"}).status_code == 200
+    assert client.delete("/api/products/LP-2", params={"hard_delete": True}).status_code == 204
+
+    assert _search(client, "desk") == []
+    assert _search(client, "standing") == ["DK-3"]
+    assert _search(client, "armchair") == []
+    assert _fts(session_factory, "table") == ["DK-3", "TB-9"]
+    assert _fts(session_factory, "lamp") == []
+
+
+def test_missing_triggers_are_recreated(session_factory, catalog):
+    engine = session_factory.kw["bind"]
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DROP TRIGGER products_fts_ai")
+        conn.exec_driver_sql(
+            "INSERT INTO products (sku, name, price, stock_quantity, stock_status, is_active, created_at, updated_at) "
+            "VALUES ('SF-1', 'Velvet Sofa', 500, 1, 'in-stock', 1, datetime('now'), datetime('now'))"
+        )
+    assert _fts(session_factory, "velvet") == []
+
+    assert product_search.ensure_search_index(engine) == "sqlite-fts5"
+    with engine.connect() as conn:
+        triggers = set(conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'trigger'").scalars())
+    assert {"products_fts_ai", "products_fts_ad", "products_fts_au"} <= triggers
+    # The rows written meanwhile are indexed again
+    assert _fts(session_factory, "velvet") == ["SF-1"]
@@ -0,0 +1,60 @@
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app.services import profiling
+
+
+def _busy(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def _client(monkeypatch):
+    monkeypatch.setattr(profiling.settings, "PROFILING_TOKEN", "secret")
+    monkeypatch.setattr(profiling.settings, "PROFILING_INTERVAL_SECONDS", 0.001)
+    engine = create_engine("sqlite://")
+    profiling.install_sql_capture(engine)
+    app = FastAPI()
+    app.add_middleware(profiling.ProfilingMiddleware)
+
+    @app.get("/slow")
+    def slow():
+        _busy(0.05)
+        with engine.connect() as conn:
+            conn.execute(text("WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 300000) "
+                              "SELECT count(*) FROM n")).scalar()
+        return {"ok": True}
+
+    return TestClient(app)
+
+
+def test_profile_needs_the_token(monkeypatch):
+    client = _client(monkeypatch)
+    assert client.get("/slow?_profile=1").json() == {"ok": True}
+    assert client.get("/slow?_profile=1", headers={"X-Profile-Token": "nope"}).json() == {"ok": True}
+
+
+def test_speedscope_profile_has_samples_and_sql(monkeypatch):
+    client = _client(monkeypatch)
+    response = client.get("/slow?_profile=speedscope", headers={"X-Profile-Token": "secret"})
+    assert response.headers["x-profile-status"] == "200"
+
+    profile = response.json()
+    names = [frame["name"] for frame in profile["shared"]["frames"]]
+    sampled, sql = profile["profiles"]
+    assert any(name.endswith("_busy") for name in names)
+    assert len(sampled["samples"]) == len(sampled["weights"]) > 10
+    assert [event["type"] for event in sql["events"]] == ["O", "C"]
+    assert names[sql["events"][0]["frame"]].startswith("SQL: WITH RECURSIVE")
+
+
+def test_collapsed_profile_attributes_time_to_statements(monkeypatch):
+    client = _client(monkeypatch)
+    response = client.get("/slow", headers={"X-Profile-Token": "secret", "X-Profile": "collapsed"})
+    lines = response.text.splitlines()
+    assert lines and all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    assert any("slow (test_profiling.py" in line and line.split(";")[-1].startswith("SQL: WITH") for line in lines)
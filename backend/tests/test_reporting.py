@@ -0,0 +1,148 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from sqlalchemy import select
+
+from app.models.report import DailySales, DailySkuSales
+from app.models.sale import Sale, SaleItem
+from app.services import reporting
+
+CUSTOMER = {"firstName": "A", "lastName": "B", "phone": "0400 000 000", "email": "a@b.c"}
+DELIVERY = {"preferredDate": "", "timeSlot": "", "specialInstructions": "",
+            "whiteGloveService": False, "oldMattressRemoval": False, "setupService": False}
+
+
+def _order(*lines, **extra):
+    return {"customer": CUSTOMER, "delivery": DELIVERY, "payment": {"method": "cash"},
+            "items": [{"sku": sku, "name": sku, "qty": qty, "price": price} for sku, qty, price in lines],
+            "status": "confirmed", **extra}
+
+
+def _sale(db, created_at, *lines, status="confirmed"):
+    subtotal = sum(Decimal(price) * qty for _, qty, price in lines)
+    sale = Sale(order_number=db.query(Sale).count() + 1, customer_json=json.dumps(CUSTOMER),
+                delivery_json=json.dumps(DELIVERY), payment_json="{}", status=status,
+                subtotal=subtotal, total=subtotal, created_at=created_at,
+                items=[SaleItem(sku=sku, name=sku, qty=qty, unit_price=Decimal(price)) for sku, qty, price in lines])
+    db.add(sale)
+    db.flush()
+    return sale
+
+
+def _rollups(db):
+    """Rollup rows that still count anything, as plain tuples"""
+    daily = [
+        (row.day, row.orders, row.units, row.subtotal, row.discount, row.delivery_fee, row.total)
+        for row in db.execute(select(DailySales).order_by(DailySales.day)).scalars()
+        if row.orders or row.units or row.total
+    ]
+    skus = [
+        (row.day, row.sku, row.category, row.orders, row.units, row.revenue)
+        for row in db.execute(select(DailySkuSales).order_by(DailySkuSales.day, DailySkuSales.sku)).scalars()
+        if row.orders or row.units or row.revenue
+    ]
+    return daily, skus
+
+
+def test_incremental_rollups_match_a_rebuild(client, session_factory, add_products):
+    add_products(("CH-1", "10.00", 50, "Chairs"), ("TB-1", "100.00", 50, "Tables"), ("LP-1", "25.00", 50))
+    first = client.post("/api/sales", json=_order(("CH-1", 4, "10.00"), ("TB-1", 1, "100.00"))).json()
+    second = client.post("/api/sales", json=_order(("CH-1", 2, "10.00"), ("LP-1", 1, "25.00"))).json()
+    client.post("/api/sales", json=_order(("TB-1", 2, "100.00"), status="draft"))
+    client.post("/api/sales/batch", json={"orders": [
+        {**_order(("LP-1", 3, "25.00")), "clientKey": "b1"},
+        {**_order(("CH-1", 1, "10.00"), ("TB-1", 1, "100.00")), "clientKey": "b2"},
+    ]})
+    # Edit one order's lines and cancel another
+    assert client.patch(f"/api/sales/{first['id']}", json=[
+        {"op": "replace", "path": "/items/0/qty", "value": 6},
+        {"op": "remove", "path": "/items/1"},
+    ]).status_code == 200
+    assert client.post(f"/api/sales/{second['id']}/cancel").status_code == 204
+
+    with session_factory() as db:
+        incremental = _rollups(db)
+        reporting.rebuild(db)
+        assert _rollups(db) == incremental
+
+    daily, skus = incremental
+    assert [(orders, units) for _, orders, units, *_ in daily] == [(4, 13)]
+    assert [(sku, category, orders, units) for _, sku, category, orders, units, _ in skus] == [
+        ("CH-1", "Chairs", 2, 7), ("LP-1", None, 1, 3), ("TB-1", "Tables", 2, 3),
+    ]
+
+
+def test_record_many_matches_record_and_rebuild(session_factory, add_products):
+    add_products(("CH-1", "10.00", 50, "Chairs"), ("TB-1", "100.00", 50, "Tables"))
+    with session_factory() as db:
+        sales = [
+            _sale(db, datetime(2026, 3, 1, 9), ("CH-1", 2, "10.00")),
+            _sale(db, datetime(2026, 3, 1, 23, 59), ("CH-1", 1, "10.00"), ("TB-1", 1, "100.00")),
+            _sale(db, datetime(2026, 3, 2, 0, 1), ("TB-1", 2, "100.00")),
+            _sale(db, datetime(2026, 3, 2, 12), ("CH-1", 5, "10.00"), status="cancelled"),
+        ]
+        reporting.record_many(db, [(None, reporting.contribution(sale)) for sale in sales])
+        db.commit()
+        batched = _rollups(db)
+
+        reporting.rebuild(db)
+        assert _rollups(db) == batched
+
+        db.execute(DailySales.__table__.delete())
+        db.execute(DailySkuSales.__table__.delete())
+        for sale in sales:
+            reporting.record(db, None, reporting.contribution(sale))
+        assert _rollups(db) == batched
+
+    daily, _ = batched
+    assert [(day, orders, units, total) for day, orders, units, _, _, _, total in daily] == [
+        (date(2026, 3, 1), 2, 4, Decimal("130.00")),
+        (date(2026, 3, 2), 1, 2, Decimal("200.00")),
+    ]
+
+
+def test_rebuild_only_touches_its_range(session_factory, add_products):
+    add_products(("CH-1", "10.00", 50, "Chairs"))
+    with session_factory() as db:
+        for day in (1, 2, 3):
+            _sale(db, datetime(2026, 3, day, 12), ("CH-1", day, "10.00"))
+        db.commit()
+        assert reporting.rebuild(db) == (3, 3)
+        # Hand-edit day 1 and 3; rebuilding day 2..3 repairs only day 3
+        db.execute(DailySales.__table__.update().values(orders=99))
+        db.commit()
+        assert reporting.rebuild(db, date(2026, 3, 2), date(2026, 3, 3)) == (2, 2)
+        assert [row.orders for row in reporting.daily_totals(db)] == [99, 1, 1]
+
+
+def test_report_endpoints(client, session_factory, add_products):
+    add_products(("CH-1", "10.00", 50, "Chairs"), ("SF-1", "500.00", 50, "Sofas"), ("TB-1", "100.00", 50, "Tables"))
+    with session_factory() as db:
+        sales = [
+            _sale(db, datetime(2026, 3, 1, 10), ("CH-1", 10, "10.00"), ("TB-1", 1, "100.00")),
+            _sale(db, datetime(2026, 3, 2, 10), ("SF-1", 1, "500.00")),
+            _sale(db, datetime(2026, 3, 2, 11), ("CH-1", 3, "10.00")),
+            _sale(db, datetime(2026, 3, 5, 10), ("TB-1", 4, "100.00")),
+        ]
+        reporting.record_many(db, [(None, reporting.contribution(sale)) for sale in sales])
+        db.commit()
+
+    daily = client.get("/api/reports/daily", params={"from": "2026-03-02", "to": "2026-03-04"}).json()
+    assert [(row["day"], row["orders"], row["units"], row["total"], row["averageOrderValue"]) for row in daily] == [
+        ("2026-03-02", 2, 4, "530.00", "265.00"),
+    ]
+
+    categories = client.get("/api/reports/categories").json()
+    assert [(row["category"], row["units"], Decimal(row["revenue"])) for row in categories] == [
+        ("Sofas", 1, Decimal("500")), ("Tables", 5, Decimal("500")), ("Chairs", 13, Decimal("130")),
+    ]
+
+    by_revenue = client.get("/api/reports/skus/top", params={"limit": 2}).json()
+    assert [(row["sku"], row["orders"]) for row in by_revenue] == [("SF-1", 1), ("TB-1", 2)]
+    by_units = client.get("/api/reports/skus/top", params={"by": "units", "to": "2026-03-02"}).json()
+    assert [(row["sku"], row["units"]) for row in by_units] == [("CH-1", 13), ("SF-1", 1), ("TB-1", 1)]
+    assert client.get("/api/reports/skus/top", params={"by": "orders"}).status_code == 422
+
+    rebuilt = client.post("/api/reports/rebuild", params={"from": "2026-03-01", "to": "2026-03-02"}).json()
+    assert rebuilt == {"days": 2, "skuRows": 4}
@@ -0,0 +1,96 @@
+import random
+
+import numpy as np
+
+from app.services.routing import RoutingProblem, Stop, solve, travel_matrix
+
+DEPOT = (-33.87, 151.21)
+MORNING = (8 * 60, 12 * 60)
+AFTERNOON = (12 * 60, 17 * 60)
+
+
+def _stops(count, seed=1, volume_l=100, windows=(MORNING, AFTERNOON)):
+    rng = random.Random(seed)
+    return [
+        Stop(id=k, lat=DEPOT[0] + rng.uniform(-0.1, 0.1), lon=DEPOT[1] + rng.uniform(-0.1, 0.1),
+             service_minutes=10, volume_l=volume_l, window=windows[k % len(windows)])
+        for k in range(count)
+    ]
+
+
+def _assigned(plan):
+    return [visit.stop.id for route in plan.routes for visit in route.visits]
+
+
+def test_every_stop_is_visited_once_within_capacity():
+    problem = RoutingProblem(depot=DEPOT, stops=_stops(30), vehicles=3, capacity_l=2000)
+    plan = solve(problem, time_budget=2.0)
+
+    assert sorted(_assigned(plan)) == list(range(30)) and plan.unassigned == []
+    assert {route.vehicle for route in plan.routes} <= {0, 1, 2}
+    for route in plan.routes:
+        assert route.volume_l == sum(visit.stop.volume_l for visit in route.visits) <= problem.capacity_l
+        clock = problem.shift_start
+        for visit in route.visits:
+            # The schedule is consistent: no time travel, service takes its time
+            assert clock <= visit.arrival <= visit.start
+            assert visit.departure == visit.start + visit.stop.service_minutes
+            clock = visit.departure
+        assert route.finish >= clock
+    assert plan.cost <= plan.construction_cost
+
+
+def test_time_windows_are_kept():
+    problem = RoutingProblem(depot=DEPOT, stops=_stops(24), vehicles=2, capacity_l=10_000)
+    plan = solve(problem, time_budget=2.0)
+
+    for route in plan.routes:
+        assert route.late_minutes == 0
+        for visit in route.visits:
+            opens, closes = visit.stop.window
+            assert opens <= visit.start <= closes
+        # Morning stops come before the afternoon's
+        windows = [visit.stop.window for visit in route.visits]
+        assert windows == sorted(windows)
+
+
+def test_impossible_windows_are_late_not_dropped():
+    # Nobody can be 30 km away by 7:31
+    stop = Stop(id="far", lat=DEPOT[0] + 0.3, lon=DEPOT[1], service_minutes=10, window=(0, 7 * 60 + 31))
+    plan = solve(RoutingProblem(depot=DEPOT, stops=[stop], vehicles=1, capacity_l=100))
+
+    assert _assigned(plan) == ["far"]
+    assert plan.routes[0].late_minutes > 0
+
+
+def test_stops_that_dont_fit_are_unassigned():
+    stops = _stops(10, volume_l=400)
+    stops.append(Stop(id="wardrobe", lat=DEPOT[0], lon=DEPOT[1] + 0.01, service_minutes=30, volume_l=5000))
+    plan = solve(RoutingProblem(depot=DEPOT, stops=stops, vehicles=2, capacity_l=1000))
+
+    # Two trucks of 1000 l carry at most 2 x 2 stops of 400 l
+    assert len(_assigned(plan)) == 4
+    assert len(plan.unassigned) == 7
+    assert {reason for _, reason in plan.unassigned} == {"No truck has capacity left"}
+    assert "wardrobe" in {stop_id for stop_id, _ in plan.unassigned}
+    assert sorted(_assigned(plan) + [stop_id for stop_id, _ in plan.unassigned], key=str) == \
+        sorted((stop.id for stop in stops), key=str)
+
+
+def test_no_trucks_or_no_stops():
+    plan = solve(RoutingProblem(depot=DEPOT, stops=_stops(3), vehicles=0, capacity_l=1000))
+    assert plan.routes == []
+    assert plan.unassigned == [(0, "No trucks available"), (1, "No trucks available"), (2, "No trucks available")]
+
+    plan = solve(RoutingProblem(depot=DEPOT, stops=[], vehicles=2, capacity_l=1000))
+    assert plan.routes == [] and plan.unassigned == []
+
+
+def test_travel_matrix_is_symmetric_road_distance():
+    points = np.array([DEPOT, (DEPOT[0] + 0.09, DEPOT[1])])
+    km, minutes = travel_matrix(points, speed_kmh=30.0, road_factor=1.0)
+
+    assert np.allclose(km, km.T) and np.allclose(np.diag(km), 0.0)
+    # 0.09 degrees of latitude is about 10 km
+    assert abs(km[0, 1] - 10.0) < 0.1
+    assert abs(minutes[0, 1] - km[0, 1] * 2) < 1e-9
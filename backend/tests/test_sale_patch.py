@@ -0,0 +1,84 @@
+from decimal import Decimal
+
+import pytest
+from pydantic import ValidationError
+
+from app.models.sale import SaleItem
+from app.schemas.sale import LineItemPayload, SalePatchOperation
+from app.services.sale_patch import PatchError, apply_json_patch, diff_items
+
+
+def _items():
+    return [
+        SaleItem(id=1, sku="DT-1001", name="Table", unit_price=Decimal("100.00"), qty=1, color=None),
+        SaleItem(id=2, sku="CH-4110", name="Chair", unit_price=Decimal("20.00"), qty=4, color="Oak"),
+        SaleItem(id=3, sku="CH-4110", name="Chair", unit_price=Decimal("20.00"), qty=2, color="Black"),
+    ]
+
+
+def _line(**fields):
+    return LineItemPayload(**{"name": "x", "qty": 1, "price": Decimal("0"), **fields})
+
+
+def test_diff_keeps_matched_lines_and_moves_subtotal():
+    current = _items()
+    incoming = [
+        _line(id=1, sku="DT-1001", name="Table", qty=1, price=Decimal("100.00")),
+        # No id: matched on (sku, color)
+        _line(sku="CH-4110", name="Chair", qty=6, price=Decimal("20"), color="Oak"),
+        _line(sku="LT-6088", name="Lamp", qty=1, price=Decimal("35.50")),
+    ]
+    result, diff = diff_items(current, incoming)
+
+    assert result[0] is current[0] and result[1] is current[1]
+    assert result[1].qty == 6
+    assert result[2].id is None and result[2].sku == "LT-6088"
+    assert (diff.updated, diff.inserted, diff.deleted) == (1, 1, 1)
+    # +2 chairs, +lamp, -2 black chairs
+    assert diff.subtotal_delta == Decimal("40") + Decimal("35.50") - Decimal("40")
+
+
+def test_json_patch_operations():
+    ops = lambda *raw: [SalePatchOperation(**op) for op in raw]  # noqa: E731
+    document = {"status": "draft", "items": [{"id": 1, "qty": 1}, {"id": 2, "qty": 4}]}
+
+    changed = apply_json_patch(document, ops(
+        {"op": "test", "path": "/items/1/id", "value": 2},
+        {"op": "replace", "path": "/items/1/qty", "value": 5},
+        {"op": "add", "path": "/items/-", "value": {"qty": 1}},
+    ))
+    assert list(changed) == ["items"]
+    assert [item["qty"] for item in changed["items"]] == [1, 5, 1]
+
+    with pytest.raises(PatchError) as failed:
+        apply_json_patch(document, ops({"op": "test", "path": "/items/0/id", "value": 9}))
+    assert failed.value.conflict
+    for bad in ({"op": "replace", "path": "/items/7/qty", "value": 1},
+                {"op": "remove", "path": "/status"},
+                {"op": "replace", "path": "/id", "value": 1}):
+        with pytest.raises(PatchError):
+            apply_json_patch(document, ops(bad))
+
+
+def test_patch_value_is_required_except_for_remove():
+    for op in ("add", "replace", "test"):
+        with pytest.raises(ValidationError, match="needs a value"):
+            SalePatchOperation(op=op, path="/status")
+    assert SalePatchOperation(op="replace", path="/delivery/specialInstructions", value=None).value is None
+    assert SalePatchOperation(op="remove", path="/items/0").value is None
+
+
+def test_patch_without_value_is_422(client, add_products):
+    add_products(("CH-1", "10.00", 10))
+    order_id = client.post("/api/sales", json={
+        "customer": {"firstName": "A", "lastName": "B", "phone": "0400 000 000", "email": "a@b.c"},
+        "delivery": {"preferredDate": "", "timeSlot": "", "specialInstructions": "",
+                     "whiteGloveService": False, "oldMattressRemoval": False, "setupService": False},
+        "payment": {"method": "cash"},
+        "items": [{"sku": "CH-1", "name": "Chair", "qty": 3, "price": "10.00"}],
+        "status": "confirmed",
+    }).json()["id"]
+
+    response = client.patch(f"/api/sales/{order_id}", json=[{"op": "replace", "path": "/items/0/qty"}])
+    assert response.status_code == 422
+    assert client.get(f"/api/sales/{order_id}").json()["items"][0]["qty"] == 3
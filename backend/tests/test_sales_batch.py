@@ -0,0 +1,105 @@
+import json
+from datetime import datetime
+
+from sqlalchemy import func, select
+
+from app.api.routers import sales
+from app.core.config import settings
+from app.models.product import Product
+from app.models.sale import Sale, SaleItem
+
+CUSTOMER = {"firstName": "A", "lastName": "B", "phone": "0400 000 000", "email": "a@b.c"}
+DELIVERY = {"preferredDate": "", "timeSlot": "", "specialInstructions": "",
+            "whiteGloveService": False, "oldMattressRemoval": False, "setupService": False}
+
+
+def _order(key, sku="CH-1", qty=1, **extra):
+    return {"clientKey": key, "customer": CUSTOMER, "delivery": DELIVERY, "payment": {"method": "cash"},
+            "items": [{"sku": sku, "name": sku, "qty": qty, "price": "10.00"}], "status": "confirmed", **extra}
+
+
+def _stock(session_factory, sku):
+    with session_factory() as db:
+        return db.execute(select(Product.stock_quantity).where(Product.sku == sku)).scalar_one()
+
+
+def _count(session_factory, column):
+    with session_factory() as db:
+        return db.execute(select(func.count(column))).scalar()
+
+
+def test_orders_are_accepted_or_rejected_one_by_one(client, session_factory, add_products):
+    add_products(("CH-1", "10.00", 5))
+    response = client.post("/api/sales/batch", json={"orders": [
+        _order("ok"),
+        _order("too-many", qty=10),
+        {"clientKey": "invalid", "items": []},
+        _order(None),
+        _order("ok-2", qty=2),
+    ]})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [r["status"] for r in body["results"]] == ["created", "rejected", "rejected", "rejected", "created"]
+    assert body["results"][1]["error"]["reason"] == "Insufficient stock"
+    assert (body["created"], body["duplicates"], body["rejected"]) == (2, 0, 3)
+    assert _stock(session_factory, "CH-1") == 2
+    assert _count(session_factory, Sale.id) == 2
+
+
+def test_replayed_keys_are_duplicates(client, session_factory, add_products):
+    add_products(("CH-1", "10.00", 10))
+    batch = {"orders": [_order("k1"), _order("k2"), _order("k1")]}
+    first = client.post("/api/sales/batch", json=batch).json()
+    assert [r["status"] for r in first["results"]] == ["created", "created", "duplicate"]
+    assert first["results"][2]["id"] == first["results"][0]["id"]
+
+    again = client.post("/api/sales/batch", json=batch).json()
+    assert {r["status"] for r in again["results"]} == {"duplicate"}
+    assert [r["orderNumber"] for r in again["results"]] == [r["orderNumber"] for r in first["results"]]
+    assert _stock(session_factory, "CH-1") == 8
+    assert _count(session_factory, Sale.id) == 2
+
+
+def test_chunks_commit_separately(client, session_factory, add_products, monkeypatch):
+    monkeypatch.setattr(settings, "SALES_BATCH_CHUNK_SIZE", 2)
+    add_products(("CH-1", "10.00", 100))
+    body = client.post("/api/sales/batch", json={"orders": [_order(f"k{i}", qty=i + 1) for i in range(5)]}).json()
+
+    assert body["created"] == 5
+    assert len({r["orderNumber"] for r in body["results"]}) == 5
+    assert _count(session_factory, SaleItem.id) == 5
+    assert _stock(session_factory, "CH-1") == 100 - 15
+
+    monkeypatch.setattr(settings, "SALES_BATCH_MAX_ORDERS", 4)
+    assert client.post("/api/sales/batch", json={"orders": [_order(f"x{i}") for i in range(5)]}).status_code == 413
+
+
+def test_key_stored_by_a_concurrent_replay_is_a_duplicate(client, session_factory, add_products, monkeypatch):
+    add_products(("CH-1", "10.00", 10))
+    skip_stored = sales._skip_stored
+    calls = []
+
+    def racing_skip_stored(db, pending, results):
+        calls.append(len(pending))
+        if len(calls) > 1:
+            return skip_stored(db, pending, results)
+        # Another till stores "k2" after our duplicate check
+        with session_factory() as other:
+            other.add(Sale(order_number=999, client_key="k2", customer_json=json.dumps(CUSTOMER),
+                           delivery_json=json.dumps(DELIVERY), payment_json="{}", status="confirmed",
+                           created_at=datetime.utcnow()))
+            other.commit()
+        return pending
+
+    monkeypatch.setattr(sales, "_skip_stored", racing_skip_stored)
+    response = client.post("/api/sales/batch", json={"orders": [_order("k1"), _order("k2"), _order("k3")]})
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["status"] for r in results] == ["created", "duplicate", "created"]
+    assert results[1]["orderNumber"] == 999
+    assert len(calls) == 2
+    # The rolled-back first attempt gave its stock back
+    assert _stock(session_factory, "CH-1") == 8
+    assert _count(session_factory, Sale.id) == 3
@@ -0,0 +1,72 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import select
+
+from app.models.delivery import DeliverySlot, DeliverySlotOccupancy
+from app.models.product import Product
+from app.models.report import DailySales
+from app.services import reporting
+
+ORDER = {
+    "customer": {"firstName": "A", "lastName": "B", "phone": "0400 000 000", "email": "a@b.c"},
+    "delivery": {"preferredDate": "2026-11-02", "timeSlot": "morning", "specialInstructions": "",
+                 "whiteGloveService": False, "oldMattressRemoval": False, "setupService": False},
+    "payment": {"method": "cash"},
+    "items": [{"sku": "CH-1", "name": "Chair", "qty": 3, "price": "10.00"}],
+    "status": "confirmed",
+}
+
+
+def _slow_contribution(monkeypatch):
+    # Widen the window between reading the sale and committing
+    contribution = reporting.contribution
+
+    def slow(sale):
+        time.sleep(0.2)
+        return contribution(sale)
+
+    monkeypatch.setattr(reporting, "contribution", slow)
+
+
+def test_concurrent_cancels_release_once(client, session_factory, add_products, monkeypatch):
+    add_products(("CH-1", "10.00", 10))
+    with session_factory() as db:
+        db.add(DeliverySlot(code="morning", label="Morning", trucks=1, stops_per_truck=5,
+                            crew_minutes=10_000, volume_l=100_000))
+        db.commit()
+    order_id = client.post("/api/sales", json=ORDER).json()["id"]
+    _slow_contribution(monkeypatch)
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        responses = list(pool.map(lambda _: client.post(f"/api/sales/{order_id}/cancel"), range(2)))
+
+    assert [r.status_code for r in responses] == [204, 204]
+    with session_factory() as db:
+        assert db.execute(select(Product.stock_quantity).where(Product.sku == "CH-1")).scalar_one() == 10
+        assert db.execute(select(DeliverySlotOccupancy.orders)).scalar_one() == 0
+        assert db.execute(select(DailySales.orders)).scalar_one() == 0
+
+
+def test_concurrent_edits_apply_in_turn(client, session_factory, add_products, monkeypatch):
+    add_products(("CH-1", "10.00", 10))
+    order = {**ORDER, "delivery": {**ORDER["delivery"], "preferredDate": ""}}
+    order_id = client.post("/api/sales", json=order).json()["id"]
+    _slow_contribution(monkeypatch)
+
+    def add_chair(_):
+        return client.patch(f"/api/sales/{order_id}", json=[{"op": "replace", "path": "/items/0/qty", "value": 5}])
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        responses = list(pool.map(add_chair, range(2)))
+
+    assert [r.status_code for r in responses] == [200, 200]
+    with session_factory() as db:
+        # 3 -> 5 once; the second edit sees 5 and moves nothing
+        assert db.execute(select(Product.stock_quantity).where(Product.sku == "CH-1")).scalar_one() == 5
+        assert db.execute(select(DailySales.units)).scalar_one() == 5
+
+
+def test_missing_sale_is_404(client):
+    assert client.post("/api/sales/42/cancel").status_code == 404
+    assert client.patch("/api/sales/42", json={"status": "confirmed"}).status_code == 404
@@ -0,0 +1,45 @@
+import json
+from datetime import datetime
+
+from app.api.routers import sales
+from app.models.sale import Sale
+
+CUSTOMER = {"firstName": "A", "lastName": "B", "phone": "0400 000 000", "email": "a@b.c"}
+DELIVERY = {"preferredDate": "", "timeSlot": "", "specialInstructions": "",
+            "whiteGloveService": False, "oldMattressRemoval": False, "setupService": False}
+
+def _add_sales(session_factory, *created):
+    with session_factory() as db:
+        for number, created_at in enumerate(created, start=1):
+            db.add(Sale(order_number=number, customer_json=json.dumps(CUSTOMER),
+                        delivery_json=json.dumps(DELIVERY), payment_json=json.dumps({"method": "cash"}), status="confirmed", created_at=created_at))
+        db.commit()
+
+
+def _exported(client, **params):
+    response = client.get("/api/sales/export", params=params)
+    assert response.status_code == 200
+    return [json.loads(line)["orderNumber"] for line in response.text.splitlines()]
+
+
+def test_export_range_is_utc(client, session_factory, monkeypatch):
+    monkeypatch.setattr(sales, "SessionLocal", session_factory)
+    # created_at is naive UTC
+    _add_sales(session_factory, datetime(2026, 3, 1, 13), datetime(2026, 3, 1, 14), datetime(2026, 3, 1, 15))
+
+    assert _exported(client, **{"from": "2026-03-01T14:00:00", "to": "2026-03-01T15:00:00"}) == [2]
+    # 00:00-01:00 in UTC+10 is 14:00-15:00 UTC
+    assert _exported(client, **{"from": "2026-03-02T00:00:00+10:00", "to": "2026-03-02T01:00:00+10:00"}) == [2]
+    assert _exported(client, **{"from": "2026-03-01T14:00:00Z"}) == [2, 3]
+
+
+def test_listing_range_is_utc(client, session_factory):
+    _add_sales(session_factory, datetime(2026, 3, 1, 13), datetime(2026, 3, 1, 14), datetime(2026, 3, 1, 15))
+
+    def listed(**params):
+        response = client.get("/api/sales", params=params)
+        assert response.status_code == 200
+        return [sale["orderNumber"] for sale in response.json()["items"]]
+
+    assert listed(**{"from": "2026-03-02T00:00:00+10:00", "to": "2026-03-02T01:00:00+10:00"}) == [2]
+    assert listed(**{"to": "2026-03-01T14:00:00Z"}) == [1]
@@ -0,0 +1,111 @@
+import json
+import warnings
+from datetime import datetime
+from decimal import Decimal
+from typing import List
+
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+from app.api.routers.products import _product_to_read
+from app.api.routers.sales import _sale_to_read, _sale_to_summary
+from app.api.serialization import json_response, render
+from app.models.product import Product
+from app.models.sale import Sale, SaleItem
+from app.schemas.product import ProductList, ProductRead
+from app.schemas.sale import SaleList, SaleOrderRead
+
+
+def _products() -> List[Product]:
+    colors = json.dumps([
+        {"name": "Natural Oak", "value": "#C8956D", "inStock": True, "image": None},
+        {"name": "Crème", "value": "#FFFDD0"},
+    ])
+    return [
+        Product(id=1, sku="DT-1001", name="Oak Dining Table", price=Decimal("1999.00"), category="Furniture",
+                image=None, stock_status="in-stock", stock_quantity=12, colors_json=colors, is_active=True,
+                created_at=datetime(2024, 5, 1, 9, 30), updated_at=datetime(2024, 5, 2, 10, 0, 0, 123456)),
+        Product(id=2, sku="LP-7", name='Lamp "Nordic" ☀', price=Decimal("0.10"), category=None, image="/x.png",
+                stock_status="out-of-stock", stock_quantity=0, lead_time_days=14, lead_time_text="2 weeks",
+                colors_json=None, is_active=True),
+    ]
+
+
+def _sales() -> List[Sale]:
+    full = Sale(
+        id=7, order_number=1007, status="confirmed", created_at=datetime(2024, 6, 1, 12, 0, 0, 5),
+        customer_json=json.dumps({
+            "firstName": "Zoë", "lastName": "O'Brien", "name": None, "phone": "0400 000 000", "email": "z@example.com",
+            "additionalPhone": None, "secondPerson": {"firstName": "Sam", "lastName": "Lee"},
+            "billingAddress": None, "sameAsDelivery": True,
+            "deliveryAddress": {"street": "1 Main St", "city": "Perth", "state": "WA", "zip": "6000", "extra": "x"},
+        }),
+        delivery_json=json.dumps({
+            "preferredDate": "2024-06-10", "timeSlot": "am", "specialInstructions": "Ring\nbell",
+            "whiteGloveService": True, "oldMattressRemoval": False, "setupService": False,
+        }),
+        payment_json=json.dumps({"method": "card", "depositAmount": 100.5, "discountPercent": 10.0}),
+        subtotal=Decimal("2100.00"), delivery_fee=Decimal("49.00"), discount=Decimal("210.00"), total=Decimal("1939.00"),
+    )
+    full.items = [
+        SaleItem(id=1, sku="DT-1001", name="Oak Dining Table", unit_price=Decimal("1999.00"), qty=1, color="Natural Oak"),
+        SaleItem(id=2, sku="LP-7", name="Lamp", unit_price=Decimal("50.50"), qty=2, color=None),
+    ]
+    # Written by an older client: optional keys missing, integer amounts
+    sparse = Sale(
+        id=8, order_number=1008, status="draft", created_at=datetime(2024, 6, 2),
+        customer_json=json.dumps({"firstName": "A", "lastName": "B", "phone": "1", "email": "a@b.c"}),
+        delivery_json=json.dumps({
+            "preferredDate": "", "timeSlot": "", "specialInstructions": "",
+            "whiteGloveService": False, "oldMattressRemoval": False, "setupService": False,
+        }),
+        payment_json=json.dumps({"method": "cash", "discountPercent": 0}),
+        subtotal=Decimal("0.00"), delivery_fee=Decimal("0.00"), discount=Decimal("0.00"), total=Decimal("0.00"),
+    )
+    sparse.items = []
+    return [full, sparse]
+
+
+def _client(reference, fast, response_model) -> TestClient:
+    """Serve the same content through FastAPI's response_model path and the fast path"""
+    app = FastAPI()
+    app.add_api_route("/reference", reference, response_model=response_model)
+    app.add_api_route("/fast", fast, response_model=response_model)
+    return TestClient(app)
+
+
+def _assert_same_bytes(content, response_model):
+    client = _client(lambda: content, lambda: json_response(content), response_model)
+    with warnings.catch_warnings():
+        # Unvalidated defaults (Payment.depositAmount = 0) warn on both paths
+        warnings.simplefilter("ignore")
+        reference = client.get("/reference")
+        fast = client.get("/fast")
+    assert reference.status_code == fast.status_code == 200
+    assert fast.headers["content-type"] == reference.headers["content-type"]
+    assert fast.content == reference.content
+
+
+def test_products_match_response_model_bytes():
+    reads = [_product_to_read(p) for p in _products()]
+    _assert_same_bytes(reads, List[ProductRead])
+    _assert_same_bytes(_product_to_read(_products()[0], include_admin_fields=True), ProductRead)
+    page = ProductList(items=reads, total=2, page=1, page_size=50, has_more=False)
+    _assert_same_bytes(page, ProductList)
+    # The catalog cache used jsonable_encoder for its cached bodies
+    assert render(page) == JSONResponse(content=jsonable_encoder(page)).body
+
+
+def test_sales_match_response_model_bytes():
+    sales = _sales()
+    for sale in sales:
+        _assert_same_bytes(_sale_to_read(sale), SaleOrderRead)
+    # Stored floats keep their text form ("10.0", not "10")
+    assert b'"payment":{"method":"card","depositAmount":"100.5","discountPercent":"10.0"}' in render(_sale_to_read(sales[0]))
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        summaries = [_sale_to_summary(s) for s in sales]
+        page = SaleList(items=summaries, page_size=2, has_more=True, next_cursor="abc")
+    _assert_same_bytes(page, SaleList)
@@ -0,0 +1,44 @@
+import pytest
+
+from sqlalchemy import event, select
+
+from app.models.product import Product
+from app.services import stock
+
+
+def _levels(db):
+    return dict(db.execute(select(Product.sku, Product.stock_quantity)).all())
+
+
+def test_adjust_locks_every_changed_sku_before_moving_stock(session_factory, add_products, monkeypatch):
+    add_products(("A-1", "10.00", 5), ("B-1", "10.00", 5), ("C-1", "10.00", 5))
+    calls = []
+    lock = stock.lock
+    monkeypatch.setattr(stock, "lock", lambda db, skus: calls.append(("lock", sorted(skus))) or lock(db, skus))
+
+    with session_factory() as db:
+        @event.listens_for(db.get_bind(), "before_cursor_execute")
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith("UPDATE products"):
+                calls.append(("update",))
+
+        # Swap B for A: a release of B and a reservation of A; C is unchanged
+        levels = stock.adjust(db, {"B-1": 2, "C-1": 1}, {"A-1": 2, "C-1": 1})
+        db.commit()
+        event.remove(db.get_bind(), "before_cursor_execute", record)
+
+        assert calls == [("lock", ["A-1", "B-1"]), ("update",), ("update",)]
+        assert {sku: quantity for sku, (quantity, _) in levels.items()} == {"A-1": 3, "B-1": 7}
+        assert _levels(db) == {"A-1": 3, "B-1": 7, "C-1": 5}
+
+
+def test_skus_outside_the_catalog_are_not_stock_tracked(session_factory, add_products):
+    add_products(("A-1", "10.00", 5))
+    with session_factory() as db:
+        levels = stock.reserve(db, {"A-1": 2, "CUSTOM-SOFA": 1})
+        assert list(levels) == ["A-1"]
+        assert stock.release(db, {"CUSTOM-SOFA": 1}) == {}
+        # A product taken out of the catalog still can't be sold
+        db.execute(Product.__table__.update().values(is_active=False))
+        with pytest.raises(stock.StockError, match="Product not found"):
+            stock.reserve(db, {"A-1": 1})